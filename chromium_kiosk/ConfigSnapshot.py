@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, ClassVar
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+
+def freeze(value: Any) -> Any:  # noqa: ANN401
+    """
+    Recursively convert value to read only structure, dicts become mapping proxies and lists become tuples
+    """
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:  # noqa: ANN401
+    """
+    Inverse of freeze, mapping proxies become dicts, tuples become lists and frozensets become sets
+    """
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    if isinstance(value, frozenset):
+        return {thaw(item) for item in value}
+    return value
+
+
+def _json_default(value: Any) -> Any:  # noqa: ANN401
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+def hash_value(value: Any) -> bytes:  # noqa: ANN401
+    payload = json.dumps(value, sort_keys=True, default=_json_default)
+    return hashlib.md5(payload.encode(), usedforsecurity=False).digest()
+
+
+class ConfigSnapshot:
+    """
+    Immutable version of loaded configuration.
+
+    Every top level key is a section with precomputed hash, sections that did not change
+    between two loads are shared, so comparing two snapshots only needs to look at hashes.
+    """
+
+    __slots__ = ("_hash", "_hashes", "_sections")
+
+    _sections: Mapping[str, Any]
+    _hashes: Mapping[str, bytes]
+    _hash: bytes
+
+    # Slotted subclass per set of section names, so section access is plain slot lookup
+    _slotted_classes: ClassVar[dict[tuple[str, ...], type[ConfigSnapshot]]] = {}
+
+    def __new__(cls, sections: dict[str, Any], hashes: dict[str, bytes]) -> ConfigSnapshot:  # noqa: PYI034
+        _ = hashes
+        if cls is not ConfigSnapshot:
+            return super().__new__(cls)
+
+        slots = tuple(sorted(key for key in sections if key.isidentifier() and key.isupper()))
+        slotted_class = cls._slotted_classes.get(slots)
+        if not slotted_class:
+            slotted_class = type("ConfigSnapshot", (ConfigSnapshot,), {"__slots__": slots, "__module__": cls.__module__})
+            cls._slotted_classes[slots] = slotted_class
+        return super().__new__(slotted_class)
+
+    def __init__(self, sections: dict[str, Any], hashes: dict[str, bytes]) -> None:
+        combined = hashlib.md5(usedforsecurity=False)
+        for key in sorted(hashes):
+            combined.update(key.encode())
+            combined.update(hashes[key])
+
+        object.__setattr__(self, "_sections", MappingProxyType(sections))
+        object.__setattr__(self, "_hashes", MappingProxyType(hashes))
+        object.__setattr__(self, "_hash", combined.digest())
+        for key in type(self).__slots__:
+            object.__setattr__(self, key, sections[key])
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any], previous: ConfigSnapshot | None = None) -> ConfigSnapshot:
+        """
+        Create snapshot from dict
+        :param data: configuration sections
+        :param previous: snapshot to share unchanged sections with
+        :return:
+        """
+        sections = {}
+        hashes = {}
+        for key, value in data.items():
+            section_hash = hash_value(value)
+            if previous is not None and previous._hashes.get(key) == section_hash:  # noqa: SLF001
+                sections[key] = previous._sections[key]  # noqa: SLF001
+            else:
+                sections[key] = freeze(value)
+            hashes[key] = section_hash
+
+        return cls(sections, hashes)
+
+    @classmethod
+    def from_object(cls, config_obj: object, overrides: Mapping[str, Any] | None = None, previous: ConfigSnapshot | None = None) -> ConfigSnapshot:
+        """
+        Create snapshot from defaults defined by config class (UPPERCASE attributes) updated by overrides
+        """
+        data = {key: getattr(config_obj, key) for key in dir(config_obj) if key.isupper()}
+        if overrides:
+            data.update(overrides)
+        return cls.from_dict(data, previous)
+
+    def replace(self, **changes: Any) -> ConfigSnapshot:  # noqa: ANN401
+        sections = dict(self._sections)
+        hashes = dict(self._hashes)
+        for key, value in changes.items():
+            sections[key] = freeze(value)
+            hashes[key] = hash_value(value)
+        return ConfigSnapshot(sections, hashes)
+
+    def changed_sections(self, other: ConfigSnapshot) -> frozenset[str]:
+        """
+        Names of sections that differ between snapshots, identical snapshots are detected by single hash comparison
+        """
+        if self._hash == other._hash:
+            return frozenset()
+
+        return frozenset(
+            key for key in self._hashes.keys() | other._hashes.keys()
+            if self._hashes.get(key) != other._hashes.get(key)
+        )
+
+    @property
+    def hash(self) -> bytes:
+        return self._hash
+
+    def section_hash(self, name: str) -> bytes | None:
+        return self._hashes.get(name)
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        try:
+            return self._sections[name]
+        except KeyError:
+            msg = f"Config has no section {name}"
+            raise AttributeError(msg) from None
+
+    def __setattr__(self, name: str, value: object) -> None:
+        msg = "ConfigSnapshot is immutable, use replace()"
+        raise AttributeError(msg)
+
+    def __delattr__(self, name: str) -> None:
+        msg = "ConfigSnapshot is immutable"
+        raise AttributeError(msg)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sections)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._sections
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ConfigSnapshot):
+            return NotImplemented
+        return self._hash == other._hash
+
+    def __hash__(self) -> int:
+        return hash(self._hash)
+
+    def __copy__(self) -> ConfigSnapshot:
+        # Immutable, copy is the same snapshot
+        return self
+
+    def __deepcopy__(self, _memo: dict[int, Any]) -> ConfigSnapshot:
+        return self
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Mapping proxies can not be pickled, snapshot is created again from plain data
+        return ConfigSnapshot.from_dict, (thaw(self._sections),)
+
+    def __repr__(self) -> str:
+        return f"ConfigSnapshot({dict(self._sections)!r})"
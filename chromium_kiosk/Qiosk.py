@@ -1,17 +1,30 @@
 from __future__ import annotations
 
 import hashlib
+import json
+import logging
 import os
+import re
 import subprocess
-from typing import TYPE_CHECKING, Callable, Generic, TypeVar, Union
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Generic, TypeVar, Union
+
+from websocket import WebSocketException, create_connection
 
 from chromium_kiosk.tools import find_binary
+from chromium_kiosk.tools.PerformanceProfile import CHROMIUM_FLAGS_ENV, resolve_tuning
 
 if TYPE_CHECKING:
-    from chromium_kiosk.config import Config
+    from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+
+log = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+DEFAULT_CONTROL_PORT = 1791
+# Not supported by every qiosk version, see Qiosk.supports_option
+CONTROL_PORT_OPTION = "--remote-control-port"
+
 class QioskCommandValue(Generic[T]):
 
     def __init__(self, value_resolver: Callable[[], T], payload_resolver: Callable[[T], dict[str, str | int | list[str]]], hash_resolver: Callable[[T], str] | None = None) -> None:
@@ -32,9 +45,21 @@ QioskCommandValueType = Union[QioskCommandValue[str], QioskCommandValue[int], Qi
 
 
 class Qiosk:
-    config: Config
-
-    def __init__(self, config: Config) -> None:
+    config: ConfigSnapshot
+
+    # Sections that can not be applied to running browser using remote control commands
+    restart_required_sections: ClassVar[frozenset[str]] = frozenset({
+        "EXTRA_ARGUMENTS",
+        "EXTRA_ENV_VARS",
+        "PERFORMANCE_PROFILE",
+        "REMOTE_DEBUGGING",
+        "PROFILE_NAME",
+        "VIRTUAL_KEYBOARD",
+        "SCROLL_BARS",
+        "CURSOR",
+    })
+
+    def __init__(self, config: ConfigSnapshot) -> None:
         self.config = config
         executable_path = find_binary(["qiosk"])
 
@@ -43,12 +68,16 @@ class Qiosk:
             raise ValueError(msg)
 
         self.executable_path = executable_path
+        self.process: subprocess.Popen[bytes] | None = None
+        self._restart_requested = False
+        self._help: str | None = None
 
-    def _build_command(self) -> list[str]:
+    def _build_command(self, window_mode: str | None = None, control_port: int | None = None) -> list[str]:
         command = [self.executable_path, self.config.HOME_PAGE]
 
-        if self.config.WINDOW_MODE:
-            command.extend(["-m", self.config.WINDOW_MODE])
+        window_mode = window_mode or self.config.WINDOW_MODE
+        if window_mode:
+            command.extend(["-m", window_mode])
 
         if self.config.IDLE_TIME:
             command.extend(["-i", str(self.config.IDLE_TIME)])
@@ -85,18 +114,36 @@ class Qiosk:
         if not self.config.CURSOR.get("ENABLED", True):
             command.append("--hide-cursor")
 
+        if control_port:
+            command.extend([CONTROL_PORT_OPTION, str(control_port)])
+
         return command
 
-    def _build_env(self) -> dict[str, str]:
+    def supports_option(self, option: str) -> bool:
+        """
+        Check that installed qiosk accepts command line option, options are read from its --help once
+        """
+        if self._help is None:
+            try:
+                result = subprocess.run([self.executable_path, "--help"], capture_output=True, timeout=10, check=False)
+                self._help = (result.stdout + result.stderr).decode("UTF-8", "replace")
+            except (OSError, subprocess.SubprocessError):
+                log.warning("Failed to read options of %s", self.executable_path, exc_info=True)
+                self._help = ""
+        return re.search(rf"(?<![\w-]){re.escape(option)}(?![\w-])", self._help) is not None
+
+    def _build_env(self, remote_debugging_port: int | None = None) -> dict[str, str]:
         my_env = os.environ.copy()
 
-        my_env.update({k: str(v) for k, v in self.config.EXTRA_ENV_VARS.items()})
+        chromium_flags, tuning_env = resolve_tuning(self.config.PERFORMANCE_PROFILE, self.config.EXTRA_ARGUMENTS, self.config.EXTRA_ENV_VARS)
+        my_env.update(tuning_env)
 
-        if self.config.REMOTE_DEBUGGING:
-            my_env["QTWEBENGINE_REMOTE_DEBUGGING"] = str(self.config.REMOTE_DEBUGGING)
+        remote_debugging = remote_debugging_port or self.config.REMOTE_DEBUGGING
+        if remote_debugging:
+            my_env["QTWEBENGINE_REMOTE_DEBUGGING"] = str(remote_debugging)
 
-        if self.config.EXTRA_ARGUMENTS:
-            my_env["QTWEBENGINE_CHROMIUM_FLAGS"] = self.config.EXTRA_ARGUMENTS
+        if chromium_flags:
+            my_env[CHROMIUM_FLAGS_ENV] = chromium_flags
 
         if self.config.VIRTUAL_KEYBOARD.get("ENABLED", False):
             my_env["QT_IM_MODULE"] = "qtvirtualkeyboard"
@@ -104,18 +151,18 @@ class Qiosk:
         return my_env
 
     @staticmethod
-    def resolve_command_mappings_config(config: Config) -> dict[str, QioskCommandValueType]:
+    def resolve_command_mappings_config(config: ConfigSnapshot) -> dict[str, QioskCommandValueType]:
         def white_list_value_resolver() -> list[str]:
             if not config.WHITE_LIST.get("ENABLED", False):
                 return []
 
-            return config.WHITE_LIST.get("URLS", [])
+            return list(config.WHITE_LIST.get("URLS", []))
 
         def white_list_hash_resolver(value: list[str]) -> str:
             return "".join(value)
 
         def permissions_value_resolver() -> list[str]:
-            return config.ALLOWED_FEATURES
+            return list(config.ALLOWED_FEATURES)
 
         def permissions_hash_resolver(value: list[str]) -> str:
             return "".join(value)
@@ -209,10 +256,112 @@ class Qiosk:
 
         return diffs
 
+    @staticmethod
+    def send_commands(control_url: str, commands: dict[str, QioskCommandValueType], timeout: float = 2) -> list[str]:
+        """
+        Send remote control commands over single connection
+        :return: responses to commands
+        """
+        ws = create_connection(control_url, timeout=timeout)
+        try:
+            responses = []
+            for command_name, config_value in commands.items():
+                ws.send(json.dumps({"command": command_name, "data": config_value.payload}))
+                responses.append(str(ws.recv()))
+            return responses
+        finally:
+            ws.close()
+
+    @staticmethod
+    def get_instance_state_path() -> Path:
+        return Path.home().joinpath(".chromium-kiosk-instance.json")
+
+    @staticmethod
+    def write_instance_state(state: dict[str, Any]) -> None:
+        """
+        Store information about visible browser instance, so other processes know where to send commands
+        """
+        state_path = Qiosk.get_instance_state_path()
+        tmp_path = state_path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(json.dumps(state), encoding="UTF-8")
+            tmp_path.replace(state_path)
+        except OSError:
+            log.warning("Failed to write instance state to %s", state_path, exc_info=True)
+
+    @staticmethod
+    def read_instance_state() -> dict[str, Any]:
+        try:
+            state = json.loads(Qiosk.get_instance_state_path().read_text(encoding="UTF-8"))
+        except (OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    @staticmethod
+    def get_control_url() -> str:
+        """
+        Remote control URL of visible browser instance
+        """
+        return "ws://localhost:{}".format(Qiosk.read_instance_state().get("control_port", DEFAULT_CONTROL_PORT))
+
+    def spawn(self, window_mode: str | None = None, control_port: int | None = None, remote_debugging_port: int | None = None) -> subprocess.Popen[bytes]:
+        """
+        Start browser without waiting for it
+        :return:
+        """
+        return subprocess.Popen(self._build_command(window_mode, control_port), env=self._build_env(remote_debugging_port))
+
     def run(self) -> None:
         """
-        Start browser
+        Start browser, browser is started again when it exits because of restart()
         :return:
         """
 
-        subprocess.call(self._build_command(), env=self._build_env())
+        while True:
+            self._restart_requested = False
+            process = self.spawn()
+            self.process = process
+            self.write_instance_state({"pid": process.pid, "control_port": DEFAULT_CONTROL_PORT, "remote_debugging_port": self.config.REMOTE_DEBUGGING})
+            returncode = process.wait()
+            if not self._restart_requested:
+                if returncode:
+                    log.warning("Qiosk (pid %d) exited with code %d", process.pid, returncode)
+                return
+
+    def apply_config(self, config: ConfigSnapshot) -> None:
+        """
+        Apply changed config to running browser over its remote control, restart it when changes can not be applied so
+        """
+        previous = self.config
+        changed_sections = config.changed_sections(previous)
+        self.config = config
+        if not changed_sections:
+            return
+        log.info("Applying changed config sections: %s", ", ".join(sorted(changed_sections)))
+        if changed_sections & self.restart_required_sections:
+            log.warning("Config sections %s require restart", ", ".join(sorted(changed_sections & self.restart_required_sections)))
+            self.restart()
+            return
+
+        diffs = self.diff_command_mappings_config_value(self.resolve_command_mappings_config(previous), self.resolve_command_mappings_config(config))
+        if diffs and self.process and self.process.poll() is None:
+            log.debug(diffs)
+            try:
+                self.send_commands(f"ws://localhost:{DEFAULT_CONTROL_PORT}", diffs)
+            except (OSError, WebSocketException):
+                log.warning("Failed to send changed config to qiosk (pid %d)", self.process.pid, exc_info=True)
+
+    def restart(self) -> None:
+        """
+        Terminate running browser, run() starts it again
+        """
+        process = self.process
+        if not process or process.poll() is not None:
+            return
+        log.info("Restarting qiosk (pid %d)", process.pid)
+        self._restart_requested = True
+        process.terminate()
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
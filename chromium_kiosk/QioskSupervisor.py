@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import subprocess
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from websocket import WebSocketException, create_connection
+
+from chromium_kiosk.Qiosk import CONTROL_PORT_OPTION, DEFAULT_CONTROL_PORT, Qiosk
+from chromium_kiosk.tools.ProcessTree import ProcessTree
+
+if TYPE_CHECKING:
+    from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+
+log = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class QioskInstance:
+    process: subprocess.Popen[bytes]
+    slot: int
+    control_port: int
+    remote_debugging_port: int | None
+    config: ConfigSnapshot
+    spawned_at: float = dataclasses.field(default_factory=time.monotonic)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def send_command(self, command: str, data: dict[str, Any], timeout: float = 2) -> str:
+        ws = create_connection(f"ws://localhost:{self.control_port}", timeout=timeout)
+        try:
+            ws.send(json.dumps({"command": command, "data": data}))
+            return str(ws.recv())
+        finally:
+            ws.close()
+
+    def wait_ready(self, timeout: float) -> bool:
+        """
+        Wait until instance accepts remote control connections
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.alive:
+            try:
+                ws = create_connection(f"ws://localhost:{self.control_port}", timeout=1)
+            except (OSError, ValueError, WebSocketException):
+                # Port may be open before qiosk is able to complete handshake
+                time.sleep(0.1)
+                continue
+            ws.close()
+            return True
+        return False
+
+    def terminate(self) -> None:
+        if self.alive:
+            self.process.terminate()
+            try:
+                self.process.wait(5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+class QioskSupervisor:
+    """
+    Keeps hidden, fully loaded standby browser instance next to the visible one.
+
+    When visible instance exits or configuration change requires restart, standby is made visible
+    (one remote control command instead of cold start) and new standby is spawned in background.
+    Instances alternate between two slots, each with its own remote control and remote debugging port.
+    """
+
+    def __init__(self, qiosk: Qiosk, standby_control_port: int, warmup: float = 30) -> None:
+        # Without own control port both instances would listen on the default one
+        if not qiosk.supports_option(CONTROL_PORT_OPTION):
+            msg = f"Standby requires qiosk supporting {CONTROL_PORT_OPTION}, {qiosk.executable_path} does not support it"
+            raise ValueError(msg)
+        self.qiosk = qiosk
+        self.control_ports = (DEFAULT_CONTROL_PORT, standby_control_port)
+        self.warmup = warmup
+        self.primary: QioskInstance | None = None
+        self.standby: QioskInstance | None = None
+        self.standby_memory: int | None = None
+        self.restarts = 0
+        self._lock = threading.RLock()
+        self._stopping = False
+        self._restarting = False
+
+    def _spawn(self, slot: int, *, visible: bool) -> QioskInstance:
+        config = self.qiosk.config
+        remote_debugging_port = int(config.REMOTE_DEBUGGING) + slot if config.REMOTE_DEBUGGING else None
+        process = self.qiosk.spawn(
+            window_mode=None if visible else "hidden",
+            control_port=self.control_ports[slot],
+            remote_debugging_port=remote_debugging_port,
+        )
+        log.debug("Spawned %s qiosk instance (pid %d) in slot %d", "visible" if visible else "standby", process.pid, slot)
+        return QioskInstance(process, slot, self.control_ports[slot], remote_debugging_port, config)
+
+    def _write_state(self) -> None:
+        if not self.primary:
+            return
+        self.qiosk.write_instance_state({
+            "pid": self.primary.process.pid,
+            "control_port": self.primary.control_port,
+            "remote_debugging_port": self.primary.remote_debugging_port,
+            "standby_pid": self.standby.process.pid if self.standby else None,
+            "standby_memory": self.standby_memory,
+        })
+
+    def _spawn_standby(self) -> None:
+        with self._lock:
+            if self._stopping or not self.primary:
+                return
+            if self.standby:
+                self.standby.terminate()
+            standby = self._spawn(1 - self.primary.slot, visible=False)
+            self.standby = standby
+            self.standby_memory = None
+            self._write_state()
+
+        if standby.wait_ready(self.warmup):
+            # Give the page some time to load before measuring
+            time.sleep(min(5.0, self.warmup))
+            memory = ProcessTree(standby.process.pid).pss()
+            with self._lock:
+                if self.standby is standby:
+                    self.standby_memory = memory
+                    self._write_state()
+            log.info("Standby qiosk instance (pid %d) uses %.1f MiB", standby.process.pid, memory / 1024 / 1024)
+        else:
+            log.warning("Standby qiosk instance (pid %d) did not become ready in %d seconds", standby.process.pid, self.warmup)
+
+    def _spawn_standby_in_background(self) -> None:
+        threading.Thread(target=self._spawn_standby, name="qiosk_standby", daemon=True).start()
+
+    def _promote(self, instance: QioskInstance) -> bool:
+        """
+        Make standby instance visible and bring it up to date with current config,
+        called without holding the lock, remote control commands may take a while
+        :return: False when instance did not accept the commands, eg. it is shutting down
+        """
+        diffs = Qiosk.diff_command_mappings_config_value(
+            Qiosk.resolve_command_mappings_config(instance.config),
+            Qiosk.resolve_command_mappings_config(self.qiosk.config),
+        )
+        diffs.pop("setWindowMode", None)
+        start = time.monotonic()
+        try:
+            instance.send_command("setWindowMode", {"windowMode": self.qiosk.config.WINDOW_MODE})
+            for command_name, config_value in diffs.items():
+                instance.send_command(command_name, config_value.payload)
+        except (OSError, ValueError, WebSocketException):
+            log.exception("Failed to promote standby qiosk instance (pid %d)", instance.process.pid)
+            return False
+        instance.config = self.qiosk.config
+        log.info("Standby qiosk instance (pid %d) promoted in %.3f seconds", instance.process.pid, time.monotonic() - start)
+        return True
+
+    def run(self) -> int:
+        with self._lock:
+            self.primary = self._spawn(0, visible=True)
+            self._write_state()
+        self._spawn_standby_in_background()
+
+        while True:
+            primary = self.primary
+            if not primary:
+                return 0
+            returncode = primary.process.wait()
+            while self._restarting:
+                # Visible instance exited during restart, replacement will be promoted shortly
+                time.sleep(0.1)
+
+            with self._lock:
+                if self._stopping:
+                    return returncode
+                if self.primary is not primary:
+                    # Replaced by restart
+                    continue
+
+                self.restarts += 1
+                standby = self.standby
+                self.standby = None
+                promoted = standby if standby and standby.alive else None
+                if promoted:
+                    log.warning("Qiosk instance (pid %d) exited with code %d, promoting standby", primary.process.pid, returncode)
+                    self.primary = promoted
+                else:
+                    log.warning("Qiosk instance (pid %d) exited with code %d and there is no standby, restarting", primary.process.pid, returncode)
+                    self.primary = self._spawn(primary.slot, visible=True)
+                self._write_state()
+            if promoted and not self._promote(promoted):
+                # Instance may stay hidden, it is replaced by cold start once it exits
+                promoted.terminate()
+            self._spawn_standby_in_background()
+
+    def restart(self) -> None:
+        """
+        Replace visible instance with one started with current config
+        """
+        with self._lock:
+            if self.standby:
+                # Standby was started with old config
+                self.standby.terminate()
+                self.standby = None
+            if not self.primary:
+                return
+            log.info("Restarting qiosk (pid %d)", self.primary.process.pid)
+            replacement = self._spawn(1 - self.primary.slot, visible=False)
+            self._restarting = True
+
+        try:
+            if not replacement.wait_ready(self.warmup):
+                log.warning("Replacement qiosk instance (pid %d) did not become ready, promoting anyway", replacement.process.pid)
+
+            # Replacement is not visible to other threads yet, it is promoted before it replaces primary
+            if not self._promote(replacement):
+                log.warning("Replacement qiosk instance (pid %d) could not be promoted, keeping visible instance", replacement.process.pid)
+                replacement.terminate()
+                self._spawn_standby_in_background()
+                return
+            with self._lock:
+                old_primary = self.primary
+                self.primary = replacement
+                self.restarts += 1
+                self._write_state()
+        finally:
+            self._restarting = False
+        if old_primary:
+            old_primary.terminate()
+        self._spawn_standby_in_background()
+
+    def apply_config(self, config: ConfigSnapshot, *, send_commands: bool = False) -> None:
+        """
+        Use new config for future instances, restart when changes can not be applied to running browser
+        :param send_commands: send changes to visible instance, otherwise they are sent by separate watch_config
+        """
+        changed_sections = config.changed_sections(self.qiosk.config)
+        self.qiosk.config = config
+        if changed_sections:
+            log.info("Applying changed config sections: %s", ", ".join(sorted(changed_sections)))
+        if changed_sections & Qiosk.restart_required_sections:
+            log.warning("Config sections %s require restart", ", ".join(sorted(changed_sections & Qiosk.restart_required_sections)))
+            self.restart()
+            return
+
+        with self._lock:
+            primary = self.primary
+            if not send_commands or not changed_sections or not primary or not primary.alive:
+                return
+            diffs = Qiosk.diff_command_mappings_config_value(
+                Qiosk.resolve_command_mappings_config(primary.config),
+                Qiosk.resolve_command_mappings_config(config),
+            )
+            if diffs:
+                try:
+                    Qiosk.send_commands(f"ws://localhost:{primary.control_port}", diffs)
+                except (OSError, WebSocketException):
+                    log.warning("Failed to send changed config to qiosk instance (pid %d)", primary.process.pid, exc_info=True)
+            primary.config = config
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopping = True
+            for instance in (self.standby, self.primary):
+                if instance:
+                    instance.terminate()
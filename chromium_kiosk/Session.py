@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+log = logging.getLogger(__name__)
+
+
+def read_uptime(path: Path = Path("/proc/uptime")) -> float | None:
+    try:
+        return float(path.read_text(encoding="UTF-8").split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclasses.dataclass
+class SessionComponent:
+    """
+    Part of X session, either process (command) or in-process action.
+    Process with wait=True (eg. prehook) is finished when it exits or times out, other processes once they are spawned.
+    """
+    name: str
+    command: list[str] | None = None
+    action: Callable[[], Any] | None = None
+    wait: bool = False
+    timeout: float | None = None
+    depends_on: tuple[str, ...] = ()
+
+
+@dataclasses.dataclass
+class TimelineEntry:
+    name: str
+    started: float | None = None  # Seconds since session start
+    finished: float | None = None
+    error: str | None = None
+
+
+class Session:
+    """
+    Starts session components concurrently, component waits only for components it depends on.
+    Start and finish of every component is recorded in timeline.
+    """
+
+    def __init__(self, components: list[SessionComponent]) -> None:
+        self.components = components
+        self.started_at = time.monotonic()
+        # Seconds since boot at session start, so timeline can be read as power-on to content time
+        self.uptime_at_start = read_uptime()
+        self.timeline: dict[str, TimelineEntry] = {}
+        self.processes: list[subprocess.Popen[bytes]] = []
+        self._finished: dict[str, threading.Event] = {component.name: threading.Event() for component in components}
+        self._lock = threading.Lock()
+
+    def _now(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def mark(self, name: str, *, started: bool = False, finished: bool = False, error: str | None = None) -> None:
+        with self._lock:
+            entry = self.timeline.setdefault(name, TimelineEntry(name))
+            if started:
+                entry.started = self._now()
+            if finished:
+                entry.finished = self._now()
+            if error:
+                entry.error = error
+
+    def _run_component(self, component: SessionComponent) -> None:
+        try:
+            for dependency in component.depends_on:
+                if dependency in self._finished:
+                    self._finished[dependency].wait()
+
+            self.mark(component.name, started=True)
+            if component.action:
+                component.action()
+            elif component.command:
+                process = subprocess.Popen(component.command, stdin=subprocess.DEVNULL)  # noqa: S603
+                with self._lock:
+                    self.processes.append(process)
+                if component.wait:
+                    try:
+                        process.wait(component.timeout)
+                    except subprocess.TimeoutExpired:
+                        log.warning("Session component %s did not finish in %s seconds, continuing without it", component.name, component.timeout)
+                        self.mark(component.name, error="timeout")
+        except Exception as e:
+            log.exception("Session component %s failed", component.name)
+            self.mark(component.name, error=f"{type(e).__name__}: {e}")
+        finally:
+            self.mark(component.name, finished=True)
+            self._finished[component.name].set()
+
+    def start(self) -> None:
+        for component in self.components:
+            threading.Thread(target=self._run_component, args=(component,), name=f"session_{component.name}", daemon=True).start()
+
+    def wait_for(self, names: tuple[str, ...] | list[str], timeout: float | None = None) -> bool:
+        """
+        Wait until named components finish
+        :return: False when timeout expired
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for name in names:
+            event = self._finished.get(name)
+            if event and not event.wait(None if deadline is None else max(0.0, deadline - time.monotonic())):
+                return False
+        return True
+
+    def stop(self) -> None:
+        """
+        Terminate processes started by session
+        """
+        with self._lock:
+            processes = list(self.processes)
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            try:
+                process.wait(2)
+            except subprocess.TimeoutExpired:  # noqa: PERF203
+                process.kill()
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "uptime_at_start": self.uptime_at_start,
+                "components": [dataclasses.asdict(entry) for entry in sorted(self.timeline.values(), key=lambda entry: entry.started or 0)],
+            }
+
+    @staticmethod
+    def get_timeline_path() -> Path:
+        return Path.home().joinpath(".chromium-kiosk-session.json")
+
+    def write_timeline(self) -> None:
+        timeline_path = self.get_timeline_path()
+        try:
+            timeline_path.write_text(json.dumps(self.to_dict()), encoding="UTF-8")
+        except OSError:
+            log.warning("Failed to write session timeline to %s", timeline_path, exc_info=True)
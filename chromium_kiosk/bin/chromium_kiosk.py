@@ -8,43 +8,85 @@ Website: https://github.com/Salamek/chromium-kiosk
 
 Command details:
     run                 Run the application.
+    session             Start X session components and run the application.
+    benchmark_profiles  Run HOME_PAGE with each performance profile (all when none given) and compare them.
+    reset_session       Clear cookies, site storage and history of visible browser and navigate to HOME_PAGE.
+    logs                Filter current and rotated (also compressed) logs or summarize incidents per hour.
 Usage:
-    chromium-kiosk run [-l DIR] [--config_prod]
+    chromium-kiosk run [-l DIR] [--config_prod] [--watch_config]
+    chromium-kiosk session [-l DIR] [--config_prod] [--watch_config]
     chromium-kiosk watch_config [--config_prod]
-    chromium-kiosk system_info [--config_prod]
+    chromium-kiosk system_info [--config_prod] [--json]
+    chromium-kiosk touch_latency [--config_prod] [--duration=SECONDS] [--json]
+    chromium-kiosk benchmark_profiles [--config_prod] [--duration=SECONDS] [--json] [<profile>...]
+    chromium-kiosk history [--config_prod] [--since=TIME] [--until=TIME] [--metric=NAME]... [--json]
+    chromium-kiosk reset_session [--config_prod] [--json]
+    chromium-kiosk logs [-l DIR] [--name=NAME] [--since=TIME] [--until=TIME] [--level=LEVEL] [--source=PATTERN]... [--summary] [--json]
     chromium-kiosk (-h | --help)
 
 Options:
     --config_prod               Load the production configuration instead of dev
-    -l DIR --log_dir=DIR        Directory to log into
+    --watch_config              Apply config changes to the browser from this process, separate watch_config is not needed
+    -l DIR --log_dir=DIR        Directory to log into, logs command reads logs from it (home directory by default)
+    --json                      Print machine-readable JSON output
+    --duration=SECONDS          Duration of measurement [default: 30]
+    --since=TIME                Show entries newer than TIME, duration back from now (30m, 12h, 2d) or ISO date and time
+    --until=TIME                Show entries older than TIME
+    --metric=NAME               Show only given metric (browser_rss, browser_pss, browser_cpu, browser_restart, ...)
+    --name=NAME                 Read only logs of given command (kiosk, watch_config, ...), all logs by default
+    --level=LEVEL               Show entries of this level and above (debug|info|warning|error|fatal) [default: debug]
+    --source=PATTERN            Show only entries logged from matching source file, eg. Heartbeat.py or Qiosk*.py:29?
+    --summary                   Print number of entries, errors, crashes, restarts and config applies per hour
 """
 from __future__ import annotations
 
+import dataclasses
+import datetime as dt
 import json
 import logging
 import logging.handlers
 import os
 import signal
 import sys
+import threading
 import time
 from functools import wraps
-from importlib import import_module
 from pathlib import Path
 from typing import TYPE_CHECKING, Callable, ClassVar, TypeVar
 
-import yaml
 from docopt import docopt
-from watchdog import events
-from watchdog.observers import Observer
-from websocket import create_connection
+from websocket import WebSocketException, create_connection
 
-import chromium_kiosk as app_root
+from chromium_kiosk.config_loader import find_config_files, get_config
+from chromium_kiosk.enum.HistoryMetricEnum import HistoryMetricEnum
+from chromium_kiosk.enum.HotplugDeviceEnum import HotplugDeviceEnum
+from chromium_kiosk.enum.PerformanceProfileEnum import PerformanceProfileEnum
 from chromium_kiosk.enum.RotationEnum import RotationEnum
-from chromium_kiosk.Qiosk import Qiosk
+from chromium_kiosk.Qiosk import CONTROL_PORT_OPTION, Qiosk
+from chromium_kiosk.QioskSupervisor import QioskSupervisor
+from chromium_kiosk.Session import Session, SessionComponent
 
 if TYPE_CHECKING:
-    from chromium_kiosk.config import Config
-
+    from collections.abc import Iterable
+
+    from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+    from chromium_kiosk.tools.ConfigWatcher import ConfigChangeHandler
+
+from chromium_kiosk.tools import find_binary
+from chromium_kiosk.tools.ConfigWatcher import ConfigWatcher
+from chromium_kiosk.tools.DevTools import DevTools, DevToolsError
+from chromium_kiosk.tools.Heartbeat import Heartbeat, HeartbeatSettings
+from chromium_kiosk.tools.LogAnalyzer import LogReader, LogSummary, find_log_files
+from chromium_kiosk.tools.MetricsHistory import ROTATION_DEGREES, MetricsHistory, parse_time
+from chromium_kiosk.tools.MetricsSampler import MetricsSampler
+from chromium_kiosk.tools.Playlist import Playlist, PlaylistItem
+from chromium_kiosk.tools.ProfileBenchmark import ProfileBenchmark, get_free_port
+from chromium_kiosk.tools.ScreenCapture import DevToolsFrameSource, ScreenCapture, X11FrameSource
+from chromium_kiosk.tools.ScreenCaptureServer import ScreenCaptureServer
+from chromium_kiosk.tools.SessionReset import SessionReset
+from chromium_kiosk.tools.SystemInfo import SystemInfo
+from chromium_kiosk.tools.TouchLatency import TouchLatencyProbe, summarize
+from chromium_kiosk.tools.UeventMonitor import UeventMonitor
 from chromium_kiosk.tools.Wayland import Wayland
 from chromium_kiosk.tools.X11 import X11
 
@@ -53,26 +95,221 @@ window_system = X11() if not os.getenv("WAYLAND_DISPLAY") else Wayland()
 
 CT = TypeVar("CT")
 
+ROTATION_SECTIONS = frozenset({"DISPLAY_ROTATION", "SCREEN_ROTATION", "TOUCHSCREEN_ROTATION", "TOUCHSCREEN"})
+
 OPTIONS = docopt(__doc__)
-APP_ROOT_FOLDER = Path(app_root.__file__).parent.absolute()
 
 
-def resolve_rotation_config(options: Config) -> None:
+def resolve_rotations(options: ConfigSnapshot) -> tuple[RotationEnum, RotationEnum]:
+    """
+    Resolve rotation of screen and touchscreen from config
+    :return: tuple of screen rotation and touchscreen rotation
+    """
     # Rotation options are set separately, use them
     if options.TOUCHSCREEN_ROTATION and options.SCREEN_ROTATION:
-        window_system.rotate_screen(RotationEnum(options.SCREEN_ROTATION))
-        window_system.rotate_touchscreen(RotationEnum(options.TOUCHSCREEN_ROTATION), options.TOUCHSCREEN)
-    elif not options.TOUCHSCREEN_ROTATION and options.SCREEN_ROTATION:
-        window_system.rotate_screen(RotationEnum(options.SCREEN_ROTATION))
-        window_system.rotate_touchscreen(RotationEnum.NORMAL, options.TOUCHSCREEN)
-    elif options.TOUCHSCREEN_ROTATION and not options.SCREEN_ROTATION:
-        window_system.rotate_screen(RotationEnum.NORMAL)
-        window_system.rotate_touchscreen(RotationEnum(options.TOUCHSCREEN_ROTATION), options.TOUCHSCREEN)
-    elif options.DISPLAY_ROTATION:
-        window_system.rotate_display(RotationEnum(options.DISPLAY_ROTATION), force_touchscreen_name=options.TOUCHSCREEN)
-    else:
-        # just fallback to normal
-        window_system.rotate_display(RotationEnum.NORMAL, force_touchscreen_name=options.TOUCHSCREEN)
+        return RotationEnum(options.SCREEN_ROTATION), RotationEnum(options.TOUCHSCREEN_ROTATION)
+    if not options.TOUCHSCREEN_ROTATION and options.SCREEN_ROTATION:
+        return RotationEnum(options.SCREEN_ROTATION), RotationEnum.NORMAL
+    if options.TOUCHSCREEN_ROTATION and not options.SCREEN_ROTATION:
+        return RotationEnum.NORMAL, RotationEnum(options.TOUCHSCREEN_ROTATION)
+    if options.DISPLAY_ROTATION:
+        return RotationEnum(options.DISPLAY_ROTATION), RotationEnum(options.DISPLAY_ROTATION)
+
+    # just fallback to normal
+    return RotationEnum.NORMAL, RotationEnum.NORMAL
+
+
+def record_history(options: ConfigSnapshot, metric: HistoryMetricEnum, value: float) -> None:
+    """
+    Record single event into metrics history, for events happening outside of metrics sampler
+    """
+    if not options.HISTORY.get("ENABLED", False):
+        return
+    try:
+        with MetricsHistory(MetricsHistory.get_history_path(), int(options.HISTORY.get("CAPACITY", 65536))) as metrics_history:
+            metrics_history.record(metric, value)
+    except (OSError, ValueError):
+        logging.getLogger(__name__).warning("Failed to record %s into metrics history", metric.name, exc_info=True)
+
+
+def resolve_rotation_config(options: ConfigSnapshot, devices: Iterable[HotplugDeviceEnum] = tuple(HotplugDeviceEnum)) -> None:
+    screen_rotation, touchscreen_rotation = resolve_rotations(options)
+    # Without separate rotations the display is rotated as a whole, touchscreen is kept as is when screen rotation failed
+    rotate_as_display = not options.SCREEN_ROTATION and not options.TOUCHSCREEN_ROTATION
+    if HotplugDeviceEnum.SCREEN in devices:
+        screen_rotated = window_system.rotate_screen(screen_rotation)
+        record_history(options, HistoryMetricEnum.SCREEN_ROTATION, ROTATION_DEGREES[screen_rotation])
+        if rotate_as_display and not screen_rotated:
+            logging.getLogger(__name__).warning("Failed to rotate screen to %s, touchscreen rotation is skipped", screen_rotation.value)
+            return
+    if HotplugDeviceEnum.TOUCHSCREEN in devices:
+        window_system.rotate_touchscreen(touchscreen_rotation, options.TOUCHSCREEN)
+        record_history(options, HistoryMetricEnum.TOUCHSCREEN_ROTATION, ROTATION_DEGREES[touchscreen_rotation])
+
+
+def start_hotplug_monitor(options: ConfigSnapshot, current_config: Callable[[], ConfigSnapshot]) -> None:
+    """
+    Start monitoring of screen and touchscreen hotplug in background thread, rotation is reapplied to (re)plugged devices
+    :param current_config: config reloaded since start, rotation is resolved from it on every hotplug
+    """
+    log = logging.getLogger(__name__)
+    try:
+        monitor = UeventMonitor(
+            window_system,
+            lambda devices: resolve_rotation_config(current_config(), devices),
+            force_touchscreen_name=options.TOUCHSCREEN if isinstance(options.TOUCHSCREEN, str) else None,
+            debounce=float(options.HOTPLUG.get("DEBOUNCE", 0.5)),
+        )
+    except OSError:
+        log.warning("Unable to listen for hotplug events, rotation will not be reapplied on hotplug", exc_info=True)
+        return
+
+    threading.Thread(target=monitor.run, name="hotplug", daemon=True).start()
+
+
+def start_config_watcher(options: ConfigSnapshot, on_change: ConfigChangeHandler, *, watch_files: bool) -> ConfigWatcher:
+    """
+    Apply config changes on SIGHUP and, when watch_files is set, on modification of config files
+    """
+    config_watcher = ConfigWatcher(options, parse_config, on_change)
+    # Reload runs in thread, main thread is just waiting for browser or sleeping
+    signal.signal(signal.SIGHUP, lambda _signum, _frame: config_watcher.reload_in_background())
+    if watch_files:
+        config_watcher.start(find_config_files())
+    return config_watcher
+
+
+def get_visible_devtools(options: ConfigSnapshot) -> DevTools:
+    """
+    DevTools of visible browser instance, it changes when standby instance is promoted
+    """
+    port = Qiosk.read_instance_state().get("remote_debugging_port") or options.REMOTE_DEBUGGING
+    return DevTools(int(port))
+
+
+def start_playlist(options: ConfigSnapshot, current_config: Callable[[], ConfigSnapshot]) -> Playlist | None:
+    """
+    Start playlist in background thread, pages are switched over DevTools of visible browser instance
+    :param current_config: config reloaded since start
+    """
+    log = logging.getLogger(__name__)
+    if not options.REMOTE_DEBUGGING:
+        log.warning("Playlist requires REMOTE_DEBUGGING to be enabled")
+        return None
+
+    try:
+        items = [PlaylistItem.from_config(item) for item in options.PLAYLIST.get("ITEMS", [])]
+    except ValueError as e:
+        log.error("Invalid playlist configuration: %s", e)  # noqa: TRY400
+        return None
+    if not items:
+        log.warning("Playlist is enabled but has no items")
+        return None
+
+    playlist = Playlist(
+        items,
+        lambda: get_visible_devtools(current_config()),
+        preload=float(options.PLAYLIST.get("PRELOAD", 5)),
+        max_preloaded=int(options.PLAYLIST.get("MAX_PRELOADED", 1)),
+    )
+    threading.Thread(target=playlist.run, name="playlist", daemon=True).start()
+    return playlist
+
+
+def start_heartbeat(options: ConfigSnapshot, current_config: Callable[[], ConfigSnapshot], restart: Callable[[], None]) -> Heartbeat | None:
+    """
+    Start detection of frozen page in background thread
+    :param current_config: config reloaded since start, its HOME_PAGE is pushed to heartbeat on reload
+    :param restart: restarts visible browser instance, last resort when page does not recover
+    """
+    if not options.REMOTE_DEBUGGING:
+        logging.getLogger(__name__).warning("Heartbeat requires REMOTE_DEBUGGING to be enabled")
+        return None
+
+    heartbeat = Heartbeat(
+        lambda: get_visible_devtools(current_config()),
+        current_config().HOME_PAGE,
+        restart,
+        HeartbeatSettings.from_config(options.HEARTBEAT),
+    )
+    threading.Thread(target=heartbeat.run, name="heartbeat", daemon=True).start()
+    return heartbeat
+
+
+def start_session_reset(options: ConfigSnapshot, current_config: Callable[[], ConfigSnapshot]) -> SessionReset | None:
+    """
+    Start resetting session of idle kiosk in background thread
+    :param current_config: config reloaded since start, its HOME_PAGE is pushed to session reset on reload
+    """
+    log = logging.getLogger(__name__)
+    if not options.REMOTE_DEBUGGING:
+        log.warning("Session reset requires REMOTE_DEBUGGING to be enabled")
+        return None
+
+    session_reset = SessionReset(
+        lambda: get_visible_devtools(current_config()),
+        current_config().HOME_PAGE,
+        load_timeout=float(options.SESSION_RESET.get("LOAD_TIMEOUT", 10)),
+    )
+    idle_time = float(options.SESSION_RESET.get("IDLE_TIME", 120))
+    if idle_time:
+        threading.Thread(target=session_reset.run, args=(window_system.get_idle_time, idle_time), name="session_reset", daemon=True).start()
+    return session_reset
+
+
+def start_metrics_sampler(options: ConfigSnapshot, current_config: Callable[[], ConfigSnapshot], heartbeat: Heartbeat | None = None) -> MetricsSampler | None:
+    """
+    Start recording browser metrics into metrics history in background thread
+    :param current_config: config reloaded since start
+    """
+    try:
+        metrics_history = MetricsHistory(MetricsHistory.get_history_path(), int(options.HISTORY.get("CAPACITY", 65536)))
+    except (OSError, ValueError):
+        logging.getLogger(__name__).warning("Unable to open metrics history", exc_info=True)
+        return None
+
+    sampler = MetricsSampler(
+        metrics_history,
+        lambda: Qiosk.read_instance_state().get("pid"),
+        float(options.HISTORY.get("INTERVAL", 60)),
+        devtools_factory=(lambda: get_visible_devtools(current_config())) if options.REMOTE_DEBUGGING else None,
+        heartbeat=heartbeat,
+    )
+    threading.Thread(target=sampler.run, name="metrics_sampler", daemon=True).start()
+    return sampler
+
+
+def start_screen_capture(options: ConfigSnapshot, current_config: Callable[[], ConfigSnapshot]) -> ScreenCaptureServer | None:
+    """
+    Start capturing the screen in background thread and serving captured frames over HTTP
+    :param current_config: config reloaded since start
+    """
+    log = logging.getLogger(__name__)
+    settings = options.SCREEN_CAPTURE
+    source: DevToolsFrameSource | X11FrameSource
+    try:
+        if settings.get("SOURCE", "devtools") == "x11":
+            source = X11FrameSource(int(settings.get("VARIANT_WIDTH", 480)))
+        elif options.REMOTE_DEBUGGING:
+            source = DevToolsFrameSource(lambda: get_visible_devtools(current_config()), int(settings.get("VARIANT_WIDTH", 480)), int(settings.get("VARIANT_QUALITY", 60)))
+        else:
+            log.warning("Screen capture from devtools requires REMOTE_DEBUGGING to be enabled")
+            return None
+
+        capture = ScreenCapture(
+            source,
+            interval=float(settings.get("INTERVAL", 10)),
+            threshold=int(settings.get("THRESHOLD", 5)),
+            max_duty=float(settings.get("MAX_DUTY", 0.05)),
+        )
+        server = ScreenCaptureServer(capture, settings.get("HOST", "127.0.0.1"), int(settings.get("PORT", 1793)))
+    except (ValueError, OSError):
+        log.warning("Unable to start screen capture", exc_info=True)
+        return None
+
+    threading.Thread(target=capture.run, name="screen_capture", daemon=True).start()
+    server.start()
+    return server
 
 
 class CustomFormatter(logging.Formatter):
@@ -118,70 +355,33 @@ def setup_logging(name: str | None = None, level: int = logging.DEBUG) -> None:
 
         file_name = log_dir.joinpath(f"chromium_kiosk_{name}.log")
         file_handler = logging.handlers.TimedRotatingFileHandler(file_name, when="d", backupCount=7)
+        file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
+        # Level limits console only, log file gets DEBUG statements too
+        root.setLevel(logging.DEBUG)
         root.addHandler(file_handler)
 
 
 
-def find_config_files(yaml_files: list[Path] | None = None) -> list[Path]:
-    return yaml_files or [f for f in [
-        Path("/etc/chromium-kiosk/config.yml"),
-        # Compability with old proprietary version
-        Path("/etc/granad-kiosk/config.yml"),
-        APP_ROOT_FOLDER.joinpath("..", "config.yml").absolute(),
-        APP_ROOT_FOLDER.joinpath("config.yml"),
-    ] if f.is_file()]
+def parse_config(previous: ConfigSnapshot | None = None) -> ConfigSnapshot:
+    """Parses command line options and loads the configuration.
 
-
-def get_config(config_class_string: str, yaml_files: list[Path] | None = None) -> Config:
-    """Load the Flask config from a class.
     Positional arguments:
-    config_class_string -- string representation of a configuration class that will be loaded (e.g.
-        'pypi_portal.config.Production').
-    yaml_files -- List of YAML files to load. This is for testing, leave None in dev/production.
-    Returns:
-    A class object to be fed into app.config.from_object().
-    """
-    config_module, config_class = config_class_string.rsplit(".", 1)
-    config_obj: Config = getattr(import_module(config_module), config_class)
-
-    # Load additional configuration settings.
-    yaml_files = find_config_files(yaml_files)
-    additional_dict = {}
-    for y in yaml_files:
-        with y.open("r", encoding="UTF-8") as f:
-            loaded_data = yaml.safe_load(f)
-            if isinstance(loaded_data, dict):
-                additional_dict.update(loaded_data)
-            else:
-                msg = f"Failed to parse configuration {y}"
-                raise TypeError(msg)
-
-    # Merge the rest into the Flask app config.
-    for key, value in additional_dict.items():
-        setattr(config_obj, key, value)
-
-    return config_obj
-
-
-
-def parse_config() -> Config:
-    """Parses command line options for Flask.
+    previous -- Previously loaded config, unchanged sections are shared with it.
 
     Returns:
-    Config instance to pass into create_app().
+    ConfigSnapshot instance.
     """
     # Figure out which class will be imported.
     config_class_string = "chromium_kiosk.config.Production" if OPTIONS["--config_prod"] else "chromium_kiosk.config.Config"
-    config_obj = get_config(config_class_string)
+    config_obj = get_config(config_class_string, previous=previous)
 
     if config_obj.FULL_SCREEN:  # @TODO remove in next minor version
-        config_obj.WINDOW_MODE = "fullscreen"
+        config_obj = config_obj.replace(WINDOW_MODE="fullscreen")
 
     return config_obj
 
 
-
 def command(name: str | None = None) -> Callable[[Callable[..., CT]], Callable[..., CT]]:
     """Decorator that registers the chosen command/function.
 
@@ -225,97 +425,359 @@ def command(name: str | None = None) -> Callable[[Callable[..., CT]], Callable[.
 
 
 
-@command()
-def run() -> None:
-    config = parse_config()
-    setup_logging("kiosk", logging.DEBUG if config.DEBUG else logging.WARNING)
+def start_services(options: ConfigSnapshot, current_config: Callable[[], ConfigSnapshot], restart: Callable[[], None]) -> list[Heartbeat | SessionReset]:
+    """
+    Start enabled background services of the kiosk
+    :param current_config: config reloaded since start
+    :param restart: restarts visible browser instance
+    :return: services navigating to HOME_PAGE, it has to be pushed to them when config is reloaded
+    """
+    navigating_home: list[Heartbeat | SessionReset] = []
+    if options.HOTPLUG.get("ENABLED", False):
+        start_hotplug_monitor(options, current_config)
+
+    if options.PLAYLIST.get("ENABLED", False):
+        start_playlist(options, current_config)
+
+    if options.SCREEN_CAPTURE.get("ENABLED", False):
+        start_screen_capture(options, current_config)
+
+    if options.SESSION_RESET.get("ENABLED", False):
+        session_reset = start_session_reset(options, current_config)
+        if session_reset:
+            navigating_home.append(session_reset)
+
+    heartbeat = start_heartbeat(options, current_config, restart) if options.HEARTBEAT.get("ENABLED", False) else None
+    if heartbeat:
+        navigating_home.append(heartbeat)
+    if options.HISTORY.get("ENABLED", False):
+        start_metrics_sampler(options, current_config, heartbeat)
+    return navigating_home
+
 
+def run_kiosk(config: ConfigSnapshot, *, watch_config: bool = False) -> None:
+    """
+    Start browser and all enabled background services, blocks until browser exits
+    :param watch_config: apply changes of config files to the browser, SIGHUP applies them always
+    """
     # Rotate screen by config value
     resolve_rotation_config(config)
 
     selected_browser = Qiosk(config)
-    selected_browser.run()
+    standby = config.STANDBY.get("ENABLED", False)
+    if standby and not selected_browser.supports_option(CONTROL_PORT_OPTION):
+        # Both instances would listen on the same control port
+        logging.getLogger(__name__).error("STANDBY requires qiosk supporting %s, running without standby instance", CONTROL_PORT_OPTION)
+        standby = False
+    supervisor = None
+    if standby:
+        if config.PROFILE_NAME != "default":
+            logging.getLogger(__name__).warning("Standby instance shares persistent profile %s with visible instance", config.PROFILE_NAME)
+        supervisor = QioskSupervisor(selected_browser, int(config.STANDBY.get("CONTROL_PORT", 1792)), float(config.STANDBY.get("WARMUP", 30)))
+
+    # Services keeping HOME_PAGE, it is pushed to them on reload
+    navigating_home: list[Heartbeat | SessionReset] = []
+
+    def apply_config(_previous: ConfigSnapshot, new_config: ConfigSnapshot, changed_sections: frozenset[str]) -> None:
+        for service in navigating_home:
+            service.home_page = new_config.HOME_PAGE
+        if supervisor:
+            # Without watch_config rotation and commands are applied by separate watch_config
+            if watch_config and changed_sections & ROTATION_SECTIONS:
+                resolve_rotation_config(new_config)
+            supervisor.apply_config(new_config, send_commands=watch_config)
+            return
+        if changed_sections & ROTATION_SECTIONS:
+            resolve_rotation_config(new_config)
+        selected_browser.apply_config(new_config)
+
+    # Standby always watches config files, changes requiring restart are applied by replacing the instance
+    config_watcher = start_config_watcher(config, apply_config, watch_files=watch_config or supervisor is not None)
+
+    # Background services use config reloaded by the watcher, not the one kiosk was started with
+    def current_config() -> ConfigSnapshot:
+        return config_watcher.config
+
+    navigating_home.extend(start_services(config, current_config, supervisor.restart if supervisor else selected_browser.restart))
+    try:
+        if supervisor:
+            supervisor.run()
+        else:
+            selected_browser.run()
+    finally:
+        if supervisor:
+            supervisor.stop()
+        config_watcher.stop()
 
 
 @command()
-def watch_config() -> None:
+def run() -> None:
     config = parse_config()
-    setup_logging("watch_config", logging.DEBUG if config.DEBUG else logging.WARNING)
-    log = logging.getLogger(__name__)
-
-    class ConfigEventHandler(events.FileSystemEventHandler):
-        def __init__(self) -> None:
-            parsed_config = parse_config()
-            current_config = Qiosk.resolve_command_mappings_config(parsed_config)
-            log.debug("Current config: %s", str(current_config))
-            self.current_config = current_config
+    setup_logging("kiosk", logging.DEBUG if config.DEBUG else logging.WARNING)
+    run_kiosk(config, watch_config=OPTIONS["--watch_config"])
 
-        def on_modified(self, _event: events.DirModifiedEvent | events.FileModifiedEvent) -> None:
-            raw_config = parse_config()
-            check_config = Qiosk.resolve_command_mappings_config(raw_config)
-            log.debug("New config: %s", str(check_config))
-            diffs = Qiosk.diff_command_mappings_config_value(self.current_config, check_config)
 
-            if diffs:
-                log.debug(diffs)
-                resolve_rotation_config(raw_config)
+def build_session_components(options: ConfigSnapshot) -> list[SessionComponent]:
+    """
+    Components of X session started by .xinitrc before, browser is not part of them
+    """
+    components = [SessionComponent("screen_settings", action=window_system.disable_screen_blanking)]
 
-                for command_name, config_value in diffs.items():
-                    # Emit changes
-                    payload = {
-                        "command": command_name,
-                        "data": config_value.payload,
-                    }
+    xscreensaver_path = find_binary(["xscreensaver"])
+    if xscreensaver_path:
+        components.append(SessionComponent("xscreensaver", [xscreensaver_path, "-no-splash"]))
 
-                    ws = create_connection("ws://localhost:1791")
-                    ws.send(json.dumps(payload))
-                    result = ws.recv()
-                    ws.close()
+    unclutter_path = find_binary(["unclutter"])
+    if unclutter_path:
+        components.append(SessionComponent("unclutter", [unclutter_path]))
 
-                    log.debug(result)
+    window_manager = options.SESSION.get("WINDOW_MANAGER")
+    window_manager_path = find_binary([window_manager]) if window_manager else None
+    if window_manager_path:
+        components.append(SessionComponent("window_manager", [window_manager_path]))
 
+    prehook = options.SESSION.get("PREHOOK")
+    prehook_path = Path(prehook).expanduser() if prehook else None
+    if prehook_path and prehook_path.exists():
+        components.append(SessionComponent("prehook", [str(prehook_path)], wait=True, timeout=float(options.SESSION.get("PREHOOK_TIMEOUT", 10))))
 
-                # Set new config as old
-                self.current_config = check_config
+    return components
 
-    event_handler = ConfigEventHandler()
 
-    observer = Observer()
-    for config_file_path in find_config_files():
+def record_browser_ready(session: Session, timeout: float = 120) -> None:
+    """
+    Record time when browser starts accepting remote control connections
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
         try:
-            observer.schedule(event_handler, str(config_file_path), recursive=False, event_filter=[events.FileModifiedEvent])
-        except TypeError:  # noqa: PERF203
-            # Support for older versions
-            observer.schedule(event_handler, str(config_file_path), recursive=False)
+            ws = create_connection(Qiosk.get_control_url(), timeout=1)
+        except (OSError, ValueError, WebSocketException):
+            # Port may be open before qiosk is able to complete handshake
+            time.sleep(0.05)
+            continue
+        ws.close()
+        session.mark("qiosk_ready", started=True, finished=True)
+        logging.getLogger(__name__).info("Session startup timeline: %s", json.dumps(session.to_dict()))
+        session.write_timeline()
+        return
+
+
+@command()
+def session() -> None:
+    config = parse_config()
+    setup_logging("kiosk", logging.DEBUG if config.DEBUG else logging.WARNING)
 
-    observer.start()
+    kiosk_session = Session(build_session_components(config))
+    kiosk_session.start()
+    # Browser waits only for components it really needs, by default for prehook (limited by its timeout)
+    kiosk_session.wait_for(tuple(config.SESSION.get("BROWSER_WAITS_FOR", ["prehook"])))
+    kiosk_session.mark("qiosk", started=True)
+    threading.Thread(target=record_browser_ready, args=(kiosk_session,), name="session_ready", daemon=True).start()
+    try:
+        run_kiosk(config, watch_config=OPTIONS["--watch_config"])
+    finally:
+        kiosk_session.mark("qiosk", finished=True)
+        kiosk_session.write_timeline()
+        kiosk_session.stop()
+
+
+@command()
+def watch_config() -> None:
+    config = parse_config()
+    setup_logging("watch_config", logging.DEBUG if config.DEBUG else logging.WARNING)
+    log = logging.getLogger(__name__)
+
+    def send_config(previous: ConfigSnapshot, new_config: ConfigSnapshot, changed_sections: frozenset[str]) -> None:
+        log.info("Applying changed config sections: %s", ", ".join(sorted(changed_sections)))
+
+        if changed_sections & ROTATION_SECTIONS:
+            resolve_rotation_config(new_config)
+
+        check_config = Qiosk.resolve_command_mappings_config(new_config)
+        log.debug("New config: %s", str(check_config))
+        diffs = Qiosk.diff_command_mappings_config_value(Qiosk.resolve_command_mappings_config(previous), check_config)
+        if diffs:
+            log.debug(diffs)
+            # Browser runs in other process, it is found by its instance state
+            for result in Qiosk.send_commands(Qiosk.get_control_url(), diffs):
+                log.debug(result)
+
+    log.debug("Current config: %s", str(Qiosk.resolve_command_mappings_config(config)))
+    config_watcher = start_config_watcher(config, send_config, watch_files=True)
     try:
         while True:
             time.sleep(1)
     finally:
-        observer.stop()
-        observer.join()
-
+        config_watcher.stop()
 
 
 @command()
 def system_info() -> None:
     config = parse_config()
     setup_logging("system_info", logging.DEBUG if config.DEBUG else logging.WARNING)
-    primary_screen = window_system.detect_primary_screen()
-    touchscreen_device = window_system.find_touchscreen_device(config.TOUCHSCREEN)
-
-    info_items = {
-        "Window system": type(window_system).__name__,
-        "Display": window_system.detect_display(),
-        "Touchscreen device": touchscreen_device,
-        "Primary screen": primary_screen,
-        "Screen rotation": window_system.get_screen_rotation(primary_screen) if primary_screen else None,
-        "Touchscreen rotation": window_system.get_touchscreen_rotation(touchscreen_device) if touchscreen_device else None,
-    }
-
-    for name, output in info_items.items():
-        print(f"{name}: {output}")
+    system_info_collector = SystemInfo(window_system, config)
+    results = system_info_collector.collect()
+
+    if OPTIONS["--json"]:
+        print(json.dumps({name: dataclasses.asdict(result) for name, result in results.items()}))
+        return
+
+    for name, label in system_info_collector.labels().items():
+        result = results[name]
+        print(f"{label}: {result.value if result.error is None else 'Error: ' + result.error}")
+
+
+@command()
+def touch_latency() -> None:
+    config = parse_config()
+    setup_logging("touch_latency", logging.DEBUG if config.DEBUG else logging.WARNING)
+    if not config.REMOTE_DEBUGGING:
+        print("Error: REMOTE_DEBUGGING has to be enabled")
+        sys.exit(1)
+
+    touch_device = window_system.find_touchscreen_device(config.TOUCHSCREEN if isinstance(config.TOUCHSCREEN, str) else None)
+    device_node = window_system.get_touchscreen_device_node(touch_device) if touch_device else None
+    if not device_node:
+        print("Error: Touchscreen device was not found")
+        sys.exit(1)
+
+    try:
+        samples = TouchLatencyProbe(get_visible_devtools(config), device_node, float(OPTIONS["--duration"])).run()
+    except PermissionError as e:
+        print(f"Error: {e}, user has to be in input group to read touchscreen")
+        sys.exit(1)
+    except (DevToolsError, TimeoutError, OSError) as e:
+        # Browser is not running or its page does not respond
+        print(f"Error: {e}")
+        sys.exit(1)
+    summary = summarize(samples)
+    if OPTIONS["--json"]:
+        print(json.dumps(summary))
+        return
+
+    print(f"Touches: {summary['touches']}, painted: {summary['painted']}")
+    for name, label in (("input", "Touch to dispatch"), ("render", "Dispatch to paint"), ("total", "Touch to paint")):
+        values = ", ".join(f"{point} {value * 1000:.1f} ms" if value is not None else f"{point} -" for point, value in summary[name].items())
+        print(f"{label}: {values}")
+
+
+@command()
+def benchmark_profiles() -> None:
+    config = parse_config()
+    setup_logging("benchmark_profiles", logging.DEBUG if config.DEBUG else logging.INFO)
+    try:
+        profiles = [PerformanceProfileEnum(profile) for profile in OPTIONS["<profile>"]] or None
+    except ValueError as e:
+        print(f"Error: {e}, valid profiles are {', '.join(profile.value for profile in PerformanceProfileEnum)}")
+        sys.exit(1)
+
+    results = ProfileBenchmark(config, get_free_port(), float(OPTIONS["--duration"])).run(profiles)
+    if OPTIONS["--json"]:
+        print(json.dumps([dataclasses.asdict(result) for result in results]))
+        return
+
+    for result in results:
+        if result.error:
+            print(f"{result.profile or 'none'}: Error: {result.error}")
+            continue
+        load_time = f"{result.load_time * 1000:.0f} ms" if result.load_time is not None else "-"
+        frame_rate = f"{result.frame_rate:.1f} fps" if result.frame_rate is not None else "-"
+        latency = result.latency.get("p90")
+        print(
+            f"{result.profile or 'none'}: startup {result.startup or 0:.2f} s, load {load_time}, memory {(result.memory or 0) / 1048576:.0f} MiB, "
+            f"CPU {(result.cpu or 0) * 100:.0f} %, {frame_rate}, main thread p90 {latency * 1000 if latency is not None else 0:.0f} ms",
+        )
+
+
+@command()
+def history() -> None:
+    config = parse_config()
+    setup_logging("history", logging.DEBUG if config.DEBUG else logging.WARNING)
+    try:
+        since = parse_time(OPTIONS["--since"]) if OPTIONS["--since"] else None
+        until = parse_time(OPTIONS["--until"]) if OPTIONS["--until"] else None
+        metrics = [HistoryMetricEnum[name.upper()] for name in OPTIONS["--metric"]]
+    except KeyError as e:
+        print(f"Error: Unknown metric {e}, valid metrics are {', '.join(metric.name.lower() for metric in HistoryMetricEnum)}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    history_path = MetricsHistory.get_history_path()
+    if not history_path.exists():
+        print(f"Error: No metrics history recorded in {history_path}")
+        sys.exit(1)
+
+    with MetricsHistory(history_path, readonly=True) as metrics_history:
+        for record in metrics_history.records(since, until, metrics):
+            if OPTIONS["--json"]:
+                # One object per line, so output can be streamed
+                print(json.dumps({"timestamp": record.timestamp, "metric": record.metric.name.lower(), "value": record.value}))
+            else:
+                print(f"{dt.datetime.fromtimestamp(record.timestamp, tz=dt.timezone.utc).astimezone().isoformat(sep=' ', timespec='seconds')} {record.metric.name.lower()} {record.value:g}")
+
+
+@command()
+def reset_session() -> None:
+    config = parse_config()
+    setup_logging("reset_session", logging.DEBUG if config.DEBUG else logging.WARNING)
+    if not config.REMOTE_DEBUGGING:
+        print("Error: REMOTE_DEBUGGING has to be enabled")
+        sys.exit(1)
+
+    session_reset = SessionReset(lambda: get_visible_devtools(config), config.HOME_PAGE, load_timeout=float(config.SESSION_RESET.get("LOAD_TIMEOUT", 10)))
+    try:
+        result = session_reset.reset()
+    except (DevToolsError, TimeoutError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if OPTIONS["--json"]:
+        print(json.dumps(dataclasses.asdict(result)))
+        return
+
+    load = f"{result.load * 1000:.0f} ms" if result.load is not None else "timed out"
+    print(f"Session reset in {result.duration * 1000:.0f} ms, home page loaded in {load}, cleared origins: {', '.join(result.origins) or '-'}")
+
+
+@command()
+def logs() -> None:
+    log_dir = Path(OPTIONS["--log_dir"] or Path.home())
+    try:
+        reader = LogReader(
+            find_log_files(log_dir, OPTIONS["--name"]),
+            OPTIONS["--level"],
+            parse_time(OPTIONS["--since"]) if OPTIONS["--since"] else None,
+            parse_time(OPTIONS["--until"]) if OPTIONS["--until"] else None,
+            OPTIONS["--source"],
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if not reader.paths:
+        print(f"Error: No logs found in {log_dir}")
+        sys.exit(1)
+
+    try:
+        if not OPTIONS["--summary"]:
+            sys.stdout.buffer.writelines(reader.lines())
+            return
+
+        summary = LogSummary().consume(reader.lines()).to_dict()
+        if OPTIONS["--json"]:
+            print(json.dumps(summary))
+            return
+
+        print(f"{'Hour':<12} {'Entries':>8} {'Warnings':>8} {'Errors':>8} {'Crashes':>8} {'Restarts':>8} {'Configs':>8}")
+        for hour, counts in (*summary["hours"].items(), ("Total", summary["totals"])):
+            print(f"{hour:<12} " + " ".join(f"{counts[name]:>8}" for name in ("entries", "warnings", "errors", "crashes", "restarts", "config_applies")))
+        print(f"Errors per hour: {summary['errors_per_hour']:.2f}")
+    except BrokenPipeError:
+        # Output piped to head or closed pager
+        sys.stderr.close()
 
 
 def main() -> None:
@@ -77,6 +77,8 @@ class Config(HardCoded):
 
     EXTRA_ENV_VARS: dict[str, str] = {}
 
+    PERFORMANCE_PROFILE = None  # Preset of browser flags (low-memory|low-latency-touch|video-signage|gpu-raster), EXTRA_ARGUMENTS and EXTRA_ENV_VARS override it
+
     PROFILE_NAME = "default"  # Name of profile used by browser, default is name of default off-the-record profile, use custom name to persist cookies and other data
 
     ADDRESS_BAR = {
@@ -91,6 +93,65 @@ class Config(HardCoded):
         "ENABLED": True,
     }
 
+    STANDBY = {
+        "ENABLED": False,  # Keep hidden pre-loaded browser instance ready to replace crashed or restarted one
+        "CONTROL_PORT": 1792,  # Remote control port of the second instance, instances alternate between this port and 1791
+        "WARMUP": 30,  # Seconds to wait for instance to become ready
+    }
+
+    HOTPLUG = {
+        "ENABLED": True,  # Reapply screen/touchscreen rotation when display or touchscreen is (re)plugged
+        "DEBOUNCE": 0.5,  # Seconds to wait for burst of hotplug events to settle
+    }
+
+    PLAYLIST = {
+        "ENABLED": False,  # Rotate pages by schedule, requires REMOTE_DEBUGGING
+        "ITEMS": [],  # List of {"URL": str, "DURATION": seconds, "FROM": "HH:MM", "TO": "HH:MM"}, FROM/TO are optional
+        "PRELOAD": 5,  # Seconds before slot start to load next page in background
+        "MAX_PRELOADED": 1,  # Maximal number of pages loaded in background, 0 disables preloading
+    }
+
+    HEARTBEAT = {
+        "ENABLED": False,  # Detect frozen page and recover from it, requires REMOTE_DEBUGGING
+        "INTERVAL": 5,  # Seconds between heartbeats
+        "TIMEOUT": 2,  # Seconds without response after which page is considered stalled
+        "RELOAD_AFTER": 2,  # Reload page after this many stalled heartbeats in row
+        "HOME_AFTER": 4,  # Navigate to HOME_PAGE after this many stalled heartbeats in row
+        "RESTART_AFTER": 6,  # Restart browser after this many stalled heartbeats in row
+        "GRACE": 30,  # Seconds to wait after start before first heartbeat
+    }
+
+    SCREEN_CAPTURE = {
+        "ENABLED": False,  # Periodically capture the screen and serve it over HTTP
+        "SOURCE": "devtools",  # devtools (page only, requires REMOTE_DEBUGGING)|x11 (whole screen, requires xwd)
+        "INTERVAL": 10,  # Minimal seconds between captures
+        "THRESHOLD": 5,  # Number of differing perceptual hash bits (of 64) for frame to be considered changed
+        "MAX_DUTY": 0.05,  # Maximal share of time spent capturing, interval is stretched when capture is slow
+        "VARIANT_WIDTH": 480,  # Width of downscaled variant
+        "VARIANT_QUALITY": 60,  # JPEG quality of downscaled variant
+        "HOST": "127.0.0.1",  # Address to serve captured frames on
+        "PORT": 1793,  # Port to serve captured frames on
+    }
+
+    SESSION = {  # Used by `chromium-kiosk session`
+        "WINDOW_MANAGER": "xfwm4",  # Window manager to start, None to start none
+        "PREHOOK": "~/chromium-kiosk-prehook.sh",  # Script to run on session start when it exists
+        "PREHOOK_TIMEOUT": 10,  # Seconds to wait for prehook before browser is started anyway
+        "BROWSER_WAITS_FOR": ["prehook"],  # Session components browser start waits for (screen_settings|xscreensaver|unclutter|window_manager|prehook)
+    }
+
+    HISTORY = {
+        "ENABLED": True,  # Record browser metrics into ~/.chromium-kiosk-history.bin, read them by `chromium-kiosk history`
+        "INTERVAL": 60,  # Seconds between samples
+        "CAPACITY": 65536,  # Number of records kept (32 bytes each), oldest records are overwritten
+    }
+
+    SESSION_RESET = {
+        "ENABLED": False,  # Clear cookies, site storage and history between users without restarting browser, requires REMOTE_DEBUGGING
+        "IDLE_TIME": 120,  # Seconds without user input (X11 only) after which session is reset, 0 to reset only by `chromium-kiosk reset_session`
+        "LOAD_TIMEOUT": 10,  # Seconds to wait for HOME_PAGE to load after reset
+    }
+
 
 
 class Testing(Config):
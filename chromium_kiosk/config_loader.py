@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import os
+from importlib import import_module
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import yaml
+
+import chromium_kiosk as app_root
+from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+from chromium_kiosk.tools.PerformanceProfile import validate_profile
+
+if TYPE_CHECKING:
+    from chromium_kiosk.config import Config
+
+APP_ROOT_FOLDER = Path(app_root.__file__).parent.absolute()
+
+
+class ConfigParseError(TypeError):
+    """
+    Config file is not a YAML mapping, eg. empty file read while it is being written.
+    Subclass of TypeError raised for it before.
+    """
+
+
+def find_config_files(yaml_files: list[Path] | None = None) -> list[Path]:
+    if yaml_files:
+        return yaml_files
+
+    # Explicit config file replaces the standard locations, eg. for simulated kiosk in tests
+    config_path = os.getenv("CHROMIUM_KIOSK_CONFIG")
+    if config_path:
+        return [Path(config_path)] if Path(config_path).is_file() else []
+
+    return [f for f in [
+        Path("/etc/chromium-kiosk/config.yml"),
+        # Compability with old proprietary version
+        Path("/etc/granad-kiosk/config.yml"),
+        APP_ROOT_FOLDER.joinpath("..", "config.yml").absolute(),
+        APP_ROOT_FOLDER.joinpath("config.yml"),
+    ] if f.is_file()]
+
+
+def get_config(config_class_string: str, yaml_files: list[Path] | None = None, previous: ConfigSnapshot | None = None) -> ConfigSnapshot:
+    """Load the config snapshot from a class and YAML files.
+    Positional arguments:
+    config_class_string -- string representation of a configuration class with defaults (e.g.
+        'chromium_kiosk.config.Production').
+    yaml_files -- List of YAML files to load. This is for testing, leave None in dev/production.
+    previous -- Previously loaded snapshot, unchanged sections are shared with it.
+    Returns:
+    Immutable ConfigSnapshot, config class itself is never modified.
+    """
+    config_module, config_class = config_class_string.rsplit(".", 1)
+    config_obj: type[Config] = getattr(import_module(config_module), config_class)
+
+    # Load additional configuration settings.
+    yaml_files = find_config_files(yaml_files)
+    additional_dict = {}
+    for y in yaml_files:
+        with y.open("r", encoding="UTF-8") as f:
+            loaded_data = yaml.safe_load(f)
+            if isinstance(loaded_data, dict):
+                additional_dict.update(loaded_data)
+            else:
+                msg = f"Failed to parse configuration {y}, expected mapping, got {type(loaded_data).__name__}"
+                raise ConfigParseError(msg)
+
+    return validate_profile(ConfigSnapshot.from_object(config_obj, additional_dict, previous))
@@ -0,0 +1,8 @@
+import enum
+
+
+@enum.unique
+class HeartbeatActionEnum(enum.Enum):
+    RELOAD = "reload"
+    HOME = "home"
+    RESTART = "restart"
@@ -0,0 +1,15 @@
+import enum
+
+
+@enum.unique
+class HistoryMetricEnum(enum.Enum):
+    # Values are stored in history file, never reuse or renumber them
+    BROWSER_RSS = 1
+    BROWSER_PSS = 2
+    BROWSER_CPU = 3
+    BROWSER_RESTART = 4
+    PAGE_RELOAD = 5
+    PAGE_HOME = 6
+    PAGE_LOAD = 7
+    SCREEN_ROTATION = 8
+    TOUCHSCREEN_ROTATION = 9
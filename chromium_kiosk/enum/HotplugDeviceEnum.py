@@ -0,0 +1,7 @@
+import enum
+
+
+@enum.unique
+class HotplugDeviceEnum(enum.Enum):
+    SCREEN = "screen"
+    TOUCHSCREEN = "touchscreen"
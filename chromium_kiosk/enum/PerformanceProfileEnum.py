@@ -0,0 +1,9 @@
+import enum
+
+
+@enum.unique
+class PerformanceProfileEnum(enum.Enum):
+    LOW_MEMORY = "low-memory"
+    LOW_LATENCY_TOUCH = "low-latency-touch"
+    VIDEO_SIGNAGE = "video-signage"
+    GPU_RASTER = "gpu-raster"
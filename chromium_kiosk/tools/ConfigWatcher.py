@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Callable
+
+import yaml
+from watchdog import events
+from watchdog.observers import Observer
+
+from chromium_kiosk.config_loader import ConfigParseError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from watchdog.observers.api import BaseObserver
+
+    from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+
+log = logging.getLogger(__name__)
+
+# Called with previous config, new config and names of changed sections
+ConfigChangeHandler = Callable[["ConfigSnapshot", "ConfigSnapshot", "frozenset[str]"], None]
+
+
+class ConfigFileEventHandler(events.FileSystemEventHandler):
+    def __init__(self, watcher: ConfigWatcher) -> None:
+        self.watcher = watcher
+
+    def on_modified(self, _event: events.DirModifiedEvent | events.FileModifiedEvent) -> None:
+        self.watcher.reload()
+
+
+class ConfigWatcher:
+    """
+    Reloads config when config files are modified or on request (eg. SIGHUP),
+    changed sections are passed to the change handler, reloads never run concurrently.
+    """
+
+    def __init__(self, config: ConfigSnapshot, loader: Callable[[ConfigSnapshot], ConfigSnapshot], on_change: ConfigChangeHandler) -> None:
+        self.config = config
+        self.loader = loader
+        self.on_change = on_change
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._observer: BaseObserver | None = None
+
+    def reload(self) -> frozenset[str]:
+        """
+        Load config again and apply changes
+        :return: names of changed sections, empty when nothing changed or config could not be parsed
+        """
+        with self._lock:
+            try:
+                config = self.loader(self.config)
+            except (OSError, ConfigParseError, yaml.YAMLError) as e:
+                # File is being written right now, its next modification follows
+                log.warning("Failed to reload config, keeping previous one: %s", e)
+                return frozenset()
+
+            changed_sections = config.changed_sections(self.config)
+            if not changed_sections:
+                return frozenset()
+
+            previous = self.config
+            self.config = config
+            self.reloads += 1
+            try:
+                self.on_change(previous, config, frozenset(changed_sections))
+            except Exception:
+                # Watcher must survive failed apply, otherwise no change would be applied again
+                log.exception("Failed to apply changed config sections: %s", ", ".join(sorted(changed_sections)))
+            return frozenset(changed_sections)
+
+    def reload_in_background(self) -> None:
+        """
+        Reload from signal handler, main thread may be just waiting for browser process
+        """
+        threading.Thread(target=self.reload, name="config_reload", daemon=True).start()
+
+    def start(self, paths: Iterable[Path]) -> None:
+        """
+        Watch config files for modifications
+        """
+        observer = Observer()
+        event_handler = ConfigFileEventHandler(self)
+        for path in paths:
+            try:
+                observer.schedule(event_handler, str(path), recursive=False, event_filter=[events.FileModifiedEvent])
+            except TypeError:  # noqa: PERF203
+                # Support for older versions
+                observer.schedule(event_handler, str(path), recursive=False)
+        observer.start()
+        self._observer = observer
+
+    def stop(self) -> None:
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
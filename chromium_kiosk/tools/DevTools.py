@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import collections
+import json
+import time
+import urllib.request
+from typing import Any
+
+from websocket import WebSocketException, WebSocketTimeoutException, create_connection
+
+
+class DevToolsError(Exception):
+    pass
+
+
+class DevToolsSession:
+    """
+    Connection to single DevTools target (page or browser)
+    """
+
+    def __init__(self, websocket_url: str, timeout: float = 5) -> None:
+        self.websocket_url = websocket_url
+        self.timeout = timeout
+        try:
+            self.ws = create_connection(websocket_url, timeout=timeout, suppress_origin=True)
+        except (OSError, WebSocketException) as e:
+            msg = f"Failed to connect to {websocket_url}: {e}"
+            raise DevToolsError(msg) from e
+        self.events: collections.deque[dict[str, Any]] = collections.deque(maxlen=1000)
+        self._last_id = 0
+
+    def _receive(self, timeout: float) -> dict[str, Any]:
+        self.ws.settimeout(max(timeout, 0.001))
+        try:
+            message = json.loads(self.ws.recv())
+        except (WebSocketTimeoutException, TimeoutError) as e:
+            msg = f"DevTools did not respond in {timeout} seconds"
+            raise TimeoutError(msg) from e
+        except (OSError, WebSocketException, ValueError) as e:
+            msg = f"DevTools connection failed: {e}"
+            raise DevToolsError(msg) from e
+        return message if isinstance(message, dict) else {}
+
+    def call(self, method: str, params: dict[str, Any] | None = None, timeout: float | None = None) -> dict[str, Any]:
+        """
+        Call DevTools protocol method, events received meanwhile are stored in events
+        :return: result of the call
+        """
+        self._last_id += 1
+        message_id = self._last_id
+        try:
+            self.ws.send(json.dumps({"id": message_id, "method": method, "params": params or {}}))
+        except (OSError, WebSocketException) as e:
+            msg = f"DevTools connection failed: {e}"
+            raise DevToolsError(msg) from e
+
+        deadline = time.monotonic() + (timeout or self.timeout)
+        while True:
+            message = self._receive(deadline - time.monotonic())
+            if message.get("id") == message_id:
+                if "error" in message:
+                    msg = "{} failed: {}".format(method, message["error"].get("message", message["error"]))
+                    raise DevToolsError(msg)
+                return dict(message.get("result", {}))
+            if "method" in message:
+                self.events.append(message)
+
+    def wait_event(self, method: str, timeout: float | None = None) -> dict[str, Any]:
+        deadline = time.monotonic() + (timeout or self.timeout)
+        while True:
+            for event in self.events:
+                if event.get("method") == method:
+                    self.events.remove(event)
+                    return dict(event.get("params", {}))
+            message = self._receive(deadline - time.monotonic())
+            if "method" in message:
+                self.events.append(message)
+
+    def evaluate(self, expression: str, timeout: float | None = None, *, await_promise: bool = False) -> Any:  # noqa: ANN401
+        result = self.call("Runtime.evaluate", {"expression": expression, "returnByValue": True, "awaitPromise": await_promise}, timeout)
+        if "exceptionDetails" in result:
+            msg = "Evaluation of {} failed: {}".format(expression, result["exceptionDetails"].get("text"))
+            raise DevToolsError(msg)
+        return result.get("result", {}).get("value")
+
+    def close(self) -> None:
+        self.ws.close()
+
+
+class DevTools:
+    """
+    Client of DevTools HTTP endpoint enabled by REMOTE_DEBUGGING
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1", timeout: float = 5) -> None:
+        self.port = port
+        self.host = host
+        self.timeout = timeout
+
+    def _get_json(self, path: str) -> Any:  # noqa: ANN401
+        url = f"http://{self.host}:{self.port}{path}"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except (OSError, ValueError) as e:
+            msg = f"DevTools request {url} failed: {e}"
+            raise DevToolsError(msg) from e
+
+    def version(self) -> dict[str, Any]:
+        return dict(self._get_json("/json/version"))
+
+    def list_targets(self) -> list[dict[str, Any]]:
+        return [target for target in self._get_json("/json/list") if target.get("type") == "page"]
+
+    def get_target(self, target_id: str) -> dict[str, Any] | None:
+        for target in self.list_targets():
+            if target.get("id") == target_id:
+                return target
+        return None
+
+    def connect(self, target: dict[str, Any] | None = None, timeout: float | None = None) -> DevToolsSession:
+        """
+        Connect to target, first page target is used when not specified
+        """
+        if not target:
+            targets = self.list_targets()
+            if not targets:
+                msg = "No page target found"
+                raise DevToolsError(msg)
+            target = targets[0]
+        return DevToolsSession(target["webSocketDebuggerUrl"], timeout or self.timeout)
+
+    def connect_browser(self, timeout: float | None = None) -> DevToolsSession:
+        return DevToolsSession(self.version()["webSocketDebuggerUrl"], timeout or self.timeout)
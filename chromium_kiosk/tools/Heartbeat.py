@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from chromium_kiosk.enum.HeartbeatActionEnum import HeartbeatActionEnum
+from chromium_kiosk.tools.DevTools import DevToolsError
+from chromium_kiosk.tools.LatencyHistogram import LatencyHistogram
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from chromium_kiosk.tools.DevTools import DevTools, DevToolsSession
+
+log = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class HeartbeatSettings:
+    interval: float = 5.0
+    timeout: float = 2.0
+    reload_after: int = 2
+    home_after: int = 4
+    restart_after: int = 6
+    grace: float = 30.0
+
+    @classmethod
+    def from_config(cls, section: Mapping[str, Any]) -> HeartbeatSettings:
+        """
+        Create settings from HEARTBEAT config section, values are converted to type of the default
+        """
+        defaults = cls()
+        return cls(**{
+            field.name: type(getattr(defaults, field.name))(section[field.name.upper()])
+            for field in dataclasses.fields(cls)
+            if field.name.upper() in section
+        })
+
+
+class Heartbeat:
+    """
+    Detects frozen page by periodically evaluating trivial expression in the page.
+
+    Evaluation runs on renderer main thread, so runaway JS or deadlocked GPU context shows as timeout
+    while the browser process (and so DevTools endpoint) stays responsive.
+    Consecutive stalls are escalated to reload, navigation to home page and finally browser restart.
+    """
+
+    def __init__(
+        self,
+        devtools_factory: Callable[[], DevTools],
+        home_page: str,
+        restart: Callable[[], None],
+        settings: HeartbeatSettings | None = None,
+        metrics_path: Path | None = None,
+    ) -> None:
+        self.devtools_factory = devtools_factory
+        self.home_page = home_page
+        self.restart = restart
+        self.settings = settings or HeartbeatSettings()
+        self.escalation = (
+            (self.settings.restart_after, HeartbeatActionEnum.RESTART),
+            (self.settings.home_after, HeartbeatActionEnum.HOME),
+            (self.settings.reload_after, HeartbeatActionEnum.RELOAD),
+        )
+        self.metrics_path = metrics_path
+        self.latency = LatencyHistogram()
+        self.stalls = 0
+        self.actions: dict[str, int] = {action.value: 0 for action in HeartbeatActionEnum}
+        # Stalls are counted only after page responded once, browser without working DevTools is not restarted in loop
+        self.armed = False
+        self._session: DevToolsSession | None = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def get_metrics_path() -> Path:
+        return Path.home().joinpath(".chromium-kiosk-heartbeat.json")
+
+    @staticmethod
+    def read_metrics(path: Path | None = None) -> dict[str, Any]:
+        try:
+            metrics = json.loads((path or Heartbeat.get_metrics_path()).read_text(encoding="UTF-8"))
+        except (OSError, ValueError):
+            return {}
+        return metrics if isinstance(metrics, dict) else {}
+
+    def _close_session(self) -> None:
+        if self._session:
+            self._session.close()
+            self._session = None
+
+    def _call_page(self, method: str, params: dict[str, Any] | None = None) -> None:
+        # Fresh connection, the heartbeat one may still wait for reply from frozen page
+        session = self.devtools_factory().connect(timeout=self.settings.timeout)
+        try:
+            session.call(method, params)
+        finally:
+            session.close()
+
+    def escalate(self) -> HeartbeatActionEnum | None:
+        """
+        Run recovery action for current number of consecutive stalls
+        """
+        action = next((action for threshold, action in self.escalation if self.stalls == threshold), None)
+        if not action:
+            return None
+
+        log.warning("Page did not respond to %d heartbeats, running %s", self.stalls, action.value)
+        self.actions[action.value] += 1
+        try:
+            if action == HeartbeatActionEnum.RELOAD:
+                self._call_page("Page.reload", {"ignoreCache": False})
+            elif action == HeartbeatActionEnum.HOME:
+                self._call_page("Page.navigate", {"url": self.home_page})
+            else:
+                self._close_session()
+                self.armed = False
+                self.stalls = 0
+                self.restart()
+        except (DevToolsError, TimeoutError):
+            log.warning("Heartbeat action %s failed", action.value, exc_info=True)
+        return action
+
+    def check(self) -> float | None:
+        """
+        Send one heartbeat
+        :return: latency in seconds, None on stall
+        """
+        start = time.monotonic()
+        try:
+            if not self._session:
+                self._session = self.devtools_factory().connect(timeout=self.settings.timeout)
+            self._session.evaluate("1", timeout=self.settings.timeout)
+        except (DevToolsError, TimeoutError) as e:
+            self._close_session()
+            if not self.armed:
+                log.debug("Heartbeat failed before page responded first time: %s", e)
+                return None
+            self.stalls += 1
+            self.latency.observe(time.monotonic() - start)
+            log.info("Heartbeat stalled (%d in row): %s", self.stalls, e)
+            self.escalate()
+            return None
+
+        latency = time.monotonic() - start
+        self.latency.observe(latency)
+        self.armed = True
+        self.stalls = 0
+        return latency
+
+    def write_metrics(self) -> None:
+        metrics_path = self.metrics_path or self.get_metrics_path()
+        tmp_path = metrics_path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(json.dumps({"latency": self.latency.to_dict(), "stalls": self.stalls, "actions": self.actions}), encoding="UTF-8")
+            tmp_path.replace(metrics_path)
+        except OSError:
+            log.warning("Failed to write heartbeat metrics to %s", metrics_path, exc_info=True)
+
+    def run(self, metrics_interval: float = 60) -> None:
+        self._stopped.wait(self.settings.grace)
+        metrics_written_at = time.monotonic()
+        while not self._stopped.is_set():
+            started_at = time.monotonic()
+            self.check()
+            if time.monotonic() - metrics_written_at >= metrics_interval:
+                self.write_metrics()
+                metrics_written_at = time.monotonic()
+            self._stopped.wait(max(0.0, self.settings.interval - (time.monotonic() - started_at)))
+        self._close_session()
+
+    def stop(self) -> None:
+        self._stopped.set()
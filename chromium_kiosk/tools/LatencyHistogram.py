@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Any
+
+# Upper bounds of buckets in seconds, roughly logarithmic from 1 ms to 10 s
+DEFAULT_BOUNDS = (
+    0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0,
+)
+
+
+class LatencyHistogram:
+    """
+    Fixed bucket latency histogram, memory use does not grow with number of observations
+    """
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BOUNDS) -> None:
+        self.bounds = bounds
+        # Last bucket collects everything above the highest bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def percentile(self, percent: float) -> float | None:
+        """
+        Upper bound of bucket containing given percentile
+        :param percent: 0-100
+        :return: latency in seconds, None when nothing was observed
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "avg": self.total / self.count if self.count else None,
+                "max": self.max,
+                "p50": self.percentile(50),
+                "p90": self.percentile(90),
+                "p99": self.percentile(99),
+                "buckets": {
+                    (str(bound) if index < len(self.bounds) else "+Inf"): bucket_count
+                    for index, (bound, bucket_count) in enumerate(zip((*self.bounds, float("inf")), self.counts))
+                },
+            }
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import bz2
+import dataclasses
+import datetime as dt
+import fnmatch
+import gzip
+import lzma
+import re
+from typing import IO, TYPE_CHECKING, Any, Callable, cast
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+# Level letters written by CustomFormatter, in order of severity
+LEVELS = b"DIWEF"
+LEVEL_NAMES = {"debug": b"D", "info": b"I", "warning": b"W", "error": b"E", "fatal": b"F", "critical": b"F"}
+LEVEL_ORDER = {LEVELS[index:index + 1]: index for index in range(len(LEVELS))}
+WARNING_ORDER = LEVEL_ORDER[b"W"]
+
+# Entry starts with "W1019 10:00:00.123 1234 Heartbeat.py:113] ", "MMDD HH:MM:SS" compares chronologically as bytes
+TIME_KEY_SLICE = slice(1, 14)
+HOUR_KEY_SLICE = slice(1, 8)
+# Space after date and colon in time at positions 5 and 8, taken by ENTRY_MARKS_SLICE, lines without them continue previous entry
+ENTRY_MARKS_SLICE = slice(5, 9, 3)
+ENTRY_MARKS = b" :"
+
+OPENERS: dict[str, Callable[[Path], object]] = {
+    ".gz": lambda path: gzip.open(path, "rb"),  # noqa: SIM115
+    ".bz2": lambda path: bz2.open(path, "rb"),  # noqa: SIM115
+    ".xz": lambda path: lzma.open(path, "rb"),  # noqa: SIM115
+}
+
+# Messages marking incidents at any level, see Qiosk, QioskSupervisor, Heartbeat and watch_config
+EVENT_PATTERNS: dict[str, tuple[bytes, ...]] = {
+    "crashes": (b"exited with code",),
+    "restarts": (b"Restarting qiosk",),
+    "config_applies": (b"Applying changed config sections",),
+}
+
+
+def time_key(timestamp: float, *, year: bool = False) -> bytes:
+    """
+    Time as written in log entries, "MMDD HH:MM:SS" in local time zone
+    :param year: prefix with year, "YYYYMMDD HH:MM:SS"
+    """
+    return dt.datetime.fromtimestamp(timestamp, tz=dt.timezone.utc).astimezone().strftime(f"{'%Y' if year else ''}%m%d %H:%M:%S").encode()
+
+
+def _rotation_order(path: Path) -> tuple[int, int, str]:
+    name = path.name
+    for suffix in OPENERS:
+        name = name.removesuffix(suffix)
+    _, _, rotation = name.partition(".log")
+    rotation = rotation.lstrip(".")
+    if not rotation:
+        # Current log is the newest
+        return 2, 0, ""
+    if rotation.isdigit():
+        # logrotate numbering, higher is older
+        return 0, -int(rotation), ""
+    # TimedRotatingFileHandler date suffix
+    return 1, 0, rotation
+
+
+def find_log_files(log_dir: Path, name: str | None = None) -> list[Path]:
+    """
+    Find current and rotated logs
+    :param name: name of log (kiosk, watch_config, ...), all logs when not set
+    :return: paths of logs, oldest first
+    """
+    paths = [path for path in log_dir.glob(f"chromium_kiosk_{name or '*'}.log*") if path.is_file()]
+    return sorted(paths, key=lambda path: (path.name.partition(".log")[0], *_rotation_order(path)))
+
+
+def open_log(path: Path) -> IO[bytes]:
+    opener = OPENERS.get(path.suffix)
+    return cast("IO[bytes]", opener(path)) if opener else path.open("rb")
+
+
+class LogReader:
+    """
+    Streams entries matching filters from log files line by line, memory use does not depend on size of logs.
+
+    Lines are kept as bytes and filters compare fixed position fields, lines are decoded only when printed.
+    Log format has no year, entries newer by month and day than modification of their file are from the previous year.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        min_level: str = "debug",
+        since: float | None = None,
+        until: float | None = None,
+        sources: Iterable[str] = (),
+    ) -> None:
+        if min_level.lower() not in LEVEL_NAMES:
+            msg = f"Unknown level {min_level}, use one of {', '.join(LEVEL_NAMES)}"
+            raise ValueError(msg)
+        self.paths = list(paths)
+        self.min_level = LEVEL_ORDER[LEVEL_NAMES[min_level.lower()]]
+        self.since = since
+        self.since_key = time_key(since, year=True) if since is not None else None
+        self.until_key = time_key(until, year=True) if until is not None else None
+        # Pattern matches file name or file name with line number, eg. Heartbeat.py or Qiosk*.py:29?
+        self.source_pattern = re.compile(
+            "|".join(fnmatch.translate(source) for source in sources).encode(),
+        ) if sources else None
+
+    def _source_matches(self, line: bytes) -> bool:
+        if not self.source_pattern:
+            return True
+        fields = line.split(b" ", 4)
+        if len(fields) < 4:
+            return False
+        source = fields[3].rstrip(b"]")
+        return bool(self.source_pattern.match(source) or self.source_pattern.match(source.partition(b":")[0]))
+
+    def lines(self) -> Iterator[bytes]:
+        """
+        Lines of matching entries including their continuation lines, oldest first within every log
+        """
+        finished_logs = set()
+        for path in self.paths:
+            log_name = path.name.partition(".log")[0]
+            # Nothing was written to the log after it was modified for the last time
+            modified = path.stat().st_mtime
+            if log_name in finished_logs or (self.since is not None and modified < self.since):
+                continue
+            # Last entry of the log was written before its modification, older entries may be from previous year
+            modified_key = time_key(modified)
+            modified_year = int(time_key(modified, year=True)[:4])
+            year_prefixes = (str(modified_year).encode(), str(modified_year - 1).encode())
+            matching = False
+            with open_log(path) as log_file:
+                for line in log_file:
+                    # Lines not starting new entry are continuation of the previous one (eg. traceback)
+                    level = LEVEL_ORDER.get(line[:1])
+                    if level is None or line[ENTRY_MARKS_SLICE] != ENTRY_MARKS:
+                        if matching:
+                            yield line
+                        continue
+
+                    key = line[TIME_KEY_SLICE]
+                    if self.since_key is not None or self.until_key is not None:
+                        key = year_prefixes[key > modified_key] + key
+                    if self.until_key is not None and key > self.until_key:
+                        # Log files are read in chronological order, nothing newer in this log can match
+                        finished_logs.add(log_name)
+                        break
+                    matching = (
+                        level >= self.min_level
+                        and (self.since_key is None or key >= self.since_key)
+                        and self._source_matches(line)
+                    )
+                    if matching:
+                        yield line
+
+
+@dataclasses.dataclass
+class HourSummary:
+    entries: int = 0
+    warnings: int = 0
+    errors: int = 0
+    crashes: int = 0
+    restarts: int = 0
+    config_applies: int = 0
+
+
+class LogSummary:
+    """
+    Counts entries, errors and incidents per hour
+    """
+
+    def __init__(self) -> None:
+        self.hours: dict[bytes, HourSummary] = {}
+
+    def consume(self, lines: Iterable[bytes]) -> LogSummary:
+        hour_key = None
+        hour = HourSummary()
+        for line in lines:
+            level = LEVEL_ORDER.get(line[:1])
+            if level is None or line[ENTRY_MARKS_SLICE] != ENTRY_MARKS:
+                continue
+            # Consecutive entries are mostly from the same hour, dictionary is searched only when hour changes
+            if line[HOUR_KEY_SLICE] != hour_key:
+                hour_key = line[HOUR_KEY_SLICE]
+                hour = self.hours.setdefault(hour_key, HourSummary())
+            hour.entries += 1
+            if level == WARNING_ORDER:
+                hour.warnings += 1
+            elif level > WARNING_ORDER:
+                hour.errors += 1
+            for event, patterns in EVENT_PATTERNS.items():
+                if any(pattern in line for pattern in patterns):
+                    setattr(hour, event, getattr(hour, event) + 1)
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        hours = {
+            "{}-{} {}:00".format(*(part.decode() for part in (key[:2], key[2:4], key[5:7]))): dataclasses.asdict(summary)
+            for key, summary in sorted(self.hours.items())
+        }
+        totals = HourSummary()
+        for summary in self.hours.values():
+            for field in dataclasses.fields(HourSummary):
+                setattr(totals, field.name, getattr(totals, field.name) + getattr(summary, field.name))
+        return {
+            "hours": hours,
+            "totals": dataclasses.asdict(totals),
+            "errors_per_hour": totals.errors / len(self.hours) if self.hours else 0.0,
+        }
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime as dt
+import fcntl
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from chromium_kiosk.enum.HistoryMetricEnum import HistoryMetricEnum
+from chromium_kiosk.enum.RotationEnum import RotationEnum
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from typing_extensions import Self
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"CKMH"
+VERSION = 1
+# magic, version, record size, capacity (records), number of records ever written
+HEADER = struct.Struct("<4sHHQQ")
+HEADER_SIZE = 64
+WRITTEN = struct.Struct("<Q")
+WRITTEN_OFFSET = 16
+# sequence number (1-based), CRC32 of the rest of the record, metric, reserved, timestamp, value
+RECORD = struct.Struct("<QIHHdd")
+CRC_OFFSET = 8
+CRC_END = 12
+
+DEFAULT_CAPACITY = 65536  # 2 MiB file, about a week of samples taken every minute
+
+ROTATION_DEGREES = {
+    RotationEnum.NORMAL: 0,
+    RotationEnum.RIGHT: 90,
+    RotationEnum.INVERTED: 180,
+    RotationEnum.LEFT: 270,
+}
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@dataclasses.dataclass(frozen=True)
+class HistoryRecord:
+    sequence: int
+    timestamp: float  # Seconds since epoch
+    metric: HistoryMetricEnum
+    value: float
+
+
+def parse_time(value: str, now: float | None = None) -> float:
+    """
+    Parse time of history query
+    :param value: duration back from now (90s, 30m, 12h, 2d) or ISO 8601 date and time in local time zone
+    :return: seconds since epoch
+    """
+    found = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value.strip())
+    if found:
+        return (time.time() if now is None else now) - float(found.group(1)) * DURATION_UNITS[found.group(2)]
+    try:
+        return dt.datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        msg = f"Invalid time {value}, use duration like 30m, 12h, 2d or ISO date and time"
+        raise ValueError(msg) from None
+
+
+def _record_crc(data: bytes | bytearray | memoryview) -> int:
+    view = memoryview(data)
+    return zlib.crc32(view[CRC_END:RECORD.size], zlib.crc32(view[:CRC_OFFSET]))
+
+
+class MetricsHistory:
+    """
+    Fixed size ring of metric samples in memory mapped file.
+
+    Records are written straight to the page cache, so they survive crash of the process, flush() forces them to disk
+    to survive power loss too. Every record carries its sequence number and CRC, record torn by power loss is skipped
+    when reading and header lagging behind records is repaired on open. File never grows, oldest records are overwritten.
+    Existing file is never resized, other processes may have it mapped, its capacity wins over the requested one.
+    """
+
+    def __init__(self, path: Path, capacity: int = DEFAULT_CAPACITY, *, readonly: bool = False) -> None:
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        # Preallocated record buffer, writing a record does not create any objects
+        self._buffer = bytearray(RECORD.size)
+        self._fd = os.open(path, os.O_RDONLY if readonly else os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if readonly:
+                self.capacity = self._read_header()
+                self._mm = mmap.mmap(self._fd, HEADER_SIZE + self.capacity * RECORD.size, access=mmap.ACCESS_READ)
+            else:
+                self._open_writable(capacity)
+        except Exception:
+            os.close(self._fd)
+            raise
+
+    @staticmethod
+    def get_history_path() -> Path:
+        return Path.home().joinpath(".chromium-kiosk-history.bin")
+
+    def _read_header(self) -> int:
+        header = os.pread(self._fd, HEADER.size, 0)
+        if len(header) != HEADER.size:
+            msg = f"{self.path} is not a metrics history file"
+            raise ValueError(msg)
+        magic, version, record_size, capacity, _ = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size or not capacity:
+            msg = f"{self.path} is not a metrics history file"
+            raise ValueError(msg)
+        if os.fstat(self._fd).st_size < HEADER_SIZE + capacity * RECORD.size:
+            msg = f"{self.path} is truncated"
+            raise ValueError(msg)
+        return int(capacity)
+
+    def _open_writable(self, capacity: int) -> None:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            try:
+                self.capacity = self._read_header()
+            except ValueError:
+                # New file or unknown format, nobody can have it mapped
+                self.capacity = capacity
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, HEADER_SIZE + capacity * RECORD.size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, VERSION, RECORD.size, capacity, 0), 0)
+            if self.capacity != capacity:
+                log.warning("%s keeps capacity of %d records, remove it to change capacity to %d", self.path, self.capacity, capacity)
+            self._mm = mmap.mmap(self._fd, HEADER_SIZE + self.capacity * RECORD.size)
+            self._repair_written()
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _repair_written(self) -> None:
+        # Header page may have reached disk before the last records did, or the other way round
+        written = self.written
+        while self._valid_record(written) is not None:
+            written += 1
+        WRITTEN.pack_into(self._mm, WRITTEN_OFFSET, written)
+
+    @property
+    def written(self) -> int:
+        """
+        Number of records ever written
+        """
+        return int(WRITTEN.unpack_from(self._mm, WRITTEN_OFFSET)[0])
+
+    def _valid_record(self, index: int) -> HistoryRecord | None:
+        offset = HEADER_SIZE + index % self.capacity * RECORD.size
+        data = self._mm[offset:offset + RECORD.size]
+        sequence, crc, metric, _, timestamp, value = RECORD.unpack(data)
+        if sequence != index + 1 or crc != _record_crc(data):
+            return None
+        try:
+            return HistoryRecord(sequence, timestamp, HistoryMetricEnum(metric), value)
+        except ValueError:
+            return None
+
+    def record(self, metric: HistoryMetricEnum, value: float, timestamp: float | None = None) -> None:
+        if self.readonly:
+            msg = "History is opened read only"
+            raise PermissionError(msg)
+        with self._lock:
+            # Other processes (eg. config watcher) may write to the same file
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                written = WRITTEN.unpack_from(self._mm, WRITTEN_OFFSET)[0]
+                RECORD.pack_into(self._buffer, 0, written + 1, 0, metric.value, 0, time.time() if timestamp is None else timestamp, value)
+                struct.pack_into("<I", self._buffer, CRC_OFFSET, _record_crc(self._buffer))
+                offset = HEADER_SIZE + written % self.capacity * RECORD.size
+                self._mm[offset:offset + RECORD.size] = self._buffer
+                WRITTEN.pack_into(self._mm, WRITTEN_OFFSET, written + 1)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def flush(self) -> None:
+        if not self.readonly:
+            self._mm.flush()
+
+    def _first_index_since(self, since: float, oldest: int, written: int) -> int:
+        # Records are appended in time order, binary search reads only log2(capacity) records
+        low, high = oldest, written
+        while low < high:
+            middle = (low + high) // 2
+            record = self._valid_record(middle)
+            if record is None or record.timestamp < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def records(self, since: float | None = None, until: float | None = None, metrics: Iterable[HistoryMetricEnum] | None = None) -> Iterator[HistoryRecord]:
+        """
+        Stream records from oldest to newest, records overwritten while reading are skipped
+        """
+        wanted = frozenset(metrics) if metrics else None
+        written = self.written
+        oldest = max(0, written - self.capacity)
+        start = self._first_index_since(since, oldest, written) if since is not None else oldest
+        for index in range(start, written):
+            record = self._valid_record(index)
+            if record is None:
+                continue
+            if until is not None and record.timestamp > until:
+                break
+            if wanted is None or record.metric in wanted:
+                yield record
+
+    def close(self) -> None:
+        self.flush()
+        self._mm.close()
+        os.close(self._fd)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_args: object) -> None:
+        self.close()
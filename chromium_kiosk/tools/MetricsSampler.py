@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable
+
+from chromium_kiosk.enum.HeartbeatActionEnum import HeartbeatActionEnum
+from chromium_kiosk.enum.HistoryMetricEnum import HistoryMetricEnum
+from chromium_kiosk.tools.DevTools import DevToolsError
+from chromium_kiosk.tools.ProcessTree import ProcessTree
+
+if TYPE_CHECKING:
+    from chromium_kiosk.tools.DevTools import DevTools
+    from chromium_kiosk.tools.Heartbeat import Heartbeat
+    from chromium_kiosk.tools.MetricsHistory import MetricsHistory
+
+log = logging.getLogger(__name__)
+
+# Navigation start and load duration in milliseconds of current page, load duration is 0 while loading
+PAGE_LOAD_EXPRESSION = "[performance.timing.navigationStart, performance.timing.loadEventEnd > 0 ? performance.timing.loadEventEnd - performance.timing.navigationStart : 0]"
+
+HEARTBEAT_ACTION_METRICS = {
+    HeartbeatActionEnum.RELOAD: HistoryMetricEnum.PAGE_RELOAD,
+    HeartbeatActionEnum.HOME: HistoryMetricEnum.PAGE_HOME,
+}
+
+
+class MetricsSampler:
+    """
+    Periodically records browser memory and CPU usage, browser restarts, heartbeat recoveries
+    and page load timings into metrics history
+    """
+
+    def __init__(
+        self,
+        history: MetricsHistory,
+        pid_resolver: Callable[[], int | None],
+        interval: float = 60,
+        devtools_factory: Callable[[], DevTools] | None = None,
+        heartbeat: Heartbeat | None = None,
+    ) -> None:
+        self.history = history
+        self.pid_resolver = pid_resolver
+        self.interval = interval
+        self.devtools_factory = devtools_factory
+        self.heartbeat = heartbeat
+        self._pid: int | None = None
+        self._cpu_time: float | None = None
+        self._sampled_at = 0.0
+        self._navigation_start: float | None = None
+        self._actions: dict[str, int] = dict(heartbeat.actions) if heartbeat else {}
+        self._stopped = threading.Event()
+
+    def _sample_browser(self) -> None:
+        pid = self.pid_resolver()
+        if pid != self._pid:
+            if self._pid is not None and pid is not None:
+                self.history.record(HistoryMetricEnum.BROWSER_RESTART, pid)
+            self._pid = pid
+            self._cpu_time = None
+            self._navigation_start = None
+        if not pid:
+            return
+
+        process_tree = ProcessTree(pid)
+        self.history.record(HistoryMetricEnum.BROWSER_RSS, process_tree.rss())
+        self.history.record(HistoryMetricEnum.BROWSER_PSS, process_tree.pss())
+        cpu_time = process_tree.cpu_time()
+        sampled_at = time.monotonic()
+        if self._cpu_time is not None and sampled_at > self._sampled_at:
+            # Share of one core used since previous sample
+            self.history.record(HistoryMetricEnum.BROWSER_CPU, (cpu_time - self._cpu_time) / (sampled_at - self._sampled_at))
+        self._cpu_time = cpu_time
+        self._sampled_at = sampled_at
+
+    def _sample_heartbeat(self) -> None:
+        if not self.heartbeat:
+            return
+        for action, metric in HEARTBEAT_ACTION_METRICS.items():
+            count = self.heartbeat.actions.get(action.value, 0)
+            if count > self._actions.get(action.value, 0):
+                self.history.record(metric, count - self._actions.get(action.value, 0))
+            self._actions[action.value] = count
+
+    def _sample_page_load(self) -> None:
+        if not self.devtools_factory:
+            return
+        try:
+            session = self.devtools_factory().connect(timeout=2)
+            try:
+                navigation_start, load_time = session.evaluate(PAGE_LOAD_EXPRESSION)
+            finally:
+                session.close()
+        except (DevToolsError, TimeoutError, TypeError, ValueError) as e:
+            log.debug("Failed to read page load timing: %s", e)
+            return
+        # Every page is recorded once, after it finished loading
+        if load_time and navigation_start != self._navigation_start:
+            self._navigation_start = navigation_start
+            self.history.record(HistoryMetricEnum.PAGE_LOAD, float(load_time) / 1000)
+
+    def sample(self) -> None:
+        self._sample_browser()
+        self._sample_heartbeat()
+        self._sample_page_load()
+        self.history.flush()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            started_at = time.monotonic()
+            try:
+                self.sample()
+            except OSError:
+                log.warning("Failed to record metrics history", exc_info=True)
+            self._stopped.wait(max(0.0, self.interval - (time.monotonic() - started_at)))
+
+    def stop(self) -> None:
+        self._stopped.set()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+from typing import TYPE_CHECKING
+
+from chromium_kiosk.enum.PerformanceProfileEnum import PerformanceProfileEnum
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+    from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+
+log = logging.getLogger(__name__)
+
+CHROMIUM_FLAGS_ENV = "QTWEBENGINE_CHROMIUM_FLAGS"
+# Switches taking comma separated lists, values from all sources are joined instead of replaced
+LIST_SWITCHES = frozenset({"--enable-features", "--disable-features", "--enable-blink-features", "--disable-blink-features"})
+# Feature listed by later switch is removed from its opposite, eg. preset disabled feature is enabled by user
+OPPOSITE_SWITCHES = {
+    "--enable-features": "--disable-features",
+    "--disable-features": "--enable-features",
+    "--enable-blink-features": "--disable-blink-features",
+    "--disable-blink-features": "--enable-blink-features",
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class PerformanceProfile:
+    flags: tuple[str, ...] = ()  # Chromium switches
+    env: Mapping[str, str] = dataclasses.field(default_factory=dict)
+
+
+PRESETS: dict[PerformanceProfileEnum, PerformanceProfile] = {
+    PerformanceProfileEnum.LOW_MEMORY: PerformanceProfile(
+        flags=(
+            "--renderer-process-limit=1",
+            "--process-per-site",
+            "--disable-features=BackForwardCache,MediaRouter",
+            "--js-flags=--optimize-for-size",
+            "--disk-cache-size=33554432",
+            "--disable-background-networking",
+        ),
+    ),
+    PerformanceProfileEnum.LOW_LATENCY_TOUCH: PerformanceProfile(
+        flags=(
+            "--touch-events=enabled",
+            "--disable-pinch",
+            "--overscroll-history-navigation=0",
+            "--enable-gpu-rasterization",
+            "--disable-features=TouchpadOverscrollHistoryNavigation",
+        ),
+        env={"QT_XCB_NO_XI2_MOUSE": "0"},
+    ),
+    PerformanceProfileEnum.VIDEO_SIGNAGE: PerformanceProfile(
+        flags=(
+            "--autoplay-policy=no-user-gesture-required",
+            "--enable-accelerated-video-decode",
+            "--ignore-gpu-blocklist",
+            "--disable-background-media-suspend",
+            "--disable-features=PreloadMediaEngagementData,MediaEngagementBypassAutoplayPolicies",
+        ),
+    ),
+    PerformanceProfileEnum.GPU_RASTER: PerformanceProfile(
+        flags=(
+            "--enable-gpu-rasterization",
+            "--ignore-gpu-blocklist",
+            "--enable-zero-copy",
+            "--num-raster-threads=2",
+        ),
+    ),
+}
+
+
+def feature_name(item: str) -> str:
+    """
+    Name of feature list item, without field trial and parameters, eg. Feature<Trial:param/value
+    """
+    return item.split(":", 1)[0].split("<", 1)[0]
+
+
+def merge_chromium_flags(*flag_sets: Iterable[str]) -> list[str]:
+    """
+    Merge Chromium switches, switch from later set replaces the same switch from earlier one,
+    feature lists are joined and feature enabled (disabled) later is removed from earlier disabled (enabled) ones
+    """
+    merged: dict[str, str | None] = {}
+    for flags in flag_sets:
+        for flag in flags:
+            name, separator, value = flag.partition("=")
+            if name in LIST_SWITCHES and merged.get(name):
+                known = str(merged[name]).split(",")
+                value = ",".join(known + [item for item in value.split(",") if item and item not in known])
+            opposite = OPPOSITE_SWITCHES.get(name)
+            if opposite and merged.get(opposite):
+                features = {feature_name(item) for item in value.split(",")}
+                remaining = [item for item in str(merged[opposite]).split(",") if feature_name(item) not in features]
+                if remaining:
+                    merged[opposite] = ",".join(remaining)
+                else:
+                    merged.pop(opposite)
+            # Reinsert so overridden switch moves to the end as it would on command line
+            merged.pop(name, None)
+            merged[name] = value if separator else None
+    return [name if value is None else f"{name}={value}" for name, value in merged.items()]
+
+
+def resolve_tuning(profile_name: str | None, extra_arguments: str | None, extra_env_vars: Mapping[str, str]) -> tuple[str | None, dict[str, str]]:
+    """
+    Expand performance profile and merge it with user overrides
+    :param profile_name: PERFORMANCE_PROFILE
+    :param extra_arguments: EXTRA_ARGUMENTS, wins over profile and over flags from EXTRA_ENV_VARS
+    :param extra_env_vars: EXTRA_ENV_VARS, wins over profile
+    :return: Chromium flags and environment variables
+    """
+    profile = PRESETS[PerformanceProfileEnum(profile_name)] if profile_name else PerformanceProfile()
+    env = {**profile.env, **{key: str(value) for key, value in extra_env_vars.items()}}
+    flags = merge_chromium_flags(
+        profile.flags,
+        str(extra_env_vars.get(CHROMIUM_FLAGS_ENV, "")).split(),
+        (extra_arguments or "").split(),
+    )
+    env.pop(CHROMIUM_FLAGS_ENV, None)
+    return " ".join(flags) or None, env
+
+
+def validate_profile(config: ConfigSnapshot) -> ConfigSnapshot:
+    """
+    Unknown PERFORMANCE_PROFILE is reported once when config is loaded and browser runs without profile
+    """
+    profile_name = config.PERFORMANCE_PROFILE
+    if profile_name and profile_name not in {profile.value for profile in PerformanceProfileEnum}:
+        log.warning(
+            "Unknown PERFORMANCE_PROFILE %s, valid profiles are %s, running without profile",
+            profile_name,
+            ", ".join(profile.value for profile in PerformanceProfileEnum),
+        )
+        return config.replace(PERFORMANCE_PROFILE=None)
+    return config
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime as dt
+import json
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from chromium_kiosk.tools.DevTools import DevTools, DevToolsError
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+log = logging.getLogger(__name__)
+
+
+def parse_time(value: str | int | None, key: str) -> dt.time | None:
+    """
+    Parse time of day of playlist item
+    :param value: HH:MM, unquoted HH:MM is loaded by YAML as minutes since midnight
+    :param key: config key of the value, used in error message
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, int) and not isinstance(value, bool):
+        if not 0 <= value < 24 * 60:
+            msg = f"Playlist item {key} must be time of day as HH:MM, got {value}"
+            raise ValueError(msg)
+        return dt.time(value // 60, value % 60)
+    try:
+        return dt.time.fromisoformat(str(value))
+    except ValueError:
+        msg = f"Playlist item {key} must be time of day as HH:MM, got {value!r}"
+        raise ValueError(msg) from None
+
+
+@dataclasses.dataclass(frozen=True)
+class PlaylistItem:
+    url: str
+    duration: float
+    time_from: dt.time | None = None
+    time_to: dt.time | None = None
+
+    @classmethod
+    def from_config(cls, item: Mapping[str, Any]) -> PlaylistItem:
+        return cls(
+            url=str(item["URL"]),
+            duration=float(item.get("DURATION", 60)),
+            time_from=parse_time(item.get("FROM"), "FROM"),
+            time_to=parse_time(item.get("TO"), "TO"),
+        )
+
+    def is_active(self, now: dt.time) -> bool:
+        time_from = self.time_from or dt.time.min
+        time_to = self.time_to or dt.time.max
+        if time_from <= time_to:
+            return time_from <= now <= time_to
+        # Window over midnight, eg. 22:00 - 06:00
+        return now >= time_from or now <= time_to
+
+
+@dataclasses.dataclass
+class PreloadedPage:
+    item: PlaylistItem
+    target_id: str
+    memory: int = 0
+
+
+@dataclasses.dataclass
+class PlaylistStats:
+    transitions: int = 0
+    preloaded_transitions: int = 0
+    gap_total: float = 0.0
+    gap_max: float = 0.0
+    preload_memory: int = 0
+
+    def record_transition(self, gap: float, *, preloaded: bool) -> None:
+        self.transitions += 1
+        self.preloaded_transitions += int(preloaded)
+        self.gap_total += gap
+        self.gap_max = max(self.gap_max, gap)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "transitions": self.transitions,
+            "preloaded_transitions": self.preloaded_transitions,
+            "gap_avg": self.gap_total / self.transitions if self.transitions else 0.0,
+            "gap_max": self.gap_max,
+            "preload_memory": self.preload_memory,
+        }
+
+
+class Playlist:
+    """
+    Rotates pages by schedule.
+
+    Next page is created as background DevTools target before its slot starts, when the slot starts
+    it is activated and previous page is closed, so there is no blank frame while page loads.
+    When browser does not support creating targets, next page is prefetched into HTTP cache
+    and visible page is navigated instead.
+    """
+
+    def __init__(
+        self,
+        items: list[PlaylistItem],
+        devtools_factory: Callable[[], DevTools],
+        preload: float = 5,
+        max_preloaded: int = 1,
+        now: Callable[[], dt.datetime] = dt.datetime.now,
+    ) -> None:
+        self.items = items
+        self.devtools_factory = devtools_factory
+        self.preload = preload
+        self.max_preloaded = max(max_preloaded, 0)
+        self.now = now
+        self.stats = PlaylistStats()
+        self.preloaded: list[PreloadedPage] = []
+        self.visible_target_id: str | None = None
+        self._stopped = threading.Event()
+        self._targets_supported = True
+
+    def next_item(self, index: int) -> tuple[int, PlaylistItem] | None:
+        """
+        Find next item active in current time of day
+        :param index: index of current item
+        """
+        now = self.now().time()
+        for offset in range(1, len(self.items) + 1):
+            next_index = (index + offset) % len(self.items)
+            if self.items[next_index].is_active(now):
+                return next_index, self.items[next_index]
+        return None
+
+    def _wait_loaded(self, devtools: DevTools, target: dict[str, Any] | None, timeout: float = 30) -> None:
+        session = devtools.connect(target)
+        try:
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline and session.evaluate("document.readyState") != "complete":
+                time.sleep(0.05)
+        finally:
+            session.close()
+
+    def _page_memory(self, devtools: DevTools, target_id: str) -> int:
+        target = devtools.get_target(target_id)
+        if not target:
+            return 0
+        session = devtools.connect(target)
+        try:
+            return int(session.call("Runtime.getHeapUsage").get("usedSize", 0))
+        finally:
+            session.close()
+
+    def _close_target(self, devtools: DevTools, target_id: str) -> None:
+        browser = devtools.connect_browser()
+        try:
+            browser.call("Target.closeTarget", {"targetId": target_id})
+        finally:
+            browser.close()
+
+    def preload_item(self, item: PlaylistItem) -> None:
+        if self.max_preloaded == 0 or any(preloaded.item == item for preloaded in self.preloaded):
+            return
+
+        devtools = self.devtools_factory()
+        if self._targets_supported:
+            browser = devtools.connect_browser()
+            try:
+                target_id = browser.call("Target.createTarget", {"url": item.url, "background": True})["targetId"]
+            except DevToolsError:
+                log.info("Browser does not support creating targets, falling back to prefetch")
+                self._targets_supported = False
+            else:
+                while len(self.preloaded) >= self.max_preloaded:
+                    self._close_target(devtools, self.preloaded.pop(0).target_id)
+                preloaded = PreloadedPage(item, target_id)
+                self.preloaded.append(preloaded)
+                self._wait_loaded(devtools, devtools.get_target(target_id))
+                preloaded.memory = self._page_memory(devtools, target_id)
+                self.stats.preload_memory = sum(page.memory for page in self.preloaded)
+                return
+            finally:
+                browser.close()
+
+        # Warm up HTTP cache at least
+        session = devtools.connect()
+        try:
+            session.evaluate(f"fetch({json.dumps(item.url)}, {{mode: 'no-cors', credentials: 'include'}}).then(() => true, () => false)", await_promise=True)
+        finally:
+            session.close()
+
+    def is_visible(self, item: PlaylistItem) -> bool:
+        """
+        Item is already visible, eg. playlist of single page, navigating to it again would reload the page
+        """
+        if not self.visible_target_id:
+            return False
+        target = self.devtools_factory().get_target(self.visible_target_id)
+        return target is not None and target.get("url") == item.url
+
+    def show_item(self, item: PlaylistItem) -> float:
+        """
+        Make item visible
+        :return: transition gap in seconds
+        """
+        devtools = self.devtools_factory()
+        start = time.monotonic()
+        preloaded = next((page for page in self.preloaded if page.item == item), None)
+        if preloaded:
+            self.preloaded.remove(preloaded)
+            browser = devtools.connect_browser()
+            try:
+                browser.call("Target.activateTarget", {"targetId": preloaded.target_id})
+                if self.visible_target_id:
+                    browser.call("Target.closeTarget", {"targetId": self.visible_target_id})
+            finally:
+                browser.close()
+            self.visible_target_id = preloaded.target_id
+            self.stats.preload_memory = sum(page.memory for page in self.preloaded)
+        else:
+            target = devtools.get_target(self.visible_target_id) if self.visible_target_id else None
+            if not target:
+                targets = devtools.list_targets()
+                target = targets[0] if targets else None
+            session = devtools.connect(target)
+            try:
+                session.call("Page.navigate", {"url": item.url})
+            finally:
+                session.close()
+            self._wait_loaded(devtools, target)
+            self.visible_target_id = target["id"] if target else None
+
+        gap = time.monotonic() - start
+        self.stats.record_transition(gap, preloaded=preloaded is not None)
+        log.debug("Playlist switched to %s in %.3f seconds (preloaded: %s)", item.url, gap, preloaded is not None)
+        return gap
+
+    def run(self) -> None:
+        index = -1
+        while not self._stopped.is_set():
+            found = self.next_item(index)
+            if not found:
+                # Nothing to play in this time of day
+                self._stopped.wait(30)
+                continue
+
+            index, item = found
+            slot_end = time.monotonic() + item.duration
+            try:
+                if self.is_visible(item):
+                    log.debug("Playlist keeps showing %s", item.url)
+                else:
+                    self.show_item(item)
+                upcoming = self.next_item(index)
+                # Page of the same URL stays visible, it is not preloaded
+                if upcoming and upcoming[1].url != item.url:
+                    self._stopped.wait(max(0.0, slot_end - self.preload - time.monotonic()))
+                    if self._stopped.is_set():
+                        break
+                    self.preload_item(upcoming[1])
+            except (DevToolsError, TimeoutError):
+                log.warning("Playlist failed to switch to %s", item.url, exc_info=True)
+
+            self._stopped.wait(max(0.0, slot_end - time.monotonic()))
+
+    def stop(self) -> None:
+        self._stopped.set()
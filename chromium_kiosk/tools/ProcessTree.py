@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import contextlib
+import os
+from pathlib import Path
+
+PROC_PATH = Path("/proc")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+class ProcessTree:
+    """
+    Process and all its descendants (QtWebEngine spawns renderer/GPU processes), read from /proc
+    """
+
+    def __init__(self, pid: int, proc_path: Path = PROC_PATH) -> None:
+        self.pid = pid
+        self.proc_path = proc_path
+
+    def _read_stat(self, pid: int) -> list[str] | None:
+        try:
+            stat = self.proc_path.joinpath(str(pid), "stat").read_text()
+        except OSError:
+            return None
+        # Process name may contain spaces and brackets, fields start after last ")"
+        return stat[stat.rindex(")") + 2:].split()
+
+    def pids(self) -> list[int]:
+        children: dict[int, list[int]] = {}
+        for entry in self.proc_path.iterdir():
+            if not entry.name.isdigit():
+                continue
+            fields = self._read_stat(int(entry.name))
+            if fields:
+                children.setdefault(int(fields[1]), []).append(int(entry.name))
+
+        pids = []
+        stack = [self.pid]
+        while stack:
+            pid = stack.pop()
+            pids.append(pid)
+            stack.extend(children.get(pid, []))
+        return pids
+
+    def rss(self) -> int:
+        """
+        Resident memory in bytes, shared pages are counted for every process
+        """
+        total = 0
+        for pid in self.pids():
+            with contextlib.suppress(OSError, ValueError, IndexError):
+                total += int(self.proc_path.joinpath(str(pid), "statm").read_text().split()[1]) * PAGE_SIZE
+        return total
+
+    def pss(self) -> int:
+        """
+        Proportional set size in bytes, shared pages are divided between processes sharing them,
+        this is the real memory cost of the tree. Falls back to RSS when smaps_rollup is not available.
+        """
+        total = 0
+        for pid in self.pids():
+            try:
+                smaps_rollup = self.proc_path.joinpath(str(pid), "smaps_rollup").read_text()
+            except OSError:
+                return self.rss()
+
+            for line in smaps_rollup.splitlines():
+                if line.startswith("Pss:"):
+                    total += int(line.split()[1]) * 1024
+                    break
+        return total
+
+    def cpu_time(self) -> float:
+        """
+        User and system CPU time of the tree in seconds
+        """
+        ticks = 0
+        for pid in self.pids():
+            fields = self._read_stat(pid)
+            if fields:
+                # utime and stime are fields 14 and 15 of stat, counted from 1
+                ticks += int(fields[11]) + int(fields[12])
+        return ticks / CLOCK_TICKS
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import logging
+import socket
+import subprocess
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from chromium_kiosk.enum.PerformanceProfileEnum import PerformanceProfileEnum
+from chromium_kiosk.Qiosk import Qiosk
+from chromium_kiosk.tools.DevTools import DevTools, DevToolsError
+from chromium_kiosk.tools.LatencyHistogram import LatencyHistogram
+from chromium_kiosk.tools.ProcessTree import ProcessTree
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+
+log = logging.getLogger(__name__)
+
+# Milliseconds from navigation start to end of load event, 0 while page is still loading
+LOAD_TIME_EXPRESSION = "performance.timing.loadEventEnd > 0 ? performance.timing.loadEventEnd - performance.timing.navigationStart : 0"
+# Number of animation frames painted in one second
+FRAME_RATE_EXPRESSION = """new Promise(resolve => {
+    let frames = 0;
+    const start = performance.now();
+    function frame() {
+        frames++;
+        if (performance.now() - start < 1000) {
+            requestAnimationFrame(frame);
+        } else {
+            resolve(frames * 1000 / (performance.now() - start));
+        }
+    }
+    requestAnimationFrame(frame);
+})"""
+
+
+def get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+@dataclasses.dataclass
+class ProfileBenchmarkResult:
+    profile: str | None
+    startup: float | None = None  # Seconds from spawn to DevTools endpoint being up
+    load_time: float | None = None  # Seconds from navigation start to load event of HOME_PAGE
+    memory: int | None = None  # Peak PSS of browser process tree in bytes
+    cpu: float | None = None  # Average CPU usage of browser process tree, 1.0 is one core
+    frame_rate: float | None = None
+    latency: dict[str, Any] = dataclasses.field(default_factory=dict)  # Main thread responsiveness
+    error: str | None = None
+
+
+class ProfileBenchmark:
+    """
+    Runs HOME_PAGE with every performance profile in turn on this device and measures
+    startup, page load, memory, CPU usage, frame rate and main thread latency
+    """
+
+    def __init__(
+        self,
+        config: ConfigSnapshot,
+        remote_debugging_port: int,
+        duration: float = 30,
+        spawn: Callable[[ConfigSnapshot, int], subprocess.Popen[bytes]] | None = None,
+        startup_timeout: float = 30,
+        sample_interval: float = 0.5,
+    ) -> None:
+        self.config = config
+        self.remote_debugging_port = remote_debugging_port
+        self.duration = duration
+        self.spawn = spawn or (lambda profile_config, port: Qiosk(profile_config).spawn(remote_debugging_port=port))
+        self.startup_timeout = startup_timeout
+        self.sample_interval = sample_interval
+
+    def _wait_for_devtools(self, devtools: DevTools, process: subprocess.Popen[bytes]) -> None:
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                msg = f"Browser exited with code {process.returncode}"
+                raise DevToolsError(msg)
+            with contextlib.suppress(DevToolsError):
+                if devtools.list_targets():
+                    return
+            time.sleep(0.1)
+        msg = f"Browser did not open any page in {self.startup_timeout} seconds"
+        raise DevToolsError(msg)
+
+    def _measure(self, result: ProfileBenchmarkResult, process: subprocess.Popen[bytes]) -> None:
+        started_at = time.monotonic()
+        devtools = DevTools(self.remote_debugging_port, timeout=2)
+        self._wait_for_devtools(devtools, process)
+        result.startup = time.monotonic() - started_at
+
+        process_tree = ProcessTree(process.pid)
+        cpu_before = process_tree.cpu_time()
+        measured_at = time.monotonic()
+        latency = LatencyHistogram()
+        memory = 0
+        session = devtools.connect(timeout=5)
+        try:
+            while time.monotonic() - measured_at < self.duration:
+                sample_at = time.monotonic()
+                load_time = session.evaluate(LOAD_TIME_EXPRESSION)
+                latency.observe(time.monotonic() - sample_at)
+                if load_time and result.load_time is None:
+                    result.load_time = float(load_time) / 1000
+                memory = max(memory, process_tree.pss())
+                time.sleep(max(0.0, self.sample_interval - (time.monotonic() - sample_at)))
+            frame_rate = session.evaluate(FRAME_RATE_EXPRESSION, timeout=5, await_promise=True)
+            result.frame_rate = float(frame_rate) if frame_rate is not None else None
+        finally:
+            session.close()
+
+        result.cpu = (process_tree.cpu_time() - cpu_before) / max(time.monotonic() - measured_at, 0.001)
+        result.memory = memory
+        result.latency = latency.to_dict()
+
+    def run_profile(self, profile: PerformanceProfileEnum | None) -> ProfileBenchmarkResult:
+        result = ProfileBenchmarkResult(profile.value if profile else None)
+        profile_config = self.config.replace(PERFORMANCE_PROFILE=result.profile, REMOTE_DEBUGGING=self.remote_debugging_port)
+        log.info("Benchmarking performance profile %s", result.profile or "none")
+        process = self.spawn(profile_config, self.remote_debugging_port)
+        try:
+            self._measure(result, process)
+        except (DevToolsError, TimeoutError) as e:
+            result.error = str(e)
+        finally:
+            process.terminate()
+            try:
+                process.wait(5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                with contextlib.suppress(subprocess.TimeoutExpired):
+                    process.wait(5)
+        return result
+
+    def run(self, profiles: Sequence[PerformanceProfileEnum | None] | None = None) -> list[ProfileBenchmarkResult]:
+        """
+        Benchmark profiles one by one, no profile (None) is the baseline
+        """
+        if profiles is None:
+            profiles = [None, *PerformanceProfileEnum]
+        return [self.run_profile(profile) for profile in profiles]
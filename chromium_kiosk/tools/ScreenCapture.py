@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import base64
+import dataclasses
+import logging
+import struct
+import subprocess
+import threading
+import time
+import zlib
+from typing import TYPE_CHECKING, Any, Callable
+
+from chromium_kiosk.tools import find_binary
+from chromium_kiosk.tools.DevTools import DevToolsError
+from chromium_kiosk.tools.LatencyHistogram import LatencyHistogram
+
+if TYPE_CHECKING:
+    from chromium_kiosk.tools.DevTools import DevTools
+
+log = logging.getLogger(__name__)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_HEADER = b"IHDR"
+PNG_DATA = b"IDAT"
+PNG_END = b"IEND"
+# Size of image the hash is computed from, difference of neighbours in 9 columns gives 8 bits per row
+HASH_WIDTH = 9
+HASH_HEIGHT = 8
+# Thumbnail requested from browser for hashing, bigger than hash size so small details average out
+THUMBNAIL_WIDTH = 36
+
+
+@dataclasses.dataclass
+class GrayImage:
+    width: int
+    height: int
+    pixels: bytes  # One byte per pixel, row by row
+
+
+@dataclasses.dataclass
+class Frame:
+    png: bytes
+    variant: bytes  # Downscaled version
+    variant_type: str  # Mime type of variant
+    hash: int
+    captured_at: float = dataclasses.field(default_factory=time.time)
+
+
+def _paeth(left: int, up: int, up_left: int) -> int:
+    estimate = left + up - up_left
+    distance_left = abs(estimate - left)
+    distance_up = abs(estimate - up)
+    distance_up_left = abs(estimate - up_left)
+    if distance_left <= distance_up and distance_left <= distance_up_left:
+        return left
+    if distance_up <= distance_up_left:
+        return up
+    return up_left
+
+
+def decode_png(data: bytes) -> GrayImage:
+    """
+    Decode 8 bit non interlaced PNG (as produced by browser) to grayscale, meant for small thumbnails
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        msg = "Not a PNG image"
+        raise ValueError(msg)
+
+    position = len(PNG_SIGNATURE)
+    compressed = bytearray()
+    width = height = channels = 0
+    while position < len(data):
+        length, chunk_type = struct.unpack_from(">I4s", data, position)
+        chunk = data[position + 8:position + 8 + length]
+        position += length + 12
+        if chunk_type == PNG_HEADER:
+            width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", chunk)
+            channels = {0: 1, 2: 3, 4: 2, 6: 4}.get(color_type, 0)
+            if bit_depth != 8 or not channels or interlace:
+                msg = f"Unsupported PNG format (bit depth {bit_depth}, color type {color_type}, interlace {interlace})"
+                raise ValueError(msg)
+        elif chunk_type == PNG_DATA:
+            compressed += chunk
+        elif chunk_type == PNG_END:
+            break
+
+    raw = zlib.decompress(bytes(compressed))
+    stride = width * channels
+    previous = bytearray(stride)
+    pixels = bytearray(width * height)
+    for y in range(height):
+        offset = y * (stride + 1)
+        filter_type = raw[offset]
+        row = bytearray(raw[offset + 1:offset + 1 + stride])
+        for x in range(stride):
+            left = row[x - channels] if x >= channels else 0
+            up_left = previous[x - channels] if x >= channels else 0
+            if filter_type == 1:
+                row[x] = (row[x] + left) & 0xFF
+            elif filter_type == 2:
+                row[x] = (row[x] + previous[x]) & 0xFF
+            elif filter_type == 3:
+                row[x] = (row[x] + ((left + previous[x]) >> 1)) & 0xFF
+            elif filter_type == 4:
+                row[x] = (row[x] + _paeth(left, previous[x], up_left)) & 0xFF
+        for x in range(width):
+            pixel = x * channels
+            if channels >= 3:
+                # ITU-R 601 luma, integer approximation
+                pixels[y * width + x] = (row[pixel] * 299 + row[pixel + 1] * 587 + row[pixel + 2] * 114) // 1000
+            else:
+                pixels[y * width + x] = row[pixel]
+        previous = row
+    return GrayImage(width, height, bytes(pixels))
+
+
+def encode_png(width: int, height: int, rgb_rows: list[bytes]) -> bytes:
+    """
+    Encode 8 bit RGB rows to PNG without filtering
+    """
+    def chunk(chunk_type: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", len(payload)) + chunk_type + payload + struct.pack(">I", zlib.crc32(chunk_type + payload))
+
+    raw = b"".join(b"\x00" + row for row in rgb_rows)
+    return b"".join((
+        PNG_SIGNATURE,
+        chunk(PNG_HEADER, struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+        chunk(PNG_DATA, zlib.compress(raw, 6)),
+        chunk(PNG_END, b""),
+    ))
+
+
+def difference_hash(image: GrayImage) -> int:
+    """
+    64 bit perceptual hash, every bit tells if brightness grows between neighbouring cells of 9x8 grid
+    """
+    cells = []
+    for cell_y in range(HASH_HEIGHT):
+        y_from = cell_y * image.height // HASH_HEIGHT
+        y_to = max((cell_y + 1) * image.height // HASH_HEIGHT, y_from + 1)
+        for cell_x in range(HASH_WIDTH):
+            x_from = cell_x * image.width // HASH_WIDTH
+            x_to = max((cell_x + 1) * image.width // HASH_WIDTH, x_from + 1)
+            total = sum(sum(image.pixels[y * image.width + x_from:y * image.width + x_to]) for y in range(y_from, y_to))
+            cells.append(total / ((y_to - y_from) * (x_to - x_from)))
+
+    value = 0
+    for cell_y in range(HASH_HEIGHT):
+        for cell_x in range(HASH_WIDTH - 1):
+            index = cell_y * HASH_WIDTH + cell_x
+            value = (value << 1) | int(cells[index] < cells[index + 1])
+    return value
+
+
+def hamming_distance(first: int, second: int) -> int:
+    return bin(first ^ second).count("1")
+
+
+class DevToolsFrameSource:
+    """
+    Frames of visible page rendered by browser, browser does the scaling and JPEG encoding
+    """
+
+    def __init__(self, devtools_factory: Callable[[], DevTools], variant_width: int = 480, variant_quality: int = 60) -> None:
+        self.devtools_factory = devtools_factory
+        self.variant_width = variant_width
+        self.variant_quality = variant_quality
+
+    def _capture(self, params: dict[str, Any], width: int | None = None) -> bytes:
+        """
+        Capture visible page
+        :param width: scale page down to this width in pixels
+        """
+        session = self.devtools_factory().connect()
+        try:
+            if width:
+                viewport = session.call("Page.getLayoutMetrics").get("cssVisualViewport", {})
+                page_width = float(viewport.get("clientWidth", 0)) or width
+                page_height = float(viewport.get("clientHeight", 0)) or width
+                params["clip"] = {"x": 0, "y": 0, "width": page_width, "height": page_height, "scale": min(width / page_width, 1.0)}
+            return base64.b64decode(session.call("Page.captureScreenshot", params)["data"])
+        finally:
+            session.close()
+
+    def thumbnail(self) -> GrayImage:
+        return decode_png(self._capture({"format": "png"}, THUMBNAIL_WIDTH))
+
+    def frame(self) -> tuple[bytes, bytes, str]:
+        png = self._capture({"format": "png"})
+        jpeg = self._capture({"format": "jpeg", "quality": self.variant_quality}, self.variant_width)
+        return png, jpeg, "image/jpeg"
+
+
+class X11FrameSource:
+    """
+    Frames of whole X screen read by xwd, variant is downscaled PNG as there is no JPEG encoder available
+    """
+
+    def __init__(self, variant_width: int = 480) -> None:
+        xwd_path = find_binary(["xwd"])
+        if not xwd_path:
+            msg = "Unable to find xwd binary"
+            raise ValueError(msg)
+        self.xwd_path = xwd_path
+        self.variant_width = variant_width
+        self._rows: list[bytes] = []
+        self._size = (0, 0)
+
+    @staticmethod
+    def parse_xwd(data: bytes) -> tuple[int, int, list[bytes]]:
+        """
+        Parse 24/32 bit TrueColor xwd dump
+        :return: width, height and RGB rows
+        """
+        header = struct.unpack_from(">25I", data)
+        header_size, width, height, byte_order = header[0], header[4], header[5], header[7]
+        bits_per_pixel, bytes_per_line, colormap_entries = header[11], header[12], header[19]
+        red_mask, green_mask, blue_mask = header[14:17]
+        if bits_per_pixel not in {24, 32}:
+            msg = f"Unsupported xwd pixel format ({bits_per_pixel} bits per pixel)"
+            raise ValueError(msg)
+
+        bytes_per_pixel = bits_per_pixel // 8
+        # Position of channel bytes in pixel, pixel is stored least significant byte first when byte_order is 0
+        shifts = [mask.bit_length() // 8 - 1 for mask in (red_mask, green_mask, blue_mask)]
+        offsets = [shift if byte_order == 0 else bytes_per_pixel - 1 - shift for shift in shifts]
+        start = header_size + colormap_entries * 12
+        rows = []
+        for y in range(height):
+            line = data[start + y * bytes_per_line:start + y * bytes_per_line + width * bytes_per_pixel]
+            rgb = bytearray(width * 3)
+            for channel, offset in enumerate(offsets):
+                rgb[channel::3] = line[offset::bytes_per_pixel]
+            rows.append(bytes(rgb))
+        return width, height, rows
+
+    def thumbnail(self) -> GrayImage:
+        dump = subprocess.run([self.xwd_path, "-root", "-silent"], capture_output=True, check=True, timeout=10).stdout  # noqa: S603
+        width, height, self._rows = self.parse_xwd(dump)
+        self._size = (width, height)
+        step = max(width // THUMBNAIL_WIDTH, 1)
+        pixels = bytearray()
+        thumbnail_height = 0
+        for row in self._rows[::step]:
+            thumbnail_height += 1
+            red, green, blue = row[0::3 * step], row[1::3 * step], row[2::3 * step]
+            pixels += bytes((r * 299 + g * 587 + b * 114) // 1000 for r, g, b in zip(red, green, blue))
+        return GrayImage(len(pixels) // thumbnail_height, thumbnail_height, bytes(pixels))
+
+    def frame(self) -> tuple[bytes, bytes, str]:
+        width, height = self._size
+        step = max(width // self.variant_width, 1)
+        variant_rows = [
+            b"".join(row[x * 3:x * 3 + 3] for x in range(0, width, step))
+            for row in self._rows[::step]
+        ]
+        variant_width = len(variant_rows[0]) // 3 if variant_rows else 0
+        return encode_png(width, height, self._rows), encode_png(variant_width, len(variant_rows), variant_rows), "image/png"
+
+
+class ScreenCapture:
+    """
+    Periodically captures the screen, new frame is kept only when perceptual hash changed more than threshold.
+
+    Capture interval is stretched so capturing never takes more than max_duty share of time,
+    keeping the browser free to render the page.
+    """
+
+    def __init__(
+        self,
+        source: DevToolsFrameSource | X11FrameSource,
+        interval: float = 10,
+        threshold: int = 5,
+        max_duty: float = 0.05,
+    ) -> None:
+        self.source = source
+        self.interval = interval
+        self.threshold = threshold
+        self.max_duty = max_duty
+        self.frame: Frame | None = None
+        self.cost = LatencyHistogram()
+        self.captures = 0
+        self.frames_kept = 0
+        self.bytes_saved = 0
+        self.last_cost = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def capture(self) -> bool:
+        """
+        Capture one frame
+        :return: True when new frame was kept
+        """
+        start = time.monotonic()
+        thumbnail = self.source.thumbnail()
+        frame_hash = difference_hash(thumbnail)
+        self.captures += 1
+        changed = self.frame is None or hamming_distance(self.frame.hash, frame_hash) > self.threshold
+        if changed:
+            png, variant, variant_type = self.source.frame()
+            with self._lock:
+                self.frame = Frame(png, variant, variant_type, frame_hash)
+            self.frames_kept += 1
+        elif self.frame:
+            # Full frame was not fetched nor stored
+            self.bytes_saved += len(self.frame.png)
+        self.last_cost = time.monotonic() - start
+        self.cost.observe(self.last_cost)
+        return changed
+
+    def next_interval(self) -> float:
+        return max(self.interval, self.last_cost / self.max_duty)
+
+    def get_frame(self) -> Frame | None:
+        with self._lock:
+            return self.frame
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "captures": self.captures,
+            "frames_kept": self.frames_kept,
+            "bytes_saved": self.bytes_saved,
+            "cost": self.cost.to_dict(),
+            "interval": self.next_interval(),
+        }
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.capture()
+            except (DevToolsError, TimeoutError, OSError, ValueError, subprocess.SubprocessError) as e:
+                log.info("Screen capture failed: %s", e)
+            self._stopped.wait(self.next_interval())
+
+    def stop(self) -> None:
+        self._stopped.set()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from chromium_kiosk.tools.ScreenCapture import ScreenCapture
+
+
+class ScreenCaptureServer:
+    """
+    Serves last kept frame over HTTP:
+    /screenshot.png full frame, /screenshot/small downscaled variant, /stats capture statistics.
+    Frames carry ETag, so clients polling unchanged screen get empty 304 response.
+    """
+
+    def __init__(self, capture: ScreenCapture, host: str = "127.0.0.1", port: int = 1793) -> None:
+        self.capture = capture
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ANN401
+                pass
+
+            def do_GET(self) -> None:
+                server.handle(self)
+
+        self.httpd = ThreadingHTTPServer((host, port), RequestHandler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.not_modified_bytes_saved = 0
+
+    def _send(self, request: BaseHTTPRequestHandler, status: int, content_type: str, body: bytes, etag: str | None = None) -> None:
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        request.send_header("Cache-Control", "no-cache")
+        if etag:
+            request.send_header("ETag", etag)
+        request.end_headers()
+        request.wfile.write(body)
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        path = request.path.split("?", 1)[0]
+        if path == "/stats":
+            stats = {**self.capture.stats(), "not_modified_bytes_saved": self.not_modified_bytes_saved}
+            self._send(request, 200, "application/json", json.dumps(stats).encode())
+            return
+
+        frame = self.capture.get_frame()
+        if path not in {"/screenshot.png", "/screenshot/small"} or not frame:
+            self._send(request, 404, "text/plain", b"Not found")
+            return
+
+        small = path == "/screenshot/small"
+        body, content_type = (frame.variant, frame.variant_type) if small else (frame.png, "image/png")
+        etag = '"{:016x}{}"'.format(frame.hash, "s" if small else "")
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified_bytes_saved += len(body)
+            request.send_response(304)
+            request.send_header("ETag", etag)
+            request.end_headers()
+            return
+        self._send(request, 200, content_type, body, etag)
+
+    def start(self) -> None:
+        threading.Thread(target=self.httpd.serve_forever, name="screen_capture_server", daemon=True).start()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
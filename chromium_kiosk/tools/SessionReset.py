@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import json
+import logging
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from chromium_kiosk.tools.DevTools import DevToolsError
+from chromium_kiosk.tools.LatencyHistogram import LatencyHistogram
+
+if TYPE_CHECKING:
+    from chromium_kiosk.tools.DevTools import DevTools, DevToolsSession
+
+log = logging.getLogger(__name__)
+
+# Everything a site can store on the device except HTTP cache, so static assets stay warm for the next user
+STORAGE_TYPES = "local_storage,indexeddb,websql,service_workers,cache_storage,file_systems,shared_storage,storage_buckets"
+
+
+@dataclasses.dataclass
+class SessionResetResult:
+    duration: float  # Seconds until state was cleared and home page committed
+    load: float | None  # Seconds until home page finished loading, None when it did not load in time
+    origins: list[str]
+
+
+def get_origin(url: str) -> str | None:
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme not in {"http", "https"} or not parsed.netloc:
+        return None
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class SessionReset:
+    """
+    Clears state left by previous user of the kiosk over DevTools, without restarting the browser.
+
+    Cookies, site storage, service workers, session storage and navigation history are cleared,
+    HTTP cache is kept. Reset is triggered by user idle time or on demand.
+    """
+
+    def __init__(
+        self,
+        devtools_factory: Callable[[], DevTools],
+        home_page: str,
+        timeout: float = 5,
+        load_timeout: float = 10,
+        metrics_path: Path | None = None,
+    ) -> None:
+        self.devtools_factory = devtools_factory
+        self.home_page = home_page
+        self.timeout = timeout
+        self.load_timeout = load_timeout
+        self.metrics_path = metrics_path
+        self.latency = LatencyHistogram()
+        self.resets = 0
+        self.failures = 0
+        self.last_result: SessionResetResult | None = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def get_metrics_path() -> Path:
+        return Path.home().joinpath(".chromium-kiosk-session-reset.json")
+
+    @staticmethod
+    def read_metrics(path: Path | None = None) -> dict[str, Any]:
+        try:
+            metrics = json.loads((path or SessionReset.get_metrics_path()).read_text(encoding="UTF-8"))
+        except (OSError, ValueError):
+            return {}
+        return metrics if isinstance(metrics, dict) else {}
+
+    def _visited_origins(self, session: DevToolsSession) -> list[str]:
+        urls = [self.home_page]
+        history = session.call("Page.getNavigationHistory")
+        urls.extend(entry.get("url", "") for entry in history.get("entries", []))
+        frames = [session.call("Page.getFrameTree").get("frameTree", {})]
+        while frames:
+            frame_tree = frames.pop()
+            urls.append(frame_tree.get("frame", {}).get("url", ""))
+            frames.extend(frame_tree.get("childFrames", []))
+        return sorted({origin for origin in map(get_origin, urls) if origin})
+
+    def reset(self) -> SessionResetResult:
+        start = time.monotonic()
+        session = self.devtools_factory().connect(timeout=self.timeout)
+        try:
+            origins = self._visited_origins(session)
+            session.call("Network.clearBrowserCookies")
+            for origin in origins:
+                session.call("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": STORAGE_TYPES})
+            with contextlib.suppress(DevToolsError):
+                # Session storage belongs to the tab, not to the origin storage
+                session.call("DOMStorage.enable")
+                for origin in origins:
+                    session.call("DOMStorage.clear", {"storageId": {"securityOrigin": origin, "isLocalStorage": False}})
+            session.call("Page.enable")
+            session.call("Page.navigate", {"url": self.home_page})
+            session.call("Page.resetNavigationHistory")
+            duration = time.monotonic() - start
+            try:
+                session.wait_event("Page.loadEventFired", timeout=self.load_timeout)
+                load: float | None = time.monotonic() - start
+            except TimeoutError:
+                load = None
+        finally:
+            session.close()
+
+        return SessionResetResult(duration, load, origins)
+
+    def trigger(self) -> SessionResetResult | None:
+        """
+        Reset session, record its latency and store metrics
+        :return: None when reset failed
+        """
+        try:
+            result = self.reset()
+        except (DevToolsError, TimeoutError):
+            log.warning("Session reset failed", exc_info=True)
+            self.failures += 1
+            self.write_metrics()
+            return None
+
+        self.resets += 1
+        self.last_result = result
+        self.latency.observe(result.duration)
+        log.info("Session reset in %.3f seconds, cleared %d origins", result.duration, len(result.origins))
+        self.write_metrics()
+        return result
+
+    def write_metrics(self) -> None:
+        metrics_path = self.metrics_path or self.get_metrics_path()
+        tmp_path = metrics_path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(json.dumps({
+                "latency": self.latency.to_dict(),
+                "resets": self.resets,
+                "failures": self.failures,
+                "last": dataclasses.asdict(self.last_result) if self.last_result else None,
+            }), encoding="UTF-8")
+            tmp_path.replace(metrics_path)
+        except OSError:
+            log.warning("Failed to write session reset metrics to %s", metrics_path, exc_info=True)
+
+    def run(self, idle_resolver: Callable[[], float | None], idle_time: float, poll_interval: float = 1) -> None:
+        """
+        Reset session when user is idle for idle_time seconds
+        """
+        # Kiosk nobody touched since last reset is not reset again
+        armed = False
+        while not self._stopped.wait(poll_interval):
+            idle = idle_resolver()
+            if idle is None:
+                continue
+            if idle < idle_time:
+                armed = True
+            elif armed:
+                armed = False
+                self.trigger()
+
+    def stop(self) -> None:
+        self._stopped.set()
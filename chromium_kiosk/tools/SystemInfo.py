@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from websocket import create_connection
+
+from chromium_kiosk.Qiosk import Qiosk
+from chromium_kiosk.tools import find_binary
+from chromium_kiosk.tools.Heartbeat import Heartbeat
+from chromium_kiosk.tools.PerformanceProfile import CHROMIUM_FLAGS_ENV, resolve_tuning
+from chromium_kiosk.tools.ProcessTree import ProcessTree
+from chromium_kiosk.tools.SessionReset import SessionReset
+
+if TYPE_CHECKING:
+    from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+    from chromium_kiosk.tools.TouchDevice import TouchDevice
+    from chromium_kiosk.tools.WindowSystem import WindowSystem
+
+
+@dataclasses.dataclass
+class Probe:
+    name: str
+    label: str
+    resolver: Callable[..., Any]
+    depends_on: tuple[str, ...] = ()
+    timeout: float | None = None
+
+
+@dataclasses.dataclass
+class ProbeResult:
+    value: Any = None
+    duration: float = 0.0
+    error: str | None = None
+
+
+def read_meminfo(path: Path = Path("/proc/meminfo")) -> dict[str, int]:
+    """
+    Read /proc/meminfo
+    :return: dict of values in bytes
+    """
+    meminfo = {}
+    with path.open(encoding="UTF-8") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            parts = value.split()
+            if parts:
+                meminfo[key] = int(parts[0]) * (1024 if len(parts) > 1 else 1)
+    return meminfo
+
+
+def directory_size(path: Path) -> int:
+    total = 0
+    stack = [str(path)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+class SystemInfo:
+    """
+    Collects diagnostic information, every probe runs in its own thread so one hanging tool
+    can not delay the others, probes that do not finish in time are reported as timed out.
+    """
+
+    def __init__(self, window_system: WindowSystem, config: ConfigSnapshot, timeout: float = 0.8) -> None:
+        self.window_system = window_system
+        self.config = config
+        self.timeout = timeout
+        self.probes: list[Probe] = [
+            Probe("window_system", "Window system", lambda: type(self.window_system).__name__),
+            Probe("display", "Display", self.window_system.detect_display),
+            Probe("touchscreen_device", "Touchscreen device", self._touchscreen_device),
+            Probe("primary_screen", "Primary screen", self.window_system.detect_primary_screen),
+            Probe("screen_rotation", "Screen rotation", self._screen_rotation, depends_on=("primary_screen",)),
+            Probe("touchscreen_rotation", "Touchscreen rotation", self._touchscreen_rotation, depends_on=("touchscreen_device",)),
+            Probe("browser_version", "Browser version", self._browser_version, timeout=0.5),
+            Probe("gpu", "GPU", self._gpu),
+            Probe("memory", "Memory", self._memory),
+            Probe("storage", "Storage", self._storage),
+            Probe("profile_size", "Profile size", self._profile_size),
+            Probe("qiosk_reachable", "Qiosk reachable", self._qiosk_reachable, timeout=0.5),
+            Probe("standby", "Standby instance", self._standby),
+            Probe("heartbeat", "Heartbeat", self._heartbeat),
+            Probe("performance_profile", "Performance profile", self._performance_profile),
+            Probe("session_reset", "Session reset", self._session_reset),
+        ]
+        self._touchscreen_devices: dict[str, TouchDevice] = {}
+
+    def _touchscreen_device(self) -> dict[str, str] | None:
+        touchscreen_device = self.window_system.find_touchscreen_device(self.config.TOUCHSCREEN)
+        if not touchscreen_device:
+            return None
+        self._touchscreen_devices[touchscreen_device.identifier] = touchscreen_device
+        return dataclasses.asdict(touchscreen_device)
+
+    def _screen_rotation(self, primary_screen: str | None) -> str | None:
+        return self.window_system.get_screen_rotation(primary_screen).value if primary_screen else None
+
+    def _touchscreen_rotation(self, touchscreen_device: dict[str, str] | None) -> str | None:
+        if not touchscreen_device:
+            return None
+        return self.window_system.get_touchscreen_rotation(self._touchscreen_devices[touchscreen_device["identifier"]]).value
+
+    def _browser_version(self) -> str | None:
+        binary_path = find_binary(["qiosk"])
+        if not binary_path:
+            return None
+        output = subprocess.check_output([binary_path, "--version"], timeout=self.timeout, stderr=subprocess.STDOUT)  # noqa: S603
+        return output.decode("UTF-8", "replace").strip()
+
+    def _gpu(self) -> dict[str, Any]:
+        drivers = set()
+        for uevent in Path("/sys/class/drm").glob("card*/device/uevent"):
+            with contextlib.suppress(OSError):
+                driver = re.search(r"^DRIVER=(.+)$", uevent.read_text(), re.MULTILINE)
+                if driver:
+                    drivers.add(driver.group(1))
+
+        renderer = None
+        binary_path = find_binary(["glxinfo"])
+        if binary_path:
+            output = subprocess.check_output([binary_path, "-B"], timeout=self.timeout, stderr=subprocess.DEVNULL)  # noqa: S603
+            renderer_found = re.search(rb"^OpenGL renderer string:\s*(.+)$", output, re.MULTILINE)
+            if renderer_found:
+                renderer = renderer_found.group(1).decode("UTF-8", "replace").strip()
+
+        return {"drivers": sorted(drivers), "renderer": renderer}
+
+    def _memory(self) -> dict[str, int | None]:
+        meminfo = read_meminfo()
+        return {
+            "total": meminfo.get("MemTotal"),
+            "available": meminfo.get("MemAvailable"),
+            "swap_total": meminfo.get("SwapTotal"),
+            "swap_free": meminfo.get("SwapFree"),
+        }
+
+    def _storage(self) -> dict[str, dict[str, int]]:
+        storage = {}
+        for path in {"/", str(Path.home())}:
+            usage = shutil.disk_usage(path)
+            storage[path] = {"total": usage.total, "used": usage.used, "free": usage.free}
+        return storage
+
+    def _profile_size(self) -> dict[str, Any]:
+        data_home = Path(os.getenv("XDG_DATA_HOME") or Path.home().joinpath(".local", "share"))
+        for profile_path in data_home.glob(f"*qiosk*/QtWebEngine/{self.config.PROFILE_NAME}"):
+            if profile_path.is_dir():
+                return {"path": str(profile_path), "size": directory_size(profile_path)}
+
+        # Off the record profile (default) is not stored on disk
+        return {"path": None, "size": 0}
+
+    def _qiosk_reachable(self) -> dict[str, Any]:
+        start = time.monotonic()
+        try:
+            ws = create_connection(Qiosk.get_control_url(), timeout=0.5)
+        except (OSError, ValueError) as e:
+            return {"reachable": False, "error": str(e)}
+        ws.close()
+        return {"reachable": True, "latency": time.monotonic() - start}
+
+    def _standby(self) -> dict[str, Any] | None:
+        standby_pid = Qiosk.read_instance_state().get("standby_pid")
+        if not standby_pid or not Path("/proc", str(standby_pid)).is_dir():
+            return None
+        return {"pid": standby_pid, "memory": ProcessTree(standby_pid).pss()}
+
+    def _heartbeat(self) -> dict[str, Any] | None:
+        return Heartbeat.read_metrics() or None
+
+    def _session_reset(self) -> dict[str, Any] | None:
+        return SessionReset.read_metrics() or None
+
+    def _performance_profile(self) -> dict[str, Any]:
+        chromium_flags, env = resolve_tuning(self.config.PERFORMANCE_PROFILE, self.config.EXTRA_ARGUMENTS, self.config.EXTRA_ENV_VARS)
+        # Flags of running browser differ from configured ones until it is restarted
+        running_flags = None
+        pid = Qiosk.read_instance_state().get("pid")
+        if pid:
+            with contextlib.suppress(OSError):
+                environ = Path("/proc", str(pid), "environ").read_bytes().decode("UTF-8", "replace")
+                running_flags = next((item.partition("=")[2].split() for item in environ.split("\0") if item.startswith(f"{CHROMIUM_FLAGS_ENV}=")), [])
+        return {
+            "profile": self.config.PERFORMANCE_PROFILE,
+            "flags": chromium_flags.split() if chromium_flags else [],
+            "env": env,
+            "running_flags": running_flags,
+        }
+
+    def _run_probe(self, probe: Probe, future: Future[Any], dependencies: list[Future[Any]], deadline: float, finished_at: dict[str, float]) -> None:
+        try:
+            arguments = [dependency.result(timeout=max(0.0, deadline - time.monotonic())) for dependency in dependencies]
+            value = probe.resolver(*arguments)
+        except BaseException as e:  # noqa: BLE001
+            finished_at[probe.name] = time.monotonic()
+            future.set_exception(e)
+        else:
+            finished_at[probe.name] = time.monotonic()
+            future.set_result(value)
+
+    def collect(self) -> dict[str, ProbeResult]:
+        start = time.monotonic()
+        futures: dict[str, Future[Any]] = {probe.name: Future() for probe in self.probes}
+        deadlines = {probe.name: start + min(self.timeout, probe.timeout or self.timeout) for probe in self.probes}
+        finished_at: dict[str, float] = {}
+        for probe in self.probes:
+            threading.Thread(
+                target=self._run_probe,
+                args=(probe, futures[probe.name], [futures[name] for name in probe.depends_on], deadlines[probe.name], finished_at),
+                name=f"system_info_{probe.name}",
+                daemon=True,  # Hanging probe must not block the exit
+            ).start()
+
+        results = {}
+        for probe in self.probes:
+            try:
+                value = futures[probe.name].result(timeout=max(0.0, deadlines[probe.name] - time.monotonic()))
+                results[probe.name] = ProbeResult(value=value, duration=finished_at[probe.name] - start)
+            except (FutureTimeoutError, TimeoutError):  # noqa: PERF203
+                results[probe.name] = ProbeResult(duration=time.monotonic() - start, error="timeout")
+            except Exception as e:  # noqa: BLE001
+                results[probe.name] = ProbeResult(duration=finished_at[probe.name] - start, error=f"{type(e).__name__}: {e}")
+
+        return results
+
+    def labels(self) -> dict[str, str]:
+        return {probe.name: probe.label for probe in self.probes}
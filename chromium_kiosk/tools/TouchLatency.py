@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import base64
+import bisect
+import contextlib
+import dataclasses
+import fcntl
+import json
+import logging
+import os
+import select
+import struct
+import time
+from typing import TYPE_CHECKING, Any
+
+from chromium_kiosk.tools.DevTools import DevToolsError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from typing_extensions import Self
+
+    from chromium_kiosk.tools.DevTools import DevTools, DevToolsSession
+
+log = logging.getLogger(__name__)
+
+# struct input_event from linux/input.h, struct timeval uses native long
+INPUT_EVENT = struct.Struct("llHHi")
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0
+BTN_TOUCH = 0x14A
+ABS_MT_TRACKING_ID = 0x39
+# _IOW('E', 0xa0, int), makes kernel timestamp events by CLOCK_MONOTONIC which Chromium trace uses too
+EVIOCSCLOCKID = 0x400445A0
+CLOCK_MONOTONIC = 1
+
+# Trace events marking dispatch of touch to page and frame presentation
+INPUT_EVENT_TYPES = frozenset({"touchstart", "pointerdown", "mousedown"})
+FRAME_EVENT_NAMES = frozenset({"Display::FrameDisplayed", "DrawFrame"})
+TRACE_CATEGORIES = "devtools.timeline,disabled-by-default-devtools.timeline.frame,viz,benchmark,input"
+# Touch with no paint in this time is not considered related to any frame
+MAX_LATENCY = 0.5
+
+TEST_PAGE = """<!DOCTYPE html>
+<html>
+<head><meta name="viewport" content="width=device-width"><title>Touch latency</title></head>
+<body style="margin:0;height:100vh;background:#000;touch-action:none">
+<script>
+let flip = false;
+function paint(event) {
+    event.preventDefault();
+    flip = !flip;
+    document.body.style.background = flip ? "#fff" : "#000";
+}
+document.addEventListener("touchstart", paint, {passive: false});
+document.addEventListener("mousedown", paint);
+</script>
+</body>
+</html>
+"""
+
+
+@dataclasses.dataclass
+class TouchLatencySample:
+    touch: float  # Kernel timestamp of touch down, seconds of CLOCK_MONOTONIC
+    dispatch: float | None  # Touch dispatched to page
+    frame: float | None  # First frame presented after dispatch
+
+    @property
+    def input_latency(self) -> float | None:
+        """
+        Digitizer driver, X server and browser input path, including transformation matrix
+        """
+        return self.dispatch - self.touch if self.dispatch is not None else None
+
+    @property
+    def render_latency(self) -> float | None:
+        return self.frame - self.dispatch if self.frame is not None and self.dispatch is not None else None
+
+    @property
+    def total_latency(self) -> float | None:
+        return self.frame - self.touch if self.frame is not None else None
+
+
+def parse_touch_downs(chunks: Iterable[bytes], event_struct: struct.Struct = INPUT_EVENT, clock_offset: float = 0.0) -> Iterator[float]:
+    """
+    Find touch downs in raw evdev stream
+    :param chunks: raw data read from event device, chunks do not need to be aligned to events
+    :param clock_offset: subtracted from timestamps, to convert CLOCK_REALTIME to CLOCK_MONOTONIC
+    :return: timestamps of frames (SYN_REPORT) containing new touch
+    """
+    buffer = b""
+    touched = False
+    for chunk in chunks:
+        buffer += chunk
+        usable = len(buffer) - len(buffer) % event_struct.size
+        for seconds, microseconds, event_type, code, value in event_struct.iter_unpack(buffer[:usable]):
+            if (event_type == EV_KEY and code == BTN_TOUCH and value == 1) or (event_type == EV_ABS and code == ABS_MT_TRACKING_ID and value != -1):
+                touched = True
+            elif event_type == EV_SYN and code == SYN_REPORT and touched:
+                touched = False
+                yield seconds + microseconds / 1000000 - clock_offset
+        buffer = buffer[usable:]
+
+
+def parse_trace(trace_events: Iterable[dict[str, Any]]) -> tuple[list[float], list[float]]:
+    """
+    Find touch dispatches and frame presentations in Chromium trace
+    :return: sorted timestamps in seconds of dispatches and frames
+    """
+    dispatches = []
+    frames = []
+    for event in trace_events:
+        if "ts" not in event:
+            continue
+        timestamp = float(event["ts"]) / 1000000
+        name = event.get("name")
+        if name == "EventDispatch" and event.get("args", {}).get("data", {}).get("type") in INPUT_EVENT_TYPES:
+            dispatches.append(timestamp)
+        elif name in FRAME_EVENT_NAMES:
+            frames.append(timestamp)
+    return sorted(dispatches), sorted(frames)
+
+
+def _first_after(timestamps: list[float], after: float, limit: float) -> float | None:
+    index = bisect.bisect_left(timestamps, after)
+    if index < len(timestamps) and timestamps[index] <= limit:
+        return timestamps[index]
+    return None
+
+
+def correlate(touches: Iterable[float], dispatches: list[float], frames: list[float], max_latency: float = MAX_LATENCY) -> list[TouchLatencySample]:
+    samples = []
+    for touch in sorted(touches):
+        dispatch = _first_after(dispatches, touch, touch + max_latency)
+        frame = _first_after(frames, dispatch if dispatch is not None else touch, touch + max_latency)
+        samples.append(TouchLatencySample(touch, dispatch, frame))
+    return samples
+
+
+def percentiles(values: Iterable[float | None], points: tuple[int, ...] = (50, 90, 99)) -> dict[str, float | None]:
+    ordered = sorted(value for value in values if value is not None)
+    if not ordered:
+        return {f"p{point}": None for point in points}
+    return {f"p{point}": ordered[min(len(ordered) - 1, len(ordered) * point // 100)] for point in points}
+
+
+def summarize(samples: list[TouchLatencySample]) -> dict[str, Any]:
+    return {
+        "touches": len(samples),
+        "painted": sum(1 for sample in samples if sample.frame is not None),
+        "input": percentiles(sample.input_latency for sample in samples),
+        "render": percentiles(sample.render_latency for sample in samples),
+        "total": percentiles(sample.total_latency for sample in samples),
+    }
+
+
+class EventDevice:
+    """
+    Kernel event device (/dev/input/eventN) opened for reading
+    """
+
+    def __init__(self, device_node: str) -> None:
+        self.fd = os.open(device_node, os.O_RDONLY | os.O_NONBLOCK)
+        # Offset to subtract from timestamps, zero when kernel timestamps events by CLOCK_MONOTONIC
+        self.clock_offset = 0.0
+        try:
+            # Clock is set per open descriptor
+            fcntl.ioctl(self.fd, EVIOCSCLOCKID, struct.pack("i", CLOCK_MONOTONIC))
+        except OSError:
+            self.clock_offset = time.time() - time.monotonic()
+
+    def read(self, duration: float) -> Iterator[bytes]:
+        """
+        Read raw events for given time
+        """
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            readable, _, _ = select.select([self.fd], [], [], min(0.2, max(0.0, deadline - time.monotonic())))
+            if readable:
+                with contextlib.suppress(BlockingIOError):
+                    yield os.read(self.fd, INPUT_EVENT.size * 64)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_args: object) -> None:
+        self.close()
+
+
+class TouchLatencyProbe:
+    """
+    Shows test page reacting to touch, records touches on event device and browser trace meanwhile
+    and correlates them to input-to-paint latency
+    """
+
+    def __init__(self, devtools: DevTools, device_node: str, duration: float = 30) -> None:
+        self.devtools = devtools
+        self.device_node = device_node
+        self.duration = duration
+
+    def _read_trace(self, session: DevToolsSession) -> list[dict[str, Any]]:
+        stream = session.wait_event("Tracing.tracingComplete", timeout=30).get("stream")
+        if not stream:
+            return []
+        data = []
+        while True:
+            chunk = session.call("IO.read", {"handle": stream, "size": 1048576})
+            data.append(base64.b64decode(chunk["data"]) if chunk.get("base64Encoded") else chunk.get("data", "").encode())
+            if chunk.get("eof"):
+                break
+        session.call("IO.close", {"handle": stream})
+        trace = json.loads(b"".join(data) or b"[]")
+        return list(trace.get("traceEvents", []) if isinstance(trace, dict) else trace)
+
+    def run(self) -> list[TouchLatencySample]:
+        targets = self.devtools.list_targets()
+        original_url = targets[0].get("url") if targets else None
+        session = self.devtools.connect(targets[0] if targets else None)
+        try:
+            session.call("Page.navigate", {"url": "data:text/html;base64," + base64.b64encode(TEST_PAGE.encode()).decode()})
+            session.call("Tracing.start", {"categories": TRACE_CATEGORIES, "transferMode": "ReturnAsStream"})
+            log.warning("Touch the screen repeatedly for %d seconds", self.duration)
+            with EventDevice(self.device_node) as device:
+                touches = list(parse_touch_downs(device.read(self.duration), clock_offset=device.clock_offset))
+            session.call("Tracing.end")
+            dispatches, frames = parse_trace(self._read_trace(session))
+        finally:
+            if original_url:
+                with contextlib.suppress(DevToolsError, TimeoutError):
+                    session.call("Page.navigate", {"url": original_url})
+            session.close()
+        return correlate(touches, dispatches, frames)
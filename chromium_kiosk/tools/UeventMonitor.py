@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+import select
+import socket
+import struct
+import time
+from typing import TYPE_CHECKING, Callable
+
+from chromium_kiosk.enum.HotplugDeviceEnum import HotplugDeviceEnum
+
+if TYPE_CHECKING:
+    from chromium_kiosk.tools.WindowSystem import WindowSystem
+
+log = logging.getLogger(__name__)
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_GROUP_KERNEL = 1
+UEVENT_GROUP_UDEV = 2
+UEVENT_BUFFER_SIZE = 16384
+
+KERNEL_HEADER_SEPARATOR = b"@"
+UDEV_MONITOR_PREFIX = b"libudev\x00"
+UDEV_MONITOR_MAGIC = 0xFEEDCAFE
+UDEV_MONITOR_HEADER = struct.Struct("=8sIIII")  # prefix, magic (big endian), header_size, properties_off, properties_len
+
+INPUT_ACTIONS = frozenset({"add", "change", "bind"})
+
+
+@dataclasses.dataclass
+class Uevent:
+    action: str
+    devpath: str
+    subsystem: str
+    properties: dict[str, str]
+
+
+def parse_uevent(data: bytes) -> Uevent | None:
+    """
+    Parse single netlink datagram, both raw kernel and libudev formats are supported
+    :param data: datagram as received from netlink socket
+    :return: parsed event or None when datagram is not a uevent
+    """
+    if data.startswith(UDEV_MONITOR_PREFIX):
+        if len(data) < UDEV_MONITOR_HEADER.size:
+            return None
+        _, magic, _, properties_off, properties_len = UDEV_MONITOR_HEADER.unpack_from(data)
+        if socket.ntohl(magic) != UDEV_MONITOR_MAGIC:
+            return None
+        raw_properties = data[properties_off:properties_off + properties_len].split(b"\x00")
+    else:
+        # Kernel format is "action@devpath\0KEY=VALUE\0..."
+        header, _, rest = data.partition(b"\x00")
+        if KERNEL_HEADER_SEPARATOR not in header:
+            return None
+        raw_properties = rest.split(b"\x00")
+
+    properties = {}
+    for raw_property in raw_properties:
+        key, separator, value = raw_property.partition(b"=")
+        if separator:
+            properties[key.decode("UTF-8", "replace")] = value.decode("UTF-8", "replace")
+
+    return Uevent(
+        action=properties.get("ACTION", ""),
+        devpath=properties.get("DEVPATH", ""),
+        subsystem=properties.get("SUBSYSTEM", ""),
+        properties=properties,
+    )
+
+
+class UeventMonitor:
+    """
+    Listens on kernel uevent netlink socket and reports hotplugged screens and touchscreens.
+
+    Socket is only read when kernel has something to say, there is no polling. Bursts of events
+    (USB reset emits dozens of them) are debounced into single callback call.
+    """
+
+    def __init__(
+        self,
+        window_system: WindowSystem,
+        callback: Callable[[frozenset[HotplugDeviceEnum]], None],
+        force_touchscreen_name: str | None = None,
+        debounce: float = 0.5,
+        sock: socket.socket | None = None,
+    ) -> None:
+        self.window_system = window_system
+        self.callback = callback
+        self.force_touchscreen_name = force_touchscreen_name
+        self.debounce = debounce
+        self.sock = sock or self._open_socket()
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        self._stopped = False
+
+    def _open_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_KOBJECT_UEVENT)
+        # Listen for udev events, those are sent after udev rules are processed so X server already knows about the device
+        sock.bind((0, UEVENT_GROUP_UDEV))
+        return sock
+
+    def classify(self, event: Uevent) -> HotplugDeviceEnum | None:
+        if event.subsystem == "drm":
+            return HotplugDeviceEnum.SCREEN if event.properties.get("HOTPLUG") == "1" else None
+
+        if event.subsystem == "input" and event.action in INPUT_ACTIONS:
+            if event.properties.get("ID_INPUT_TOUCHSCREEN") == "1":
+                return HotplugDeviceEnum.TOUCHSCREEN
+
+            name = event.properties.get("NAME")
+            if name and self.window_system.is_touchscreen_name(name.strip('"'), self.force_touchscreen_name):
+                return HotplugDeviceEnum.TOUCHSCREEN
+
+        return None
+
+    def _dispatch(self, devices: set[HotplugDeviceEnum]) -> None:
+        log.debug("Hotplug of %s detected", ", ".join(sorted(device.value for device in devices)))
+        try:
+            self.callback(frozenset(devices))
+        except Exception:
+            log.exception("Failed to handle hotplug event")
+
+    def run(self) -> None:
+        pending: set[HotplugDeviceEnum] = set()
+        deadline: float | None = None
+        burst_deadline: float | None = None
+        while not self._stopped:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self.sock.fileno(), self._wakeup_read], [], [], timeout)
+            if self._wakeup_read in readable:
+                break
+
+            if self.sock.fileno() in readable:
+                event = parse_uevent(self.sock.recv(UEVENT_BUFFER_SIZE))
+                device = self.classify(event) if event else None
+                if device:
+                    now = time.monotonic()
+                    pending.add(device)
+                    if burst_deadline is None:
+                        # Never postpone reconfiguration for more than few debounce windows, even when device keeps flapping
+                        burst_deadline = now + self.debounce * 4
+                    deadline = min(now + self.debounce, burst_deadline)
+
+            if deadline is not None and time.monotonic() >= deadline:
+                self._dispatch(pending)
+                pending = set()
+                deadline = None
+                burst_deadline = None
+
+    def stop(self) -> None:
+        self._stopped = True
+        os.write(self._wakeup_write, b"\x00")
+
+    def close(self) -> None:
+        self.sock.close()
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
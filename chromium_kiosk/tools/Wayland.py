@@ -20,6 +20,10 @@ class Wayland(WindowSystem):
     def detect_primary_screen(self) -> str | None:
         return None
 
+    def get_touchscreen_device_node(self, touch_device: TouchDevice) -> str | None:
+        _ = touch_device
+        return None
+
     def get_screen_rotation(self, screen: str) -> RotationEnum:
         _ = screen
         return RotationEnum.NORMAL
@@ -43,3 +47,11 @@ class Wayland(WindowSystem):
         _ = rotation
         _ = screen
         return True
+
+    def disable_screen_blanking(self) -> bool:
+        # Blanking is managed by compositor
+        return True
+
+    def get_idle_time(self) -> float | None:
+        # Compositor does not expose idle time to clients
+        return None
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, ClassVar
 
 if TYPE_CHECKING:
     from chromium_kiosk.enum.RotationEnum import RotationEnum
@@ -8,6 +8,15 @@ if TYPE_CHECKING:
 
 
 class WindowSystem:
+    touchscreen_name_matches: ClassVar[tuple[str, ...]] = ("touchscreen", "touchcontroller", "multi-touch", "multitouch", "raspberrypi-ts", "touch")
+
+    def is_touchscreen_name(self, name: str, force_device_name: str | None = None) -> bool:
+        if force_device_name and force_device_name == name:
+            return True
+
+        lower_name = name.lower()
+        return any(match in lower_name for match in self.touchscreen_name_matches)
+
     def detect_display(self) -> str | None:
         raise NotImplementedError
 
@@ -17,6 +26,9 @@ class WindowSystem:
     def detect_primary_screen(self) -> str | None:
         raise NotImplementedError
 
+    def get_touchscreen_device_node(self, touch_device: TouchDevice) -> str | None:
+        raise NotImplementedError
+
     def get_screen_rotation(self, screen: str) -> RotationEnum:
         raise NotImplementedError
 
@@ -32,4 +44,8 @@ class WindowSystem:
     def rotate_screen(self, rotation: RotationEnum, screen: str | None = None) -> bool:
         raise NotImplementedError
 
+    def disable_screen_blanking(self) -> bool:
+        raise NotImplementedError
 
+    def get_idle_time(self) -> float | None:
+        raise NotImplementedError
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import ctypes
+import ctypes.util
 import os
 import re
 import subprocess
@@ -14,6 +16,17 @@ if TYPE_CHECKING:
     from collections.abc import Generator
 
 
+class XScreenSaverInfo(ctypes.Structure):
+    _fields_ = (
+        ("window", ctypes.c_ulong),
+        ("state", ctypes.c_int),
+        ("kind", ctypes.c_int),
+        ("til_or_since", ctypes.c_ulong),
+        ("idle", ctypes.c_ulong),
+        ("event_mask", ctypes.c_ulong),
+    )
+
+
 class X11(WindowSystem):
     rotation_to_xinput_coordinate: dict[RotationEnum, str]
 
@@ -24,6 +37,8 @@ class X11(WindowSystem):
             RotationEnum.NORMAL: "1 0 0 0 1 0 0 0 1",
             RotationEnum.INVERTED: "-1 0 1 0 -1 1 0 0 1",
         }
+        # Xlib, Xss, display and info structure kept open for idle time polling
+        self._idle_query: tuple[ctypes.CDLL, ctypes.CDLL, int, ctypes.Array[XScreenSaverInfo]] | None = None
 
         self._check_display_env()
 
@@ -75,16 +90,10 @@ class X11(WindowSystem):
     def find_touchscreen_device(self, force_device_name: str | None = None) -> TouchDevice | None:
         xinput_devices = self._get_xinput_devices()
 
-        match_list = ["touchscreen", "touchcontroller", "multi-touch", "multitouch", "raspberrypi-ts", "touch"]
         for xinput_device in xinput_devices:
-
-            if force_device_name and force_device_name == xinput_device.name:
+            if self.is_touchscreen_name(xinput_device.name, force_device_name):
                 return xinput_device
 
-            for match in match_list:
-                if match in xinput_device.name.lower():
-                    return xinput_device
-
         return None
 
     def detect_primary_screen(self) -> str | None:
@@ -130,6 +139,20 @@ class X11(WindowSystem):
 
         return RotationEnum.NORMAL
 
+    def get_touchscreen_device_node(self, touch_device: TouchDevice) -> str | None:
+        binary_path = find_binary(["xinput"])
+        if not binary_path:
+            msg = "xinput binary was not found"
+            raise FileNotFoundError(msg)
+
+        lines = subprocess.check_output([binary_path, "list-props", touch_device.identifier]).splitlines()
+        for line in lines:
+            result = re.match(r'^\s+Device\s+Node\s+\(\d+\):\s+"(.+)"$', line.decode("UTF-8"))
+            if result:
+                return result.group(1)
+
+        return None
+
     def rotate_display(
         self,
         rotation: RotationEnum,
@@ -138,6 +161,52 @@ class X11(WindowSystem):
     ) -> bool:
         return self.rotate_screen(rotation, screen) and self.rotate_touchscreen(rotation, force_touchscreen_name)
 
+    def _get_idle_time_xss(self) -> float | None:
+        """
+        Same as xprintidle without spawning it on every poll
+        """
+        if not self._idle_query:
+            xlib_path = ctypes.util.find_library("X11")
+            xss_path = ctypes.util.find_library("Xss")
+            if not xlib_path or not xss_path:
+                return None
+
+            xlib = ctypes.cdll.LoadLibrary(xlib_path)
+            xss = ctypes.cdll.LoadLibrary(xss_path)
+            xlib.XOpenDisplay.restype = ctypes.c_void_p
+            xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+            xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+            xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+            xss.XScreenSaverQueryInfo.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XScreenSaverInfo)]
+            display = xlib.XOpenDisplay(None)
+            if not display:
+                return None
+            self._idle_query = (xlib, xss, display, (XScreenSaverInfo * 1)())
+
+        xlib, xss, display, info = self._idle_query
+        if not xss.XScreenSaverQueryInfo(display, xlib.XDefaultRootWindow(display), info):
+            return None
+        return float(info[0].idle) / 1000
+
+    def get_idle_time(self) -> float | None:
+        """
+        Seconds since last input of user
+        """
+        try:
+            idle_time = self._get_idle_time_xss()
+        except (OSError, AttributeError):
+            idle_time = None
+        if idle_time is not None:
+            return idle_time
+
+        binary_path = find_binary(["xprintidle"])
+        if not binary_path:
+            return None
+        try:
+            return int(subprocess.check_output([binary_path], timeout=2)) / 1000
+        except (subprocess.SubprocessError, ValueError):
+            return None
+
     def rotate_touchscreen(self, rotation: RotationEnum, force_device_name: str | None = None) -> bool:
         touch_device = self.find_touchscreen_device(force_device_name)
 
@@ -196,3 +265,49 @@ class X11(WindowSystem):
             "--rotate",
             rotation.value,
         ]) == 0
+
+    def _disable_screen_blanking_xlib(self) -> bool:
+        """
+        Same as xset -dpms; xset s off; xset s noblank without spawning xset three times
+        """
+        xlib_path = ctypes.util.find_library("X11")
+        xext_path = ctypes.util.find_library("Xext")
+        if not xlib_path or not xext_path:
+            return False
+
+        xlib = ctypes.cdll.LoadLibrary(xlib_path)
+        xext = ctypes.cdll.LoadLibrary(xext_path)
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XGetScreenSaver.argtypes = [ctypes.c_void_p, *([ctypes.POINTER(ctypes.c_int)] * 4)]
+        xlib.XSetScreenSaver.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        for function in (xlib.XFlush, xlib.XCloseDisplay, xext.DPMSDisable):
+            function.argtypes = [ctypes.c_void_p]
+
+        display = xlib.XOpenDisplay(None)
+        if not display:
+            return False
+        try:
+            timeout, interval, prefer_blanking, allow_exposures = (ctypes.c_int() for _ in range(4))
+            xlib.XGetScreenSaver(display, ctypes.byref(timeout), ctypes.byref(interval), ctypes.byref(prefer_blanking), ctypes.byref(allow_exposures))
+            # Timeout 0 disables screen saver, DontPreferBlanking is 0
+            xlib.XSetScreenSaver(display, 0, interval.value, 0, allow_exposures.value)
+            xext.DPMSDisable(display)
+            xlib.XFlush(display)
+        finally:
+            xlib.XCloseDisplay(display)
+        return True
+
+    def disable_screen_blanking(self) -> bool:
+        try:
+            if self._disable_screen_blanking_xlib():
+                return True
+        except (OSError, AttributeError):
+            pass
+
+        binary_path = find_binary(["xset"])
+        if not binary_path:
+            msg = "xset binary was not found"
+            raise FileNotFoundError(msg)
+
+        return all(subprocess.call([binary_path, *arguments]) == 0 for arguments in (["-dpms"], ["s", "off"], ["s", "noblank"]))
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from tests.benchmarks.harness import BenchmarkBaseline
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+@pytest.fixture(scope="session")
+def benchmark_baseline() -> Iterator[BenchmarkBaseline]:
+    baseline = BenchmarkBaseline()
+    yield baseline
+    if baseline.update:
+        baseline.save()
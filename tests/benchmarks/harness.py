@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+FIXTURES_DIR = Path(__file__).parent.joinpath("fixtures")
+BASELINE_PATH = Path(__file__).parent.joinpath("baseline.json")
+DEVICE_COUNTS = (1, 10, 100)
+
+
+def measure(func: Callable[[], Any], min_time: float = 0.02, repeat: int = 5) -> float:
+    """
+    Measure duration of single func call
+    :return: best of repeat runs in seconds per call
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        duration = time.perf_counter() - start
+        if duration >= min_time:
+            break
+        loops *= 2
+
+    best = duration / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def calibrate() -> float:
+    """
+    Time of fixed pure python workload, used to make results comparable between machines
+    """
+    def workload() -> None:
+        data = {str(i): i for i in range(1000)}
+        sum(int(key) + value for key, value in data.items())
+
+    return measure(workload, repeat=3)
+
+
+class BenchmarkBaseline:
+    """
+    Results are stored relative to calibration workload,
+    run with CHROMIUM_KIOSK_BENCHMARK_UPDATE=1 to record new baseline.
+
+    Wall-clock results are noisy on shared machines, so they are measured and compared with baseline only
+    with CHROMIUM_KIOSK_BENCHMARK=1, otherwise every benchmarked function is just called once.
+    """
+
+    def __init__(self, path: Path = BASELINE_PATH) -> None:
+        self.path = path
+        self.update = bool(os.getenv("CHROMIUM_KIOSK_BENCHMARK_UPDATE"))
+        self.enabled = self.update or bool(os.getenv("CHROMIUM_KIOSK_BENCHMARK"))
+        self.threshold = float(os.getenv("CHROMIUM_KIOSK_BENCHMARK_THRESHOLD", "1.0"))
+        self.data: dict[str, Any] = json.loads(path.read_text()) if path.is_file() else {"results": {}}
+        self.results: dict[str, float] = {}
+
+    def check(self, name: str, func: Callable[[], Any]) -> float | None:
+        """
+        :return: duration relative to calibration, None when benchmarks are not enabled
+        """
+        if not self.enabled:
+            func()
+            return None
+        # Calibrate around every benchmark, machine load changes during the run
+        calibration_before = calibrate()
+        duration = measure(func)
+        relative = duration / ((calibration_before + calibrate()) / 2)
+        self.results[name] = relative
+        baseline = self.data["results"].get(name)
+        if not self.update and baseline is not None:
+            limit = baseline * (1 + self.threshold)
+            assert relative <= limit, f"{name} regressed: {relative:.2f} > {limit:.2f} (baseline {baseline:.2f}, calibration units)"
+        return relative
+
+    def save(self) -> None:
+        self.data["threshold"] = self.threshold
+        self.data["results"] = {**self.data["results"], **{name: round(value, 3) for name, value in self.results.items()}}
+        self.path.write_text(json.dumps(self.data, indent=2, sort_keys=True) + "\n")
+
+
+def xinput_list_output(device_count: int) -> bytes:
+    lines = FIXTURES_DIR.joinpath("xinput_list.txt").read_bytes().splitlines()
+    pointer_master, xtest_pointer, mouse, touch_pointer = lines[:4]
+    keyboards, touch_keyboard = lines[4:-1], lines[-1]
+    mice = [
+        mouse.replace(b"Optical Mouse ", b"Optical Mouse %-3d" % i).replace(b"id=8\t", b"id=%d\t" % (100 + i))
+        for i in range(device_count)
+    ]
+    # Touchscreen is last, worst case for lookup
+    return b"\n".join([pointer_master, xtest_pointer, *mice, *keyboards, touch_pointer, touch_keyboard]) + b"\n"
+
+
+def xrandr_verbose_output(output_count: int) -> bytes:
+    header = FIXTURES_DIR.joinpath("xrandr_verbose_header.txt").read_bytes()
+    block = FIXTURES_DIR.joinpath("xrandr_verbose_output.txt").read_bytes()
+    others = [
+        block.replace(b"HDMI-1 connected primary", b"DP-%d connected" % i).replace(b" left (", b" (")
+        for i in range(output_count - 1)
+    ]
+    # Screen we are looking for is last, worst case for lookup
+    return header + b"".join(others) + block
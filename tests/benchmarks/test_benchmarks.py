@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import subprocess
+from collections.abc import Sized
+from typing import TYPE_CHECKING
+
+import pytest
+import yaml
+
+from chromium_kiosk.config import Config
+from chromium_kiosk.config_loader import get_config
+from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+from chromium_kiosk.enum.RotationEnum import RotationEnum
+from chromium_kiosk.Qiosk import Qiosk
+from chromium_kiosk.tools.TouchDevice import TouchDevice
+from chromium_kiosk.tools.X11 import X11
+from tests.benchmarks.harness import DEVICE_COUNTS, FIXTURES_DIR, xinput_list_output, xrandr_verbose_output
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from tests.benchmarks.harness import BenchmarkBaseline
+
+WHITE_LIST_SIZES = (10, 1000, 10000)
+
+
+def make_config(white_list_size: int, suffix: str = "") -> ConfigSnapshot:
+    return ConfigSnapshot.from_object(Config, {
+        "WHITE_LIST": {
+            "ENABLED": True,
+            "URLS": [f"https://{i}.example.com/*{suffix}" for i in range(white_list_size)],
+            "IFRAME_ENABLED": True,
+        },
+        "ALLOWED_FEATURES": ["geolocation", "notifications"],
+        "NAV_BAR": {**Config.NAV_BAR, "ENABLED": True},
+        "EXTRA_ENV_VARS": {f"VAR_{i}": str(i) for i in range(50)},
+        "EXTRA_ARGUMENTS": "--disable-pinch --enable-gpu-rasterization",
+        "REMOTE_DEBUGGING": 9988,
+    })
+
+
+@pytest.fixture
+def x11(monkeypatch: pytest.MonkeyPatch) -> X11:
+    monkeypatch.setenv("DISPLAY", ":0")
+    monkeypatch.setattr("chromium_kiosk.tools.X11.find_binary", lambda names: f"/usr/bin/{names[0]}")
+    return X11()
+
+
+def feed_output(monkeypatch: pytest.MonkeyPatch, output: bytes) -> None:
+    monkeypatch.setattr(subprocess, "check_output", lambda *_args, **_kwargs: output)
+
+
+@pytest.mark.parametrize("white_list_size", WHITE_LIST_SIZES)
+def test_get_config(benchmark_baseline: BenchmarkBaseline, tmp_path: Path, white_list_size: int) -> None:
+    yaml_files = []
+    for i in range(4):
+        yaml_file = tmp_path.joinpath(f"config_{i}.yml")
+        yaml_file.write_text(yaml.safe_dump({
+            "HOME_PAGE": f"https://example.com/{i}",
+            "WHITE_LIST": {"ENABLED": True, "URLS": [f"https://{j}.example.com/*" for j in range(white_list_size // 4)]},
+            "NAV_BAR": {"ENABLED": True, "ENABLED_BUTTONS": ["home", "reload"]},
+            "EXTRA_ENV_VARS": {f"VAR_{j}": j for j in range(20)},
+        }))
+        yaml_files.append(yaml_file)
+
+    config = get_config("chromium_kiosk.config.Testing", yaml_files)
+    assert config.HOME_PAGE == "https://example.com/3"
+    benchmark_baseline.check(f"get_config[{white_list_size}]", lambda: get_config("chromium_kiosk.config.Testing", yaml_files))
+    benchmark_baseline.check(f"get_config_reload[{white_list_size}]", lambda: get_config("chromium_kiosk.config.Testing", yaml_files, previous=config))
+
+
+@pytest.mark.parametrize("white_list_size", WHITE_LIST_SIZES)
+def test_changed_sections(benchmark_baseline: BenchmarkBaseline, white_list_size: int) -> None:
+    old = make_config(white_list_size)
+    new = ConfigSnapshot.from_object(Config, {"WHITE_LIST": {**old.WHITE_LIST, "ENABLED": False}}, previous=old)
+    assert old.changed_sections(new) == {"WHITE_LIST", "NAV_BAR", "ALLOWED_FEATURES", "EXTRA_ENV_VARS", "EXTRA_ARGUMENTS", "REMOTE_DEBUGGING"}
+    benchmark_baseline.check(f"changed_sections[{white_list_size}]", lambda: old.changed_sections(new))
+
+
+@pytest.mark.parametrize("white_list_size", WHITE_LIST_SIZES)
+def test_resolve_command_mappings_config(benchmark_baseline: BenchmarkBaseline, white_list_size: int) -> None:
+    config = make_config(white_list_size)
+    white_list = Qiosk.resolve_command_mappings_config(config)["setWhiteList"].value
+    assert isinstance(white_list, Sized)
+    assert len(white_list) == white_list_size
+    benchmark_baseline.check(f"resolve_command_mappings_config[{white_list_size}]", lambda: Qiosk.resolve_command_mappings_config(config))
+
+
+@pytest.mark.parametrize("white_list_size", WHITE_LIST_SIZES)
+def test_diff_command_mappings_config_value(benchmark_baseline: BenchmarkBaseline, white_list_size: int) -> None:
+    old = Qiosk.resolve_command_mappings_config(make_config(white_list_size))
+    new = Qiosk.resolve_command_mappings_config(make_config(white_list_size, suffix="/changed"))
+    assert list(Qiosk.diff_command_mappings_config_value(old, new)) == ["setWhiteList"]
+    benchmark_baseline.check(f"diff_command_mappings_config_value[{white_list_size}]", lambda: Qiosk.diff_command_mappings_config_value(old, new))
+
+
+@pytest.mark.parametrize("white_list_size", WHITE_LIST_SIZES)
+def test_build_command_and_env(benchmark_baseline: BenchmarkBaseline, monkeypatch: pytest.MonkeyPatch, white_list_size: int) -> None:
+    monkeypatch.setattr("chromium_kiosk.Qiosk.find_binary", lambda _names: "/usr/bin/qiosk")
+    qiosk = Qiosk(make_config(white_list_size))
+    assert qiosk._build_command().count("-w") == white_list_size  # noqa: SLF001
+    assert qiosk._build_env()["QTWEBENGINE_REMOTE_DEBUGGING"] == "9988"  # noqa: SLF001
+    benchmark_baseline.check(f"build_command[{white_list_size}]", qiosk._build_command)  # noqa: SLF001
+    benchmark_baseline.check(f"build_env[{white_list_size}]", qiosk._build_env)  # noqa: SLF001
+
+
+@pytest.mark.parametrize("device_count", DEVICE_COUNTS)
+def test_get_xinput_devices(benchmark_baseline: BenchmarkBaseline, monkeypatch: pytest.MonkeyPatch, x11: X11, device_count: int) -> None:
+    feed_output(monkeypatch, xinput_list_output(device_count))
+    assert x11.find_touchscreen_device() == TouchDevice(name="ILITEK ILITEK-TP Multi-Touch", identifier="13")
+    benchmark_baseline.check(f"get_xinput_devices[{device_count}]", lambda: list(x11._get_xinput_devices()))  # noqa: SLF001
+
+
+@pytest.mark.parametrize("device_count", DEVICE_COUNTS)
+def test_get_screen_rotation(benchmark_baseline: BenchmarkBaseline, monkeypatch: pytest.MonkeyPatch, x11: X11, device_count: int) -> None:
+    feed_output(monkeypatch, xrandr_verbose_output(device_count))
+    assert x11.get_screen_rotation("HDMI-1") == RotationEnum.LEFT
+    benchmark_baseline.check(f"get_screen_rotation[{device_count}]", lambda: x11.get_screen_rotation("HDMI-1"))
+
+
+def test_get_touchscreen_rotation(benchmark_baseline: BenchmarkBaseline, monkeypatch: pytest.MonkeyPatch, x11: X11) -> None:
+    feed_output(monkeypatch, FIXTURES_DIR.joinpath("xinput_list_props.txt").read_bytes())
+    touch_device = TouchDevice(name="ILITEK ILITEK-TP Multi-Touch", identifier="13")
+    assert x11.get_touchscreen_rotation(touch_device) == RotationEnum.LEFT
+    benchmark_baseline.check("get_touchscreen_rotation", lambda: x11.get_touchscreen_rotation(touch_device))
@@ -0,0 +1,153 @@
+"""
+Stand-ins for qiosk, xrandr and xinput executables of simulated kiosk.
+
+Every invocation is appended to forks.jsonl in CHROMIUM_KIOSK_E2E_DIR, screen and touchscreen rotation
+is kept in state.json there, qiosk serves remote control websocket and appends received commands to commands.jsonl.
+With remote debugging enabled qiosk serves DevTools too, navigations are appended to navigations.jsonl
+and page stops answering evaluations while frozen file exists.
+"""
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from tests.fake_devtools import FakeDevTools, FakeServer, FakeWebSocketConnection
+
+FIXTURES_DIR = Path(__file__).parent.parent.joinpath("benchmarks", "fixtures")
+NORMAL_MATRIX = ["1", "0", "0", "0", "1", "0", "0", "0", "1"]
+ACTIVE_MONITORS = b"Monitors: 1\n 0: +*HDMI-1 1920/527x1080/296+0+0  HDMI-1\n"
+
+
+def get_e2e_dir() -> Path:
+    return Path(os.environ["CHROMIUM_KIOSK_E2E_DIR"])
+
+
+def append_json_line(path: Path, data: dict[str, Any]) -> None:
+    with path.open("a", encoding="UTF-8") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(json.dumps(data) + "\n")
+
+
+def read_json_lines(path: Path) -> list[dict[str, Any]]:
+    if not path.is_file():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="UTF-8").splitlines() if line]
+
+
+def read_state() -> dict[str, Any]:
+    state_path = get_e2e_dir().joinpath("state.json")
+    state = {"screen_rotation": "normal", "touchscreen_matrix": NORMAL_MATRIX}
+    if state_path.is_file():
+        state.update(json.loads(state_path.read_text(encoding="UTF-8")))
+    return state
+
+
+def write_state(**changes: Any) -> None:  # noqa: ANN401
+    state_path = get_e2e_dir().joinpath("state.json")
+    tmp_path = state_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({**read_state(), **changes}), encoding="UTF-8")
+    tmp_path.replace(state_path)
+
+
+def xrandr(args: list[str]) -> int:
+    if args == ["--listactivemonitors"]:
+        sys.stdout.buffer.write(ACTIVE_MONITORS)
+    elif args == ["--current", "--verbose"]:
+        rotation = read_state()["screen_rotation"]
+        block = FIXTURES_DIR.joinpath("xrandr_verbose_output.txt").read_bytes()
+        # xrandr omits rotation of not rotated output
+        block = block.replace(b" left (", b" (" if rotation == "normal" else f" {rotation} (".encode())
+        sys.stdout.buffer.write(FIXTURES_DIR.joinpath("xrandr_verbose_header.txt").read_bytes() + block)
+    elif len(args) == 4 and args[0] == "--output" and args[2] == "--rotate":
+        write_state(screen_rotation=args[3])
+    else:
+        return 1
+    return 0
+
+
+def xinput(args: list[str]) -> int:
+    if args == ["-list"]:
+        sys.stdout.buffer.write(FIXTURES_DIR.joinpath("xinput_list.txt").read_bytes())
+    elif len(args) == 2 and args[0] == "list-props":
+        matrix = ", ".join(f"{float(value):.6f}" for value in read_state()["touchscreen_matrix"])
+        lines = FIXTURES_DIR.joinpath("xinput_list_props.txt").read_text(encoding="UTF-8").splitlines()
+        props = [f"\tCoordinate Transformation Matrix (117):\t{matrix}" if "Coordinate Transformation Matrix" in line else line for line in lines]
+        sys.stdout.write("\n".join(props) + "\n")
+    elif len(args) > 3 and args[0] == "set-prop" and args[2] == "Coordinate Transformation Matrix":
+        write_state(touchscreen_matrix=args[3:])
+    else:
+        return 1
+    return 0
+
+
+class FakeQioskControl(FakeServer):
+    """
+    Remote control websocket of qiosk, every command is recorded with time it was received
+    """
+
+    def __init__(self, port: int, commands_path: Path) -> None:
+        super().__init__(port)
+        self.commands_path = commands_path
+
+    def on_message(self, connection: FakeWebSocketConnection, message: dict[str, Any]) -> None:
+        append_json_line(self.commands_path, {**message, "received": time.time()})
+        connection.send_json({"command": message.get("command"), "status": "ok"})
+
+
+class FakeQioskDevTools(FakeDevTools):
+    """
+    DevTools of the page, frozen page does not answer evaluations
+    """
+
+    def __init__(self, port: int) -> None:
+        super().__init__(port)
+        self.handlers.update({
+            "Runtime.evaluate": self._evaluate,
+            "Page.navigate": self._record_navigation,
+        })
+
+    def _evaluate(self, _connection: FakeWebSocketConnection, _params: dict[str, Any]) -> dict[str, Any] | None:
+        if get_e2e_dir().joinpath("frozen").exists():
+            return None
+        return {"result": {"type": "number", "value": 1}}
+
+    def _record_navigation(self, connection: FakeWebSocketConnection, params: dict[str, Any]) -> dict[str, Any]:
+        append_json_line(get_e2e_dir().joinpath("navigations.jsonl"), {"url": params["url"], "received": time.time()})
+        return self._navigate(connection, params)
+
+
+def qiosk(args: list[str]) -> int:
+    port = int(args[args.index("--remote-control-port") + 1]) if "--remote-control-port" in args else 1791
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: stopped.set())
+    remote_debugging = os.getenv("QTWEBENGINE_REMOTE_DEBUGGING")
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(FakeQioskControl(port, get_e2e_dir().joinpath("commands.jsonl")))
+        if remote_debugging:
+            stack.enter_context(FakeQioskDevTools(int(remote_debugging)))
+        append_json_line(get_e2e_dir().joinpath("ready.jsonl"), {"pid": os.getpid(), "port": port})
+        # Signal may be taken by server thread, main thread has to wake up to run the handler
+        while not stopped.wait(0.5):
+            pass
+    return 0
+
+
+TOOLS = {
+    "qiosk": qiosk,
+    "xrandr": xrandr,
+    "xinput": xinput,
+}
+
+
+def main(tool: str) -> None:
+    args = sys.argv[1:]
+    append_json_line(get_e2e_dir().joinpath("forks.jsonl"), {"tool": tool, "args": args, "ppid": os.getppid(), "time": time.time()})
+    sys.exit(TOOLS[tool](args))
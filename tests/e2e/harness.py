@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from chromium_kiosk.tools.LatencyHistogram import LatencyHistogram
+from chromium_kiosk.tools.ProcessTree import ProcessTree
+from chromium_kiosk.tools.UeventMonitor import (
+    NETLINK_KOBJECT_UEVENT,
+    UDEV_MONITOR_HEADER,
+    UDEV_MONITOR_MAGIC,
+    UDEV_MONITOR_PREFIX,
+    UEVENT_GROUP_UDEV,
+)
+from tests.e2e.fake_tools import TOOLS, read_json_lines
+
+REPOSITORY_ROOT = Path(__file__).parent.parent.parent
+ROTATIONS = ("normal", "left", "inverted", "right")
+MODES = ("watch_config", "in_process", "sighup")
+
+# Default load, override by environment to run longer or heavier simulation
+DEFAULT_RATE = 300  # config changes per minute
+DEFAULT_DURATION = 6.0  # seconds
+DEFAULT_ROTATION_EVERY = 10  # every n-th change also rotates screen and touchscreen
+
+
+def port_is_free(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        # Same as control server, connections of previous run in TIME_WAIT do not block the port
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(("127.0.0.1", port))
+        except OSError:
+            return False
+    return True
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def netlink_uevents_allowed() -> bool:
+    """
+    Hotplug can be simulated only by process allowed to send to udev netlink group, usually root
+    """
+    try:
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_KOBJECT_UEVENT) as sock:
+            # Not an uevent, ignored by every listener
+            sock.sendto(b"chromium-kiosk-e2e\x00", (0, UEVENT_GROUP_UDEV))
+    except (OSError, AttributeError):
+        return False
+    return True
+
+
+def send_screen_hotplug() -> None:
+    """
+    Send udev event of reconnected screen as udev would after processing its rules
+    """
+    properties = b"ACTION=change\x00DEVPATH=/devices/chromium-kiosk-e2e/drm/card0\x00SUBSYSTEM=drm\x00HOTPLUG=1\x00"
+    header = UDEV_MONITOR_HEADER.pack(UDEV_MONITOR_PREFIX, socket.htonl(UDEV_MONITOR_MAGIC), UDEV_MONITOR_HEADER.size, UDEV_MONITOR_HEADER.size, len(properties))
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_KOBJECT_UEVENT) as sock:
+        sock.sendto(header + properties, (0, UEVENT_GROUP_UDEV))
+
+
+def install_fake_tools(bin_dir: Path) -> None:
+    """
+    Write fake executables found by find_binary when bin_dir is first on PATH
+    """
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for tool in TOOLS:
+        path = bin_dir.joinpath(tool)
+        path.write_text(
+            f"#!{sys.executable}\n"
+            "import sys\n"
+            f"sys.path.insert(0, {str(REPOSITORY_ROOT)!r})\n"
+            "from tests.e2e.fake_tools import main\n"
+            f"main({tool!r})\n",
+            encoding="UTF-8",
+        )
+        path.chmod(0o755)
+
+
+class KioskSimulation:
+    """
+    Kiosk running `chromium-kiosk run` as on the device, with fake qiosk, xrandr and xinput,
+    driven by config changes written at fixed rate.
+
+    Changes are applied by one of MODES: separate `chromium-kiosk watch_config` process,
+    `chromium-kiosk run --watch_config` itself or `chromium-kiosk run` on SIGHUP sent after every change.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        rate: float = DEFAULT_RATE,
+        duration: float = DEFAULT_DURATION,
+        rotation_every: int = DEFAULT_ROTATION_EVERY,
+        mode: str = "watch_config",
+        config: dict[str, Any] | None = None,
+    ) -> None:
+        if mode not in MODES:
+            msg = f"Unknown mode {mode}, use one of {', '.join(MODES)}"
+            raise ValueError(msg)
+        self.root = root
+        self.mode = mode
+        self.rate = rate
+        self.duration = duration
+        self.rotation_every = rotation_every
+        # Written with every change
+        self.config = config or {}
+        self.config_path = root.joinpath("config.yml")
+        self.processes: dict[str, subprocess.Popen[bytes]] = {}
+        # Change number to time it was written
+        self.written: dict[int, float] = {}
+        self.rotation_changes = 0
+        self.env = {
+            **os.environ,
+            "HOME": str(root),
+            "PATH": os.pathsep.join([str(root.joinpath("bin")), os.environ.get("PATH", "")]),
+            "DISPLAY": ":99",
+            "PYTHONPATH": str(REPOSITORY_ROOT),
+            "CHROMIUM_KIOSK_CONFIG": str(self.config_path),
+            "CHROMIUM_KIOSK_E2E_DIR": str(root),
+        }
+        self.env.pop("WAYLAND_DISPLAY", None)
+
+    @staticmethod
+    def home_page(number: int) -> str:
+        return f"https://example.com/{number}"
+
+    def write_config(self, number: int, rotation: str = "normal") -> None:
+        config = {
+            "HOME_PAGE": self.home_page(number),
+            "DISPLAY_ROTATION": rotation,
+            # Netlink socket is not available in every sandbox
+            "HOTPLUG": {"ENABLED": False},
+            **self.config,
+        }
+        # Written in place like editors and configuration management do, watcher may see truncated file
+        self.written[number] = time.time()
+        with self.config_path.open("w", encoding="UTF-8") as f:
+            f.write(json.dumps(config))
+        if self.mode == "sighup" and "run" in self.processes:
+            # Like configuration management tool after it wrote the file
+            os.kill(self.processes["run"].pid, signal.SIGHUP)
+
+    def _spawn(self, name: str, *args: str) -> subprocess.Popen[bytes]:
+        with self.root.joinpath(f"{name}.out").open("wb") as output:
+            process = subprocess.Popen(  # noqa: S603
+                [sys.executable, "-m", "chromium_kiosk", name, "--config_prod", *args],
+                env=self.env,
+                cwd=self.root,
+                stdout=output,
+                stderr=subprocess.STDOUT,
+                # Own process group, so fake qiosk is stopped together with its parent
+                start_new_session=True,
+            )
+        self.processes[name] = process
+        return process
+
+    def kiosk_usage(self) -> tuple[float, int]:
+        """
+        Resources used by chromium-kiosk processes, without (fake) browser
+        :return: CPU time in seconds and RSS in bytes
+        """
+        browser = ProcessTree(read_json_lines(self.root.joinpath("ready.jsonl"))[0]["pid"])
+        trees = [ProcessTree(process.pid) for process in self.processes.values()]
+        return (
+            sum(tree.cpu_time() for tree in trees) - browser.cpu_time(),
+            sum(tree.rss() for tree in trees) - browser.rss(),
+        )
+
+    def _wait(self, condition: Any, timeout: float, what: str) -> None:  # noqa: ANN401
+        deadline = time.monotonic() + timeout
+        while not condition():
+            for name, process in self.processes.items():
+                if process.poll() is not None:
+                    output = self.root.joinpath(f"{name}.out").read_text(encoding="UTF-8", errors="replace")
+                    msg = f"{name} exited with code {process.returncode} while waiting for {what}:\n{output}"
+                    raise RuntimeError(msg)
+            if time.monotonic() > deadline:
+                msg = f"Timed out waiting for {what}"
+                raise TimeoutError(msg)
+            time.sleep(0.02)
+
+    def wait_for(self, condition: Any, what: str, timeout: float = 10) -> None:  # noqa: ANN401
+        self._wait(condition, timeout, what)
+
+    def screen_rotation(self) -> str:
+        return str(self.read_state().get("screen_rotation", "normal"))
+
+    def read_state(self) -> dict[str, Any]:
+        state_path = self.root.joinpath("state.json")
+        return json.loads(state_path.read_text(encoding="UTF-8")) if state_path.is_file() else {}
+
+    def replug_screen(self) -> None:
+        """
+        Reconnected screen comes up in normal rotation, kiosk is told about it by udev event
+        """
+        state_path = self.root.joinpath("state.json")
+        tmp_path = state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({**self.read_state(), "screen_rotation": "normal"}), encoding="UTF-8")
+        tmp_path.replace(state_path)
+        send_screen_hotplug()
+
+    def navigations(self) -> list[dict[str, Any]]:
+        return read_json_lines(self.root.joinpath("navigations.jsonl"))
+
+    def received(self) -> list[dict[str, Any]]:
+        return read_json_lines(self.root.joinpath("commands.jsonl"))
+
+    def forks(self) -> list[dict[str, Any]]:
+        return read_json_lines(self.root.joinpath("forks.jsonl"))
+
+    def delivered(self, number: int, since: int = 0) -> bool:
+        url = self.home_page(number)
+        return any(command.get("data", {}).get("url") == url for command in self.received()[since:])
+
+    def start(self, timeout: float = 30) -> None:
+        install_fake_tools(self.root.joinpath("bin"))
+        self.write_config(0)
+        self._spawn("run", *(["--watch_config"] if self.mode == "in_process" else []))
+        self._wait(lambda: read_json_lines(self.root.joinpath("ready.jsonl")), timeout, "qiosk control port")
+        if self.mode == "watch_config":
+            self._spawn("watch_config")
+        # Watcher has no readiness signal, change config until it pushes the change
+        deadline = time.monotonic() + timeout
+        number = -1
+        while True:
+            self.write_config(number)
+            try:
+                self._wait(lambda number=number: self.delivered(number), 0.5, "config watcher")
+            except TimeoutError:
+                if time.monotonic() > deadline:
+                    raise
+                number -= 1
+            else:
+                return
+
+    def stop(self) -> None:
+        for process in self.processes.values():
+            if process.poll() is None:
+                os.killpg(process.pid, signal.SIGTERM)
+        for process in self.processes.values():
+            try:
+                process.wait(5)
+            except subprocess.TimeoutExpired:  # noqa: PERF203
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+        # Fake qiosk shuts its servers down after chromium-kiosk exited, next simulation needs the control port
+        deadline = time.monotonic() + 5
+        for ready in read_json_lines(self.root.joinpath("ready.jsonl")):
+            while not port_is_free(ready["port"]) and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+    def __enter__(self) -> KioskSimulation:  # noqa: PYI034
+        try:
+            self.start()
+        except Exception:
+            self.stop()
+            raise
+        return self
+
+    def __exit__(self, *_args: object) -> None:
+        self.stop()
+
+    def run_load(self, settle: float = 5) -> dict[str, Any]:
+        """
+        Write config changes at given rate and collect what kiosk did with them
+        :param settle: seconds to wait for the last change to be pushed
+        :return: report with latency, lost and duplicated commands, forks and resources used by kiosk processes
+        """
+        interval = 60 / self.rate
+        count = max(1, int(self.duration / interval))
+        received_before = len(self.received())
+        forks_before = len(self.forks())
+        cpu_before, _ = self.kiosk_usage()
+        started_at = time.monotonic()
+
+        rotation = "normal"
+        for number in range(1, count + 1):
+            if self.rotation_every and number % self.rotation_every == 0:
+                rotation = ROTATIONS[(ROTATIONS.index(rotation) + 1) % len(ROTATIONS)]
+                self.rotation_changes += 1
+            self.write_config(number, rotation)
+            time.sleep(max(0.0, started_at + number * interval - time.monotonic()))
+
+        deadline = time.monotonic() + settle
+        while not self.delivered(count, received_before) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        elapsed = time.monotonic() - started_at
+        cpu_time, rss = self.kiosk_usage()
+
+        commands = self.received()[received_before:]
+        urls = [command["data"]["url"] for command in commands if command.get("command") == "setUrl"]
+        numbers = [int(url.rsplit("/", 1)[1]) for url in urls]
+        latency = LatencyHistogram()
+        for command in commands:
+            if command.get("command") == "setUrl":
+                latency.observe(command["received"] - self.written[int(command["data"]["url"].rsplit("/", 1)[1])])
+        duplicates = sum(occurrences - 1 for occurrences in Counter(numbers).values())
+        forks = Counter(fork["tool"] for fork in self.forks()[forks_before:])
+
+        return {
+            "mode": self.mode,
+            "rate": self.rate,
+            "changes": count,
+            "rotation_changes": self.rotation_changes,
+            "delivered": len(set(numbers)),
+            # Changes written faster than watcher handles them are superseded by newer ones, not lost
+            "coalesced": count - len(set(numbers)),
+            "duplicates": duplicates,
+            "out_of_order": sum(1 for previous, current in zip(numbers, numbers[1:]) if current < previous),
+            "last_delivered": numbers[-1] == count if numbers else False,
+            "commands": dict(Counter(command.get("command") for command in commands)),
+            "latency": latency.to_dict(),
+            "forks": dict(forks),
+            "forks_per_rotation_change": sum(forks.values()) / self.rotation_changes if self.rotation_changes else 0.0,
+            "kiosk_cpu": (cpu_time - cpu_before) / elapsed,  # share of one core
+            "kiosk_rss": rss,
+            "kiosk_processes": len(self.processes),
+        }
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+
+from chromium_kiosk.Qiosk import DEFAULT_CONTROL_PORT
+from tests.e2e.harness import (
+    DEFAULT_DURATION,
+    DEFAULT_RATE,
+    DEFAULT_ROTATION_EVERY,
+    MODES,
+    KioskSimulation,
+    free_port,
+    netlink_uevents_allowed,
+    port_is_free,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# Commands pushed for every HOME_PAGE change
+HOME_PAGE_COMMANDS = ("setHomePage", "setUrl")
+# Screen: listactivemonitors, --current --verbose, --output; touchscreen: -list, list-props, set-prop and its shell
+MAX_FORKS_PER_ROTATION_CHANGE = 7
+
+
+@pytest.mark.skipif(not port_is_free(DEFAULT_CONTROL_PORT), reason=f"qiosk control port {DEFAULT_CONTROL_PORT} is in use")
+@pytest.mark.parametrize("mode", MODES)
+def test_config_push_under_load(tmp_path: Path, mode: str) -> None:
+    simulation = KioskSimulation(
+        tmp_path,
+        rate=float(os.getenv("CHROMIUM_KIOSK_E2E_RATE", str(DEFAULT_RATE))),
+        duration=float(os.getenv("CHROMIUM_KIOSK_E2E_DURATION", str(DEFAULT_DURATION))),
+        rotation_every=int(os.getenv("CHROMIUM_KIOSK_E2E_ROTATION_EVERY", str(DEFAULT_ROTATION_EVERY))),
+        mode=mode,
+    )
+    with simulation:
+        report = simulation.run_load()
+
+    report_path = os.getenv("CHROMIUM_KIOSK_E2E_REPORT")
+    if report_path:
+        with open(report_path, "a", encoding="UTF-8") as f:  # noqa: PTH123
+            f.write(json.dumps(report, sort_keys=True) + "\n")
+
+    assert report["last_delivered"], report
+    assert report["duplicates"] == 0, report
+    assert report["out_of_order"] == 0, report
+    for command in HOME_PAGE_COMMANDS:
+        assert report["commands"][command] == report["delivered"], report
+    assert set(report["forks"]) <= {"xrandr", "xinput"}, report
+    assert report["forks_per_rotation_change"] <= MAX_FORKS_PER_ROTATION_CHANGE, report
+
+
+@pytest.mark.skipif(not port_is_free(DEFAULT_CONTROL_PORT), reason=f"qiosk control port {DEFAULT_CONTROL_PORT} is in use")
+@pytest.mark.parametrize("mode", ["in_process", "sighup"])
+def test_services_use_reloaded_config(tmp_path: Path, mode: str) -> None:
+    hotplug = netlink_uevents_allowed()
+    simulation = KioskSimulation(
+        tmp_path,
+        mode=mode,
+        config={
+            "REMOTE_DEBUGGING": free_port(),
+            # Page that stops answering is sent HOME after second missed heartbeat
+            "HEARTBEAT": {"ENABLED": True, "INTERVAL": 0.1, "TIMEOUT": 0.3, "RELOAD_AFTER": 100, "HOME_AFTER": 2, "RESTART_AFTER": 1000, "GRACE": 0},
+            "HOTPLUG": {"ENABLED": hotplug, "DEBOUNCE": 0.05},
+        },
+    )
+    with simulation:
+        simulation.write_config(1, "left")
+        simulation.wait_for(lambda: simulation.delivered(1) and simulation.screen_rotation() == "left", "reloaded config")
+
+        if hotplug:
+            simulation.replug_screen()
+            simulation.wait_for(lambda: simulation.screen_rotation() == "left", "rotation of replugged screen")
+
+        tmp_path.joinpath("frozen").touch()
+        simulation.wait_for(
+            lambda: any(navigation["url"] == simulation.home_page(1) for navigation in simulation.navigations()),
+            "heartbeat navigating to reloaded HOME_PAGE",
+        )
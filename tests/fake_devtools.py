@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+if TYPE_CHECKING:
+    import socket
+    from collections.abc import Iterator
+
+    from typing_extensions import Self
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+Handler = Callable[["FakeWebSocketConnection", dict[str, Any]], Any]
+ST = TypeVar("ST", bound="FakeServer")
+
+
+class FakeWebSocketConnection:
+    """
+    Server side of websocket connection, just enough of RFC 6455 for text frames
+    """
+
+    def __init__(self, sock: socket.socket, path: str) -> None:
+        self.sock = sock
+        self.path = path
+        self.lock = threading.Lock()
+
+    def _read_exact(self, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def receive(self) -> str | None:
+        header = self._read_exact(2)
+        opcode = header[0] & 0x0F
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._read_exact(8))[0]
+        mask = self._read_exact(4) if header[1] & 0x80 else b"\x00" * 4
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(self._read_exact(length)))
+        if opcode == 0x8:
+            return None
+        return payload.decode()
+
+    def send(self, text: str) -> None:
+        payload = text.encode()
+        if len(payload) < 126:
+            header = struct.pack("!BB", 0x81, len(payload))
+        elif len(payload) < 65536:
+            header = struct.pack("!BBH", 0x81, 126, len(payload))
+        else:
+            header = struct.pack("!BBQ", 0x81, 127, len(payload))
+        with self.lock:
+            self.sock.sendall(header + payload)
+
+    def send_json(self, message: dict[str, Any]) -> None:
+        self.send(json.dumps(message))
+
+
+class FakeServer:
+    """
+    HTTP server that upgrades to websocket, messages are JSON handled by method handlers
+    """
+
+    def __init__(self, port: int = 0) -> None:
+        self.handlers: dict[str, Handler] = {}
+        self.messages: list[tuple[str, dict[str, Any]]] = []
+        self.connections: list[FakeWebSocketConnection] = []
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ANN401
+                pass
+
+            def do_GET(self) -> None:
+                if self.headers.get("Upgrade", "").lower() == "websocket":
+                    server.upgrade(self)
+                    return
+                status, body = server.http_get(self.path)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_PUT(self) -> None:
+                self.do_GET()
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), RequestHandler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> Self:
+        self.thread.start()
+        return self
+
+    def __exit__(self, *_args: object) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def http_get(self, path: str) -> tuple[int, Any]:
+        _ = path
+        return 404, {}
+
+    def upgrade(self, request: BaseHTTPRequestHandler) -> None:
+        key = request.headers["Sec-WebSocket-Key"]
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()  # noqa: S324
+        request.send_response(101)
+        request.send_header("Upgrade", "websocket")
+        request.send_header("Connection", "Upgrade")
+        request.send_header("Sec-WebSocket-Accept", accept)
+        request.end_headers()
+        request.wfile.flush()
+        connection = FakeWebSocketConnection(request.connection, request.path)
+        self.connections.append(connection)
+        try:
+            while True:
+                text = connection.receive()
+                if text is None:
+                    break
+                self.on_message(connection, json.loads(text))
+        except (ConnectionError, OSError):
+            pass
+        request.close_connection = True
+
+    def on_message(self, connection: FakeWebSocketConnection, message: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+
+class FakeDevTools(FakeServer):
+    """
+    Stand-in for DevTools endpoint of QtWebEngine, page targets are kept in memory
+    and calls are answered by handlers registered by method name
+    """
+
+    def __init__(self, port: int = 0) -> None:
+        super().__init__(port)
+        self.targets: list[dict[str, Any]] = []
+        self.add_target("about:blank")
+        self.handlers.update({
+            "Runtime.evaluate": lambda _connection, _params: {"result": {"type": "string", "value": "complete"}},
+            "Runtime.getHeapUsage": lambda _connection, _params: {"usedSize": 1000000, "totalSize": 2000000},
+            "Page.navigate": self._navigate,
+            "Page.reload": lambda _connection, _params: {},
+            "Target.createTarget": lambda _connection, params: {"targetId": self.add_target(params["url"])["id"]},
+            "Target.activateTarget": self._activate,
+            "Target.closeTarget": self._close,
+        })
+
+    def add_target(self, url: str) -> dict[str, Any]:
+        target_id = f"TARGET{len(self.messages)}{time.monotonic_ns()}"
+        target = {
+            "id": target_id,
+            "type": "page",
+            "url": url,
+            "title": url,
+            "webSocketDebuggerUrl": f"ws://127.0.0.1:{self.port}/devtools/page/{target_id}",
+        }
+        self.targets.append(target)
+        return target
+
+    def target_for(self, connection: FakeWebSocketConnection) -> dict[str, Any] | None:
+        for target in self.targets:
+            if connection.path.endswith(target["id"]):
+                return target
+        return None
+
+    def _navigate(self, connection: FakeWebSocketConnection, params: dict[str, Any]) -> dict[str, Any]:
+        target = self.target_for(connection)
+        if target:
+            target["url"] = params["url"]
+        return {"frameId": "FRAME"}
+
+    def _activate(self, _connection: FakeWebSocketConnection, params: dict[str, Any]) -> dict[str, Any]:
+        for target in self.targets:
+            if target["id"] == params["targetId"]:
+                self.targets.remove(target)
+                self.targets.insert(0, target)
+        return {}
+
+    def _close(self, _connection: FakeWebSocketConnection, params: dict[str, Any]) -> dict[str, Any]:
+        self.targets = [target for target in self.targets if target["id"] != params["targetId"]]
+        return {"success": True}
+
+    def http_get(self, path: str) -> tuple[int, Any]:
+        if path.startswith("/json/version"):
+            return 200, {"Browser": "QtWebEngine/6.5.0", "webSocketDebuggerUrl": f"ws://127.0.0.1:{self.port}/devtools/browser/BROWSER"}
+        if path.startswith("/json/list") or path == "/json":
+            return 200, self.targets
+        return 404, {}
+
+    def on_message(self, connection: FakeWebSocketConnection, message: dict[str, Any]) -> None:
+        self.messages.append((message["method"], message.get("params", {})))
+        handler = self.handlers.get(message["method"])
+        if handler is None:
+            connection.send_json({"id": message["id"], "error": {"code": -32601, "message": "method not found"}})
+            return
+        result = handler(connection, message.get("params", {}))
+        if result is not None:
+            connection.send_json({"id": message["id"], "result": result})
+
+    def methods(self) -> list[str]:
+        return [method for method, _ in self.messages]
+
+
+def serve(server: ST) -> Iterator[ST]:
+    """
+    Shared body of pytest fixtures, server is running for the whole test
+    """
+    with server:
+        yield server
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import copy
+import pickle
+from typing import TYPE_CHECKING
+
+import pytest
+import yaml
+
+from chromium_kiosk.config import Config, Production
+from chromium_kiosk.config_loader import get_config
+from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def write_config(path: Path, data: dict[str, object]) -> list[Path]:
+    path.write_text(yaml.safe_dump(data))
+    return [path]
+
+
+def test_snapshot_is_immutable_and_does_not_touch_config_class(tmp_path: Path) -> None:
+    yaml_files = write_config(tmp_path.joinpath("config.yml"), {"HOME_PAGE": "https://example.com/", "WHITE_LIST": {"ENABLED": True, "URLS": ["a"]}})
+    config = get_config("chromium_kiosk.config.Production", yaml_files)
+
+    assert config.HOME_PAGE == "https://example.com/"
+    assert config.WHITE_LIST["URLS"] == ("a",)
+    assert config.DEBUG is False
+    assert Production.HOME_PAGE == Config.HOME_PAGE
+    assert Config.WHITE_LIST["URLS"] == []
+
+    with pytest.raises(AttributeError):
+        config.HOME_PAGE = "https://other.example.com/"
+    with pytest.raises(TypeError):
+        config.WHITE_LIST["ENABLED"] = False
+    with pytest.raises(AttributeError):
+        _ = config.NOT_EXISTING
+
+
+def test_removed_key_falls_back_to_default(tmp_path: Path) -> None:
+    config_file = tmp_path.joinpath("config.yml")
+    first = get_config("chromium_kiosk.config.Config", write_config(config_file, {"IDLE_TIME": 30}))
+    second = get_config("chromium_kiosk.config.Config", write_config(config_file, {}), previous=first)
+
+    assert first.IDLE_TIME == 30
+    assert second.IDLE_TIME == Config.IDLE_TIME
+    assert second.changed_sections(first) == {"IDLE_TIME"}
+
+
+def test_unchanged_sections_are_shared() -> None:
+    first = ConfigSnapshot.from_object(Config, {"NAV_BAR": {"ENABLED": True}, "HOME_PAGE": "https://a.example.com/"})
+    second = ConfigSnapshot.from_object(Config, {"NAV_BAR": {"ENABLED": True}, "HOME_PAGE": "https://b.example.com/"}, previous=first)
+
+    assert second.NAV_BAR is first.NAV_BAR
+    assert second.WHITE_LIST is first.WHITE_LIST
+    assert second.changed_sections(first) == {"HOME_PAGE"}
+    assert first.changed_sections(ConfigSnapshot.from_object(Config, {"NAV_BAR": {"ENABLED": True}, "HOME_PAGE": "https://a.example.com/"})) == frozenset()
+    assert first != second
+
+
+def test_replace() -> None:
+    config = ConfigSnapshot.from_object(Config, {"FULL_SCREEN": True})
+    replaced = config.replace(WINDOW_MODE="maximized")
+
+    assert config.WINDOW_MODE == "fullscreen"
+    assert replaced.WINDOW_MODE == "maximized"
+    assert replaced.changed_sections(config) == {"WINDOW_MODE"}
+    assert replaced.section_hash("HOME_PAGE") == config.section_hash("HOME_PAGE")
+
+
+def test_copy_and_pickle() -> None:
+    config = ConfigSnapshot.from_object(Config, {"WHITE_LIST": {"ENABLED": True, "URLS": ["a"]}})
+
+    assert copy.copy(config) is config
+    assert copy.deepcopy({"config": config})["config"] is config
+    restored = pickle.loads(pickle.dumps(config))  # noqa: S301
+    assert restored == config
+    assert restored.WHITE_LIST["URLS"] == ("a",)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import TYPE_CHECKING, Any
+
+import pytest
+import yaml
+
+from chromium_kiosk.config import Config
+from chromium_kiosk.config_loader import ConfigParseError, get_config
+from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+from chromium_kiosk.Qiosk import Qiosk
+from chromium_kiosk.tools.ConfigWatcher import ConfigWatcher
+from tests.fake_devtools import FakeServer, FakeWebSocketConnection
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class FakeControl(FakeServer):
+    def on_message(self, connection: FakeWebSocketConnection, message: dict[str, Any]) -> None:
+        self.messages.append((message["command"], message["data"]))
+        connection.send_json({"status": "ok"})
+
+
+def test_reload_passes_changed_sections_to_handler() -> None:
+    config = ConfigSnapshot.from_object(Config)
+    new_config = config.replace(HOME_PAGE="https://example.com/")
+    changes: list[tuple[ConfigSnapshot, ConfigSnapshot, frozenset[str]]] = []
+    watcher = ConfigWatcher(config, lambda _previous: new_config, lambda *change: changes.append(change))
+
+    assert watcher.reload() == frozenset({"HOME_PAGE"})
+    assert changes == [(config, new_config, frozenset({"HOME_PAGE"}))]
+    assert watcher.config is new_config
+
+    # Nothing changed since previous reload
+    assert watcher.reload() == frozenset()
+    assert len(changes) == 1
+
+
+def test_unparseable_config_keeps_previous_one(tmp_path: Path) -> None:
+    # Config file read right after it was truncated by writer
+    config_path = tmp_path.joinpath("config.yml")
+    config_path.write_text("", encoding="UTF-8")
+    config = ConfigSnapshot.from_object(Config)
+    changes: list[Any] = []
+    watcher = ConfigWatcher(config, lambda previous: get_config("chromium_kiosk.config.Config", [config_path], previous), lambda *change: changes.append(change))
+    assert watcher.reload() == frozenset()
+
+    config_path.write_text("HOME_PAGE: [", encoding="UTF-8")
+    assert watcher.reload() == frozenset()
+
+    config_path.unlink()
+    assert watcher.reload() == frozenset()
+    assert not changes
+    assert watcher.config is config
+
+
+def test_loader_bug_is_not_hidden() -> None:
+    config = ConfigSnapshot.from_object(Config)
+
+    def loader(previous: ConfigSnapshot) -> ConfigSnapshot:
+        return previous.replace(IDLE_TIME=previous.IDLE_TIME + "1")
+
+    watcher = ConfigWatcher(config, loader, lambda *_change: None)
+    with pytest.raises(TypeError):
+        watcher.reload()
+
+
+def test_non_mapping_config_is_parse_error(tmp_path: Path) -> None:
+    config_path = tmp_path.joinpath("config.yml")
+    config_path.write_text("- HOME_PAGE\n", encoding="UTF-8")
+    with pytest.raises(ConfigParseError, match="expected mapping, got list"):
+        get_config("chromium_kiosk.config.Config", [config_path])
+
+
+def test_failed_apply_does_not_stop_watcher() -> None:
+    config = ConfigSnapshot.from_object(Config)
+    changes: list[Any] = []
+
+    def on_change(*change: Any) -> None:  # noqa: ANN401
+        changes.append(change)
+        if len(changes) == 1:
+            raise ConnectionRefusedError
+
+    watcher = ConfigWatcher(config, lambda previous: previous.replace(IDLE_TIME=previous.IDLE_TIME + 1), on_change)
+    assert watcher.reload() == frozenset({"IDLE_TIME"})
+    assert watcher.reload() == frozenset({"IDLE_TIME"})
+    assert len(changes) == 2
+    assert watcher.config.IDLE_TIME == config.IDLE_TIME + 2
+
+
+def test_modified_config_file_is_applied(tmp_path: Path) -> None:
+    config_path = tmp_path.joinpath("config.yml")
+    config_path.write_text(yaml.safe_dump({"HOME_PAGE": "https://example.com/1"}), encoding="UTF-8")
+    config = get_config("chromium_kiosk.config.Config", [config_path])
+    changes: list[ConfigSnapshot] = []
+    watcher = ConfigWatcher(
+        config,
+        lambda previous: get_config("chromium_kiosk.config.Config", [config_path], previous),
+        lambda _previous, new_config, _changed_sections: changes.append(new_config),
+    )
+    watcher.start([config_path])
+    try:
+        config_path.write_text(yaml.safe_dump({"HOME_PAGE": "https://example.com/2"}), encoding="UTF-8")
+        deadline = time.monotonic() + 5
+        while not changes and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        watcher.stop()
+
+    assert [change.HOME_PAGE for change in changes] == ["https://example.com/2"]
+
+
+def test_send_commands_uses_single_connection() -> None:
+    config = ConfigSnapshot.from_object(Config)
+    diffs = Qiosk.diff_command_mappings_config_value(
+        Qiosk.resolve_command_mappings_config(config),
+        Qiosk.resolve_command_mappings_config(config.replace(HOME_PAGE="https://example.com/", IDLE_TIME=30)),
+    )
+    with FakeControl() as control:
+        responses = Qiosk.send_commands(f"ws://127.0.0.1:{control.port}", diffs)
+
+    assert [json.loads(response) for response in responses] == [{"status": "ok"}] * 3
+    assert control.messages == [
+        ("setHomePage", {"homePageUrl": "https://example.com/"}),
+        ("setUrl", {"url": "https://example.com/"}),
+        ("setIdleTime", {"idleTime": 30}),
+    ]
+    assert len(control.connections) == 1
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from chromium_kiosk.enum.HeartbeatActionEnum import HeartbeatActionEnum
+from chromium_kiosk.tools.DevTools import DevTools
+from chromium_kiosk.tools.Heartbeat import Heartbeat, HeartbeatSettings
+from chromium_kiosk.tools.LatencyHistogram import LatencyHistogram
+from tests.fake_devtools import FakeDevTools, serve
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from tests.fake_devtools import FakeWebSocketConnection
+
+HEARTBEAT_TIMEOUT = 0.2
+
+
+class StallingDevTools(FakeDevTools):
+    """
+    Page main thread can be frozen, evaluations are then never answered
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.frozen = False
+        self.handlers["Runtime.evaluate"] = self._evaluate
+
+    def _evaluate(self, _connection: FakeWebSocketConnection, _params: dict[str, Any]) -> dict[str, Any] | None:
+        if self.frozen:
+            return None
+        return {"result": {"type": "number", "value": 1}}
+
+
+@pytest.fixture
+def devtools() -> Iterator[StallingDevTools]:
+    yield from serve(StallingDevTools())
+
+
+def test_histogram_percentiles() -> None:
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.observe(0.003)
+    for _ in range(10):
+        histogram.observe(0.7)
+
+    assert histogram.percentile(50) == 0.005  # noqa: PLR2004
+    assert histogram.percentile(99) == 1.0
+    metrics = histogram.to_dict()
+    assert metrics["count"] == 100
+    assert metrics["max"] == 0.7  # noqa: PLR2004
+    assert sum(metrics["buckets"].values()) == 100
+    assert LatencyHistogram().percentile(50) is None
+
+
+def test_stalls_are_escalated(devtools: StallingDevTools) -> None:
+    restarts: list[bool] = []
+    heartbeat = Heartbeat(
+        lambda: DevTools(devtools.port),
+        "http://localhost/home",
+        lambda: restarts.append(True),
+        HeartbeatSettings(timeout=HEARTBEAT_TIMEOUT, reload_after=1, home_after=2, restart_after=3),
+    )
+    assert heartbeat.check() is not None
+
+    devtools.frozen = True
+    for _ in range(3):
+        assert heartbeat.check() is None
+
+    assert "Page.reload" in devtools.methods()
+    assert ("Page.navigate", {"url": "http://localhost/home"}) in devtools.messages
+    assert restarts == [True]
+    assert heartbeat.actions == {action.value: 1 for action in HeartbeatActionEnum}
+
+    # Restarted browser is not escalated before it responds
+    heartbeat.check()
+    assert heartbeat.stalls == 0
+
+    devtools.frozen = False
+    assert heartbeat.check() is not None
+    assert heartbeat.latency.count == 5
+    assert heartbeat.latency.max >= HEARTBEAT_TIMEOUT
+
+
+def test_recovered_page_resets_stalls(devtools: StallingDevTools) -> None:
+    heartbeat = Heartbeat(lambda: DevTools(devtools.port), "http://localhost/", lambda: None, HeartbeatSettings(timeout=HEARTBEAT_TIMEOUT))
+    heartbeat.check()
+    devtools.frozen = True
+    heartbeat.check()
+    devtools.frozen = False
+    heartbeat.check()
+    devtools.frozen = True
+    heartbeat.check()
+
+    assert heartbeat.stalls == 1
+    assert "Page.reload" not in devtools.methods()
+
+
+def test_settings_from_config() -> None:
+    settings = HeartbeatSettings.from_config({"ENABLED": True, "TIMEOUT": 1, "RESTART_AFTER": "10"})
+    assert settings == HeartbeatSettings(timeout=1.0, restart_after=10)
+    assert isinstance(settings.timeout, float)
+
+
+def test_unreachable_devtools_is_not_escalated(tmp_path: Path) -> None:
+    restarts: list[bool] = []
+    heartbeat = Heartbeat(lambda: DevTools(1, timeout=0.1), "http://localhost/", lambda: restarts.append(True), HeartbeatSettings(restart_after=1), metrics_path=tmp_path / "heartbeat.json")
+    heartbeat.check()
+    assert not restarts
+
+    heartbeat.write_metrics()
+    assert Heartbeat.read_metrics(tmp_path / "heartbeat.json")["latency"]["count"] == 0
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import bz2
+import datetime as dt
+import gzip
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+
+from chromium_kiosk.tools.LogAnalyzer import LogReader, LogSummary, find_log_files
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+OLD_LOG = b"""I1017 23:59:58.001 100 Qiosk.py:281] Starting
+W1017 23:59:59.500 100 Qiosk.py:286] Qiosk (pid 200) exited with code 1
+"""
+
+ROTATED_LOG = b"""I1018 10:00:00.000 100 chromium_kiosk.py:331] Kiosk started
+E1018 10:15:00.000 100 Heartbeat.py:126] Heartbeat action reload failed
+Traceback (most recent call last):
+  File "Heartbeat.py", line 117, in escalate
+chromium_kiosk.tools.DevTools.DevToolsError: Failed to connect
+W1018 10:20:00.000 100 Heartbeat.py:113] Page did not respond to 6 heartbeats, running restart
+I1018 10:20:00.100 100 Qiosk.py:303] Restarting qiosk (pid 200)
+D1018 11:01:00.000 100 Heartbeat.py:142] Heartbeat failed before page responded first time
+"""
+
+CURRENT_LOG = b"""I1019 08:00:00.000 300 QioskSupervisor.py:227] Applying changed config sections: HOME_PAGE
+E1019 08:30:00.000 300 Playlist.py:90] Preloading failed
+"""
+
+
+def local_timestamp(value: str, year: int = 2026) -> float:
+    return dt.datetime.strptime(f"{year} {value}", "%Y %m%d %H:%M:%S").astimezone().timestamp()
+
+
+def write_log(path: Path, data: bytes, modified: str, year: int = 2026) -> None:
+    path.write_bytes(data)
+    os.utime(path, (local_timestamp(modified, year), local_timestamp(modified, year)))
+
+
+@pytest.fixture
+def log_dir(tmp_path: Path) -> Path:
+    write_log(tmp_path.joinpath("chromium_kiosk_kiosk.log.2026-10-17.bz2"), bz2.compress(OLD_LOG), "1018 00:00:00")
+    write_log(tmp_path.joinpath("chromium_kiosk_kiosk.log.2026-10-18.gz"), gzip.compress(ROTATED_LOG), "1019 00:00:00")
+    write_log(tmp_path.joinpath("chromium_kiosk_kiosk.log"), CURRENT_LOG, "1019 08:30:00")
+    tmp_path.joinpath("unrelated.log").write_bytes(b"E1019 08:00:00.000 1 x.py:1] not ours\n")
+    return tmp_path
+
+
+def test_logs_are_read_oldest_first(log_dir: Path) -> None:
+    paths = find_log_files(log_dir)
+    assert [path.name for path in paths] == [
+        "chromium_kiosk_kiosk.log.2026-10-17.bz2",
+        "chromium_kiosk_kiosk.log.2026-10-18.gz",
+        "chromium_kiosk_kiosk.log",
+    ]
+    lines = list(LogReader(paths).lines())
+    assert len(lines) == OLD_LOG.count(b"\n") + ROTATED_LOG.count(b"\n") + CURRENT_LOG.count(b"\n")
+    assert lines[0].startswith(b"I1017")
+
+
+def test_level_time_and_source_filters(log_dir: Path) -> None:
+    paths = find_log_files(log_dir, "kiosk")
+    errors = list(LogReader(paths, "error").lines())
+    # Traceback belongs to the error entry
+    assert errors[0].startswith(b"E1018 10:15")
+    assert errors[3].startswith(b"chromium_kiosk.tools.DevTools.DevToolsError")
+    assert errors[4].startswith(b"E1019 08:30")
+
+    window = list(LogReader(paths, since=local_timestamp("1018 10:16:00"), until=local_timestamp("1018 12:00:00")).lines())
+    assert [line[:14] for line in window] == [b"W1018 10:20:00", b"I1018 10:20:00", b"D1018 11:01:00"]
+
+    heartbeat = list(LogReader(paths, "warning", sources=["Heartbeat.py"]).lines())
+    assert len(heartbeat) == 5
+    assert all(b"Heartbeat.py" in line for line in heartbeat if line[:1] in b"WE")  # noqa: PLR2004
+    assert list(LogReader(paths, sources=["Qiosk.py:303"]).lines()) == [b"I1018 10:20:00.100 100 Qiosk.py:303] Restarting qiosk (pid 200)\n"]
+
+    with pytest.raises(ValueError, match="Unknown level"):
+        LogReader(paths, "verbose")
+
+
+def test_old_files_are_skipped_by_modification_time(log_dir: Path) -> None:
+    old_path = log_dir.joinpath("chromium_kiosk_kiosk.log.2026-10-17.bz2")
+    old_path.write_bytes(b"not even bz2")
+    os.utime(old_path, (local_timestamp("1017 23:59:59"), local_timestamp("1017 23:59:59")))
+    lines = list(LogReader(find_log_files(log_dir), since=local_timestamp("1018 00:00:00")).lines())
+    assert lines[0].startswith(b"I1018")
+
+
+def test_summary_per_hour(log_dir: Path) -> None:
+    summary = LogSummary().consume(LogReader(find_log_files(log_dir)).lines()).to_dict()
+    assert list(summary["hours"]) == ["10-17 23:00", "10-18 10:00", "10-18 11:00", "10-19 08:00"]
+    assert summary["hours"]["10-17 23:00"]["crashes"] == 1
+    assert summary["hours"]["10-18 10:00"] == {"entries": 4, "warnings": 1, "errors": 1, "crashes": 0, "restarts": 1, "config_applies": 0}
+    assert summary["totals"]["config_applies"] == 1
+    assert summary["totals"]["errors"] == 2
+    assert summary["errors_per_hour"] == 0.5  # noqa: PLR2004
+
+
+def test_time_window_over_new_year(tmp_path: Path) -> None:
+    write_log(tmp_path.joinpath("chromium_kiosk_kiosk.log.2026-12-31"), b"I1231 23:59:00.000 1 Qiosk.py:1] Old year\n", "1231 23:59:00")
+    write_log(
+        tmp_path.joinpath("chromium_kiosk_kiosk.log"),
+        b"I1231 23:59:30.000 1 Qiosk.py:1] Before midnight\nI0101 00:01:00.000 1 Qiosk.py:1] New year\n",
+        "0101 00:01:00",
+        2027,
+    )
+    reader = LogReader(find_log_files(tmp_path), since=local_timestamp("1231 23:59:10"), until=local_timestamp("0101 00:05:00", 2027))
+    assert [line[:14] for line in reader.lines()] == [b"I1231 23:59:30", b"I0101 00:01:00"]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, cast
+
+import pytest
+
+from chromium_kiosk.enum.HeartbeatActionEnum import HeartbeatActionEnum
+from chromium_kiosk.enum.HistoryMetricEnum import HistoryMetricEnum
+from chromium_kiosk.tools.MetricsHistory import HEADER_SIZE, RECORD, WRITTEN, WRITTEN_OFFSET, MetricsHistory, parse_time
+from chromium_kiosk.tools.MetricsSampler import MetricsSampler
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from chromium_kiosk.tools.Heartbeat import Heartbeat
+
+
+def test_ring_overwrites_oldest_records(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("history.bin")
+    with MetricsHistory(path, capacity=4) as history:
+        for i in range(10):
+            history.record(HistoryMetricEnum.BROWSER_RSS, i, timestamp=1000 + i)
+
+    assert path.stat().st_size == HEADER_SIZE + 4 * RECORD.size
+    with MetricsHistory(path, readonly=True) as history:
+        assert [record.value for record in history.records()] == [6, 7, 8, 9]
+        assert [record.sequence for record in history.records()] == [7, 8, 9, 10]
+
+
+def test_time_range_and_metric_query(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("history.bin")
+    with MetricsHistory(path, capacity=100) as history:
+        for i in range(50):
+            metric = HistoryMetricEnum.BROWSER_RESTART if i % 10 == 0 else HistoryMetricEnum.BROWSER_PSS
+            history.record(metric, i, timestamp=1000 + i)
+
+    with MetricsHistory(path, readonly=True) as history:
+        assert [record.value for record in history.records(since=1012, until=1015)] == [12, 13, 14, 15]
+        assert [record.value for record in history.records(since=1005, metrics=[HistoryMetricEnum.BROWSER_RESTART])] == [10, 20, 30, 40]
+        assert list(history.records(since=2000)) == []
+
+
+def test_torn_record_is_skipped_and_header_is_repaired(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("history.bin")
+    with MetricsHistory(path, capacity=8) as history:
+        for i in range(5):
+            history.record(HistoryMetricEnum.BROWSER_CPU, i, timestamp=1000 + i)
+
+    data = bytearray(path.read_bytes())
+    # Header lost the last two records, the second record is torn
+    WRITTEN.pack_into(data, WRITTEN_OFFSET, 3)
+    data[HEADER_SIZE + RECORD.size + 20] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with MetricsHistory(path, capacity=8) as history:
+        assert history.written == 5
+        assert [record.value for record in history.records()] == [0, 2, 3, 4]
+
+
+def test_existing_file_is_never_resized(tmp_path: Path) -> None:
+    path = tmp_path.joinpath("history.bin")
+    with MetricsHistory(path, capacity=8) as history, MetricsHistory(path, capacity=16) as other:
+        history.record(HistoryMetricEnum.PAGE_LOAD, 1.5)
+        # Other process with changed config shares the mapped file
+        assert other.capacity == 8
+        other.record(HistoryMetricEnum.PAGE_LOAD, 2.5)
+        assert [record.value for record in history.records()] == [1.5, 2.5]
+    assert path.stat().st_size == HEADER_SIZE + 8 * RECORD.size
+    path.write_bytes(b"garbage")
+    with pytest.raises(ValueError, match="not a metrics history"):
+        MetricsHistory(path, readonly=True)
+
+
+def test_parse_time() -> None:
+    assert parse_time("90s", now=1000) == 910
+    assert parse_time("2h", now=10000) == 2800
+    assert parse_time("2026-10-19T10:00:00+00:00") == 1792404000
+    with pytest.raises(ValueError, match="Invalid time"):
+        parse_time("yesterday")
+
+
+class FakeHeartbeat:
+    def __init__(self) -> None:
+        self.actions = {action.value: 0 for action in HeartbeatActionEnum}
+
+
+def test_sampler_records_restarts_and_recoveries(tmp_path: Path) -> None:
+    pids = [os.getpid()]
+    heartbeat = FakeHeartbeat()
+    with MetricsHistory(tmp_path.joinpath("history.bin"), capacity=64) as history:
+        sampler = MetricsSampler(history, lambda: pids[0], heartbeat=cast("Heartbeat", heartbeat))
+        sampler.sample()
+        heartbeat.actions["reload"] += 2
+        pids[0] = os.getppid()
+        sampler.sample()
+        records = list(history.records())
+
+    metrics = [record.metric for record in records]
+    assert metrics.count(HistoryMetricEnum.BROWSER_RSS) == 2
+    assert [record.value for record in records if record.metric == HistoryMetricEnum.BROWSER_RESTART] == [os.getppid()]
+    assert [record.value for record in records if record.metric == HistoryMetricEnum.PAGE_RELOAD] == [2]
+    # CPU usage needs two samples of the same browser process
+    assert HistoryMetricEnum.BROWSER_CPU not in metrics
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from chromium_kiosk.config import Config
+from chromium_kiosk.config_loader import get_config
+from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+from chromium_kiosk.enum.PerformanceProfileEnum import PerformanceProfileEnum
+from chromium_kiosk.Qiosk import Qiosk
+from chromium_kiosk.tools.PerformanceProfile import PRESETS, merge_chromium_flags, resolve_tuning
+from chromium_kiosk.tools.ProfileBenchmark import ProfileBenchmark
+from tests.fake_devtools import FakeDevTools
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any
+
+    from tests.fake_devtools import FakeWebSocketConnection
+
+
+def test_every_profile_has_preset() -> None:
+    assert set(PRESETS) == set(PerformanceProfileEnum)
+
+
+def test_later_flags_override_and_feature_lists_are_joined() -> None:
+    flags = merge_chromium_flags(
+        ["--renderer-process-limit=1", "--disable-features=A,B", "--process-per-site"],
+        ["--renderer-process-limit=3", "--disable-features=B,C", "--disable-pinch"],
+    )
+    assert flags == ["--process-per-site", "--renderer-process-limit=3", "--disable-features=A,B,C", "--disable-pinch"]
+
+
+def test_enabled_feature_is_removed_from_disabled_ones() -> None:
+    flags, _env = resolve_tuning("low-memory", "--enable-features=BackForwardCache:TimeToLiveInBackForwardCacheInSeconds/60", {})
+    assert flags is not None
+    assert "--disable-features=MediaRouter" in flags.split()
+    assert "--enable-features=BackForwardCache:TimeToLiveInBackForwardCacheInSeconds/60" in flags.split()
+
+    flags, _env = resolve_tuning("low-latency-touch", "--enable-features=TouchpadOverscrollHistoryNavigation", {})
+    assert flags is not None
+    assert not [flag for flag in flags.split() if flag.startswith("--disable-features")]
+
+
+def test_unknown_profile_is_dropped_at_config_load(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    config_path = tmp_path.joinpath("config.yml")
+    config_path.write_text("PERFORMANCE_PROFILE: low-mem\n", encoding="UTF-8")
+    config = get_config("chromium_kiosk.config.Config", [config_path])
+    assert config.PERFORMANCE_PROFILE is None
+    assert "Unknown PERFORMANCE_PROFILE low-mem" in caplog.text
+
+
+def test_user_overrides_win_over_profile() -> None:
+    flags, env = resolve_tuning(
+        "low-latency-touch",
+        "--touch-events=disabled",
+        {"QTWEBENGINE_CHROMIUM_FLAGS": "--enable-zero-copy", "QT_XCB_NO_XI2_MOUSE": "1"},
+    )
+    assert flags is not None
+    assert "--touch-events=disabled" in flags.split()
+    assert "--touch-events=enabled" not in flags.split()
+    assert "--enable-zero-copy" in flags.split()
+    assert env == {"QT_XCB_NO_XI2_MOUSE": "1"}
+
+    assert resolve_tuning(None, None, {}) == (None, {})
+    with pytest.raises(ValueError, match="not-a-profile"):
+        resolve_tuning("not-a-profile", None, {})
+
+
+def test_qiosk_env_contains_profile_flags(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("chromium_kiosk.Qiosk.find_binary", lambda _names: "/usr/bin/qiosk")
+    config = ConfigSnapshot.from_object(Config, {"PERFORMANCE_PROFILE": "gpu-raster", "EXTRA_ARGUMENTS": "--num-raster-threads=4"})
+    flags = Qiosk(config)._build_env()["QTWEBENGINE_CHROMIUM_FLAGS"].split()  # noqa: SLF001
+    assert "--enable-gpu-rasterization" in flags
+    assert "--num-raster-threads=4" in flags
+    assert "--num-raster-threads=2" not in flags
+    assert "PERFORMANCE_PROFILE" in Qiosk.restart_required_sections
+
+
+def test_benchmark_runs_every_profile() -> None:
+    spawned: list[str | None] = []
+
+    def spawn(config: ConfigSnapshot, _port: int) -> subprocess.Popen[bytes]:
+        spawned.append(config.PERFORMANCE_PROFILE)
+        return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+
+    def evaluate(_connection: FakeWebSocketConnection, params: dict[str, Any]) -> dict[str, Any]:
+        value = 60 if params.get("awaitPromise") else 250
+        return {"result": {"type": "number", "value": value}}
+
+    with FakeDevTools() as devtools:
+        devtools.handlers["Runtime.evaluate"] = evaluate
+        results = ProfileBenchmark(ConfigSnapshot.from_object(Config), devtools.port, duration=0.2, spawn=spawn, sample_interval=0.05).run()
+
+    assert spawned == [None, *(profile.value for profile in PerformanceProfileEnum)]
+    for result in results:
+        assert result.error is None
+        assert result.load_time == 0.25  # noqa: PLR2004
+        assert result.frame_rate == 60
+        assert result.latency["count"] > 0
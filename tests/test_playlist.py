@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import datetime as dt
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+
+import pytest
+import yaml
+
+from chromium_kiosk.tools.DevTools import DevTools
+from chromium_kiosk.tools.Playlist import Playlist, PlaylistItem
+from tests.fake_devtools import FakeDevTools
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from tests.fake_devtools import FakeWebSocketConnection
+
+
+class ContentServer:
+    """
+    Stand-in for signage content, every page takes a while to load
+    """
+
+    def __init__(self, load_time: float = 0.2) -> None:
+        self.requests: list[str] = []
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ANN401
+                pass
+
+            def do_GET(self) -> None:
+                server.requests.append(self.path)
+                time.sleep(load_time)
+                body = f"<html><body>{self.path}</body></html>".encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def load(self, url: str) -> None:
+        with urllib.request.urlopen(url) as response:  # noqa: S310
+            response.read()
+
+
+@pytest.fixture
+def content() -> Iterator[ContentServer]:
+    server = ContentServer()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+@pytest.fixture
+def devtools(content: ContentServer) -> Iterator[FakeDevTools]:
+    with FakeDevTools() as fake:
+        # Pages are loaded from content server, like browser would do
+        def create_target(_connection: FakeWebSocketConnection, params: dict[str, Any]) -> dict[str, Any]:
+            content.load(params["url"])
+            return {"targetId": fake.add_target(params["url"])["id"]}
+
+        def navigate(connection: FakeWebSocketConnection, params: dict[str, Any]) -> dict[str, Any]:
+            content.load(params["url"])
+            return fake._navigate(connection, params)  # noqa: SLF001
+
+        fake.handlers["Target.createTarget"] = create_target
+        fake.handlers["Page.navigate"] = navigate
+        yield fake
+
+
+def test_item_time_window() -> None:
+    item = PlaylistItem.from_config({"URL": "http://localhost/", "DURATION": 10, "FROM": "22:00", "TO": "06:00"})
+    assert item.is_active(dt.time(23, 30))
+    assert item.is_active(dt.time(5, 0))
+    assert not item.is_active(dt.time(12, 0))
+    assert PlaylistItem.from_config({"URL": "http://localhost/"}).is_active(dt.time(12, 0))
+
+
+def test_item_time_window_loaded_from_unquoted_yaml() -> None:
+    # YAML 1.1 loads unquoted 06:00 as base 60 integer
+    item = PlaylistItem.from_config(yaml.safe_load("URL: http://localhost/\nFROM: 06:00\nTO: 11:30\n"))
+    assert (item.time_from, item.time_to) == (dt.time(6, 0), dt.time(11, 30))
+    with pytest.raises(ValueError, match="TO"):
+        PlaylistItem.from_config({"URL": "http://localhost/", "TO": "noon"})
+
+
+def test_next_item_skips_inactive_items() -> None:
+    items = [
+        PlaylistItem("http://localhost/a", 10),
+        PlaylistItem("http://localhost/breakfast", 10, dt.time(6), dt.time(11)),
+        PlaylistItem("http://localhost/c", 10),
+    ]
+    playlist = Playlist(items, lambda: DevTools(0), now=lambda: dt.datetime(2024, 1, 1, 12, 0, tzinfo=dt.timezone.utc))
+    assert playlist.next_item(0) == (2, items[2])
+    assert playlist.next_item(2) == (0, items[0])
+
+
+def test_preloaded_item_is_swapped_in_without_load(content: ContentServer, devtools: FakeDevTools) -> None:
+    items = [PlaylistItem(f"{content.url}/a", 10), PlaylistItem(f"{content.url}/b", 10)]
+    playlist = Playlist(items, lambda: DevTools(devtools.port))
+
+    playlist.show_item(items[0])
+    playlist.preload_item(items[1])
+    assert content.requests == ["/a", "/b"]
+    assert playlist.stats.preload_memory == 1000000
+
+    gap = playlist.show_item(items[1])
+    # No page load on swap
+    assert content.requests == ["/a", "/b"]
+    assert gap < 0.2  # noqa: PLR2004
+    assert devtools.targets[0]["url"] == f"{content.url}/b"
+    assert len(devtools.targets) == 1
+    assert playlist.stats.to_dict()["preloaded_transitions"] == 1
+    assert playlist.stats.preload_memory == 0
+
+
+def test_number_of_preloaded_pages_is_capped(content: ContentServer, devtools: FakeDevTools) -> None:
+    items = [PlaylistItem(f"{content.url}/{name}", 10) for name in "abc"]
+    playlist = Playlist(items, lambda: DevTools(devtools.port), max_preloaded=1)
+
+    playlist.preload_item(items[1])
+    playlist.preload_item(items[2])
+    assert [page.item for page in playlist.preloaded] == [items[2]]
+    assert [target["url"] for target in devtools.targets] == ["about:blank", items[2].url]
+
+
+def test_prefetch_when_targets_are_not_supported(content: ContentServer, devtools: FakeDevTools) -> None:
+    del devtools.handlers["Target.createTarget"]
+    items = [PlaylistItem(f"{content.url}/a", 10), PlaylistItem(f"{content.url}/b", 10)]
+    playlist = Playlist(items, lambda: DevTools(devtools.port))
+
+    playlist.preload_item(items[1])
+    assert not playlist.preloaded
+    assert "Runtime.evaluate" in devtools.methods()
+
+    playlist.show_item(items[1])
+    assert devtools.targets[0]["url"] == items[1].url
+    assert playlist.stats.to_dict()["preloaded_transitions"] == 0
+
+
+def test_visible_item_is_not_reloaded(content: ContentServer, devtools: FakeDevTools) -> None:
+    # Consecutive items with the same page, like playlist of single item
+    items = [PlaylistItem(f"{content.url}/a", 0.3), PlaylistItem(f"{content.url}/a", 0.2)]
+    playlist = Playlist(items, lambda: DevTools(devtools.port), preload=0.1)
+    thread = threading.Thread(target=playlist.run, daemon=True)
+    thread.start()
+    time.sleep(1.5)
+    playlist.stop()
+    thread.join(5)
+
+    assert content.requests == ["/a"]
+    assert devtools.methods().count("Page.navigate") == 1
+    assert playlist.stats.transitions == 1
+
+
+def test_run_preloads_before_slot(content: ContentServer, devtools: FakeDevTools) -> None:
+    items = [PlaylistItem(f"{content.url}/a", 0.6), PlaylistItem(f"{content.url}/b", 0.6)]
+    playlist = Playlist(items, lambda: DevTools(devtools.port), preload=0.4)
+    thread = threading.Thread(target=playlist.run, daemon=True)
+    thread.start()
+    time.sleep(1.5)
+    playlist.stop()
+    thread.join(5)
+
+    assert content.requests[:3] == ["/a", "/b", "/a"]
+    stats = playlist.stats.to_dict()
+    assert stats["transitions"] >= 2
+    assert stats["preloaded_transitions"] == stats["transitions"] - 1
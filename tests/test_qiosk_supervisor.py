@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from chromium_kiosk.config import Config
+from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+from chromium_kiosk.QioskSupervisor import QioskInstance, QioskSupervisor
+from tests.fake_devtools import FakeServer, FakeWebSocketConnection
+
+
+class FakeQiosk:
+    def __init__(self, config: ConfigSnapshot) -> None:
+        self.config = config
+        self.spawned: list[tuple[str | None, int | None, int | None]] = []
+        self.states: list[dict[str, Any]] = []
+        self.processes: list[subprocess.Popen[bytes]] = []
+
+    def spawn(self, window_mode: str | None = None, control_port: int | None = None, remote_debugging_port: int | None = None) -> subprocess.Popen[bytes]:
+        self.spawned.append((window_mode, control_port, remote_debugging_port))
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        self.processes.append(process)
+        return process
+
+    def write_instance_state(self, state: dict[str, Any]) -> None:
+        self.states.append(state)
+
+    def supports_option(self, option: str) -> bool:
+        return option == "--remote-control-port"
+
+    @property
+    def executable_path(self) -> str:
+        return "qiosk"
+
+
+class DroppingControl(FakeServer):
+    """
+    Remote control of instance shutting down, connection is dropped on setWindowMode
+    """
+
+    def on_message(self, connection: FakeWebSocketConnection, message: dict[str, Any]) -> None:
+        self.messages.append((message["command"], message["data"]))
+        if message["command"] == "setWindowMode":
+            connection.sock.shutdown(socket.SHUT_RDWR)
+            raise ConnectionError
+        connection.send_json({"status": "ok"})
+
+
+def wait_for(condition: Any, timeout: float = 5) -> None:  # noqa: ANN401
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_standby_is_promoted_when_visible_instance_exits(monkeypatch: pytest.MonkeyPatch) -> None:
+    commands: list[tuple[int, str, dict[str, Any]]] = []
+    monkeypatch.setattr(QioskInstance, "wait_ready", lambda _self, _timeout: True)
+    monkeypatch.setattr(QioskInstance, "send_command", lambda self, command, data: commands.append((self.control_port, command, data)))
+    monkeypatch.setattr("chromium_kiosk.QioskSupervisor.ProcessTree.pss", lambda _self: 1024)
+
+    config = ConfigSnapshot.from_object(Config, {"REMOTE_DEBUGGING": 9000})
+    qiosk = FakeQiosk(config)
+    supervisor = QioskSupervisor(qiosk, 1792, warmup=0)  # type: ignore[arg-type]
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
+    try:
+        wait_for(lambda: supervisor.standby is not None and supervisor.standby_memory == 1024)
+        assert qiosk.spawned == [(None, 1791, 9000), ("hidden", 1792, 9001)]
+        first_primary, first_standby = supervisor.primary, supervisor.standby
+        assert first_primary
+        assert first_standby
+
+        # Config changed while standby was waiting, it has to be applied on promotion
+        supervisor.qiosk.config = config.replace(HOME_PAGE="https://example.com/")
+        first_primary.process.kill()
+
+        wait_for(lambda: supervisor.primary is first_standby and supervisor.standby is not None)
+        assert supervisor.restarts == 1
+        assert commands[0] == (1792, "setWindowMode", {"windowMode": "fullscreen"})
+        assert {command for _, command, _ in commands[1:]} == {"setHomePage", "setUrl"}
+        assert qiosk.spawned[2] == ("hidden", 1791, 9000)
+        wait_for(lambda: qiosk.states[-1]["control_port"] == 1792)
+    finally:
+        supervisor.stop()
+        thread.join(5)
+
+
+def test_restart_required_change_replaces_visible_instance(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(QioskInstance, "wait_ready", lambda _self, _timeout: True)
+    monkeypatch.setattr(QioskInstance, "send_command", lambda _self, _command, _data: None)
+    monkeypatch.setattr("chromium_kiosk.QioskSupervisor.ProcessTree.pss", lambda _self: 1024)
+
+    config = ConfigSnapshot.from_object(Config)
+    qiosk = FakeQiosk(config)
+    supervisor = QioskSupervisor(qiosk, 1792, warmup=0)  # type: ignore[arg-type]
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
+    try:
+        wait_for(lambda: supervisor.standby is not None)
+        old_primary, old_standby = supervisor.primary, supervisor.standby
+        assert old_primary
+        assert old_standby
+
+        supervisor.apply_config(config.replace(IDLE_TIME=10))
+        assert supervisor.primary is old_primary  # Applied live, no restart
+
+        supervisor.apply_config(config.replace(EXTRA_ARGUMENTS="--disable-pinch"))
+        assert supervisor.primary is not old_primary
+        assert supervisor.primary
+        assert supervisor.primary.config.EXTRA_ARGUMENTS == "--disable-pinch"
+        assert not old_primary.alive
+        assert not old_standby.alive
+        wait_for(lambda: supervisor.standby is not None)
+        assert thread.is_alive()
+    finally:
+        supervisor.stop()
+        thread.join(5)
+
+
+def test_standby_is_refused_without_control_port_option(monkeypatch: pytest.MonkeyPatch) -> None:
+    qiosk = FakeQiosk(ConfigSnapshot.from_object(Config))
+    monkeypatch.setattr(qiosk, "supports_option", lambda _option: False)
+    with pytest.raises(ValueError, match="--remote-control-port"):
+        QioskSupervisor(qiosk, 1792)  # type: ignore[arg-type]
+    assert not qiosk.spawned
+
+
+def test_failed_promotion_keeps_visible_instance(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("chromium_kiosk.QioskSupervisor.ProcessTree.pss", lambda _self: 1024)
+    config = ConfigSnapshot.from_object(Config)
+    qiosk = FakeQiosk(config)
+    with DroppingControl() as control:
+        # Replacement and standby use the second slot with dropping control server
+        supervisor = QioskSupervisor(qiosk, control.port, warmup=1)  # type: ignore[arg-type]
+        thread = threading.Thread(target=supervisor.run, daemon=True)
+        thread.start()
+        try:
+            wait_for(lambda: supervisor.standby is not None)
+            old_primary = supervisor.primary
+            supervisor.restart()
+            replacement = qiosk.processes[2]
+
+            assert supervisor.primary is old_primary
+            assert old_primary
+            assert old_primary.alive
+            assert replacement.poll() is not None
+            assert ("setWindowMode", {"windowMode": config.WINDOW_MODE}) in control.messages
+            assert thread.is_alive()
+        finally:
+            supervisor.stop()
+            thread.join(5)
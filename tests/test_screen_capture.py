@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import base64
+import struct
+import urllib.error
+import urllib.request
+from typing import TYPE_CHECKING, Any
+
+from chromium_kiosk.tools.DevTools import DevTools
+from chromium_kiosk.tools.ScreenCapture import (
+    DevToolsFrameSource,
+    GrayImage,
+    ScreenCapture,
+    X11FrameSource,
+    decode_png,
+    difference_hash,
+    encode_png,
+    hamming_distance,
+)
+from chromium_kiosk.tools.ScreenCaptureServer import ScreenCaptureServer
+from tests.fake_devtools import FakeDevTools
+
+if TYPE_CHECKING:
+    from tests.fake_devtools import FakeWebSocketConnection
+
+WIDTH = 72
+HEIGHT = 40
+HTTP_NOT_MODIFIED = 304
+
+
+def gradient_rows(width: int = WIDTH, height: int = HEIGHT, *, box: bool = False) -> list[bytes]:
+    rows = []
+    for y in range(height):
+        row = bytearray()
+        for x in range(width):
+            value = x * 255 // width
+            if box and x < width // 2 and y < height // 2:
+                value = 255 - value
+            row += bytes((value, value // 2, 255 - value))
+        rows.append(bytes(row))
+    return rows
+
+
+class FakeSource:
+    def __init__(self) -> None:
+        self.rows = gradient_rows()
+        self.frames = 0
+
+    def thumbnail(self) -> GrayImage:
+        return decode_png(encode_png(WIDTH, HEIGHT, self.rows))
+
+    def frame(self) -> tuple[bytes, bytes, str]:
+        self.frames += 1
+        png = encode_png(WIDTH, HEIGHT, self.rows)
+        return png, png[:100], "image/png"
+
+
+def test_png_roundtrip() -> None:
+    image = decode_png(encode_png(WIDTH, HEIGHT, gradient_rows()))
+    assert (image.width, image.height) == (WIDTH, HEIGHT)
+    # Red channel grows, blue falls, luma of first pixel is mostly blue
+    assert image.pixels[0] == (0 * 299 + 0 * 587 + 255 * 114) // 1000
+
+
+def test_hash_ignores_small_changes() -> None:
+    original = gradient_rows()
+    noisy = [bytes(min(value + 3, 255) for value in row) for row in original]
+    changed = gradient_rows(box=True)
+
+    original_hash = difference_hash(decode_png(encode_png(WIDTH, HEIGHT, original)))
+    assert hamming_distance(original_hash, difference_hash(decode_png(encode_png(WIDTH, HEIGHT, noisy)))) == 0
+    assert hamming_distance(original_hash, difference_hash(decode_png(encode_png(WIDTH, HEIGHT, changed)))) > 5
+
+
+def test_parse_xwd() -> None:
+    # 32 bit BGRX pixels, least significant byte first, as dumped from usual X server
+    header_size = 100 + 8
+    header = struct.pack(
+        ">25I",
+        header_size, 7, 2, 24, 2, 1, 0, 0, 32, 0, 32, 32, 8, 4, 0xFF0000, 0xFF00, 0xFF, 8, 0, 0, 2, 1, 0, 0, 0,
+    )
+    pixels = bytes((3, 2, 1, 0, 30, 20, 10, 0))
+    width, height, rows = X11FrameSource.parse_xwd(header + b"root\x00\x00\x00\x00" + pixels)
+    assert (width, height) == (2, 1)
+    assert rows == [bytes((1, 2, 3, 10, 20, 30))]
+
+
+def test_unchanged_frame_is_not_fetched() -> None:
+    source = FakeSource()
+    capture = ScreenCapture(source, interval=1, threshold=5, max_duty=0.5)  # type: ignore[arg-type]
+
+    assert capture.capture()
+    assert not capture.capture()
+    assert source.frames == 1
+    assert capture.bytes_saved == len(capture.frame.png)  # type: ignore[union-attr]
+
+    source.rows = gradient_rows(box=True)
+    assert capture.capture()
+    assert capture.stats()["frames_kept"] == 2
+
+
+def test_interval_is_stretched_for_slow_capture() -> None:
+    capture = ScreenCapture(FakeSource(), interval=1, max_duty=0.1)  # type: ignore[arg-type]
+    capture.last_cost = 0.5
+    assert capture.next_interval() == 5
+    capture.last_cost = 0.01
+    assert capture.next_interval() == 1
+
+
+def test_server_sends_not_modified() -> None:
+    capture = ScreenCapture(FakeSource())  # type: ignore[arg-type]
+    capture.capture()
+    server = ScreenCaptureServer(capture, port=0)
+    server.start()
+    try:
+        url = f"http://127.0.0.1:{server.port}/screenshot.png"
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers["ETag"]
+            assert response.read() == capture.frame.png  # type: ignore[union-attr]
+
+        request = urllib.request.Request(url, headers={"If-None-Match": etag})
+        try:
+            urllib.request.urlopen(request)  # noqa: S310
+        except urllib.error.HTTPError as e:
+            assert e.code == HTTP_NOT_MODIFIED  # noqa: PT017
+        else:
+            raise AssertionError
+        assert server.not_modified_bytes_saved == len(capture.frame.png)  # type: ignore[union-attr]
+    finally:
+        server.stop()
+
+
+def test_devtools_source_downscales_in_browser() -> None:
+    with FakeDevTools() as devtools:
+        png = encode_png(WIDTH, HEIGHT, gradient_rows())
+
+        def capture_screenshot(_connection: FakeWebSocketConnection, _params: dict[str, Any]) -> dict[str, Any]:
+            return {"data": base64.b64encode(png).decode()}
+
+        devtools.handlers["Page.captureScreenshot"] = capture_screenshot
+        devtools.handlers["Page.getLayoutMetrics"] = lambda _connection, _params: {"cssVisualViewport": {"clientWidth": 1920, "clientHeight": 1080}}
+
+        source = DevToolsFrameSource(lambda: DevTools(devtools.port), variant_width=480)
+        assert source.thumbnail().width == WIDTH
+        _, variant, variant_type = source.frame()
+        assert variant_type == "image/jpeg"
+        assert variant == png
+
+        screenshots = [params for method, params in devtools.messages if method == "Page.captureScreenshot"]
+        assert screenshots[0]["clip"]["scale"] == 36 / 1920
+        assert "clip" not in screenshots[1]
+        assert screenshots[2]["format"] == "jpeg"
+        assert screenshots[2]["clip"]["scale"] == 0.25  # noqa: PLR2004
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import sys
+import time
+
+from chromium_kiosk.Session import Session, SessionComponent
+
+SLOW_COMPONENT = 0.3
+PREHOOK_TIMEOUT = 0.2
+
+
+def test_independent_components_start_concurrently() -> None:
+    session = Session([
+        SessionComponent("slow_a", action=lambda: time.sleep(SLOW_COMPONENT)),
+        SessionComponent("slow_b", action=lambda: time.sleep(SLOW_COMPONENT)),
+        SessionComponent("after_a", action=lambda: None, depends_on=("slow_a",)),
+    ])
+    start = time.monotonic()
+    session.start()
+    assert session.wait_for(["slow_a", "slow_b", "after_a"], timeout=5)
+
+    assert time.monotonic() - start < SLOW_COMPONENT * 2
+    timeline = session.timeline
+    assert timeline["after_a"].started >= timeline["slow_a"].finished  # type: ignore[operator]
+    assert timeline["slow_b"].started < timeline["slow_a"].finished  # type: ignore[operator]
+
+
+def test_prehook_timeout_does_not_block_session() -> None:
+    session = Session([
+        SessionComponent("prehook", [sys.executable, "-c", "import time; time.sleep(30)"], wait=True, timeout=PREHOOK_TIMEOUT),
+        SessionComponent("window_manager", [sys.executable, "-c", "import time; time.sleep(30)"]),
+        SessionComponent("screen_settings", action=lambda: 1 / 0),
+    ])
+    start = time.monotonic()
+    session.start()
+    assert session.wait_for(["prehook", "window_manager", "screen_settings"], timeout=5)
+    assert time.monotonic() - start < PREHOOK_TIMEOUT + 1
+
+    assert session.timeline["prehook"].error == "timeout"
+    assert session.timeline["screen_settings"].error == "ZeroDivisionError: division by zero"
+    assert {entry["name"] for entry in session.to_dict()["components"]} == {"prehook", "window_manager", "screen_settings"}
+
+    session.stop()
+    assert all(process.poll() is not None for process in session.processes)
+
+
+def test_wait_for_times_out() -> None:
+    session = Session([SessionComponent("slow", action=lambda: time.sleep(SLOW_COMPONENT))])
+    session.start()
+    assert not session.wait_for(["slow"], timeout=0.01)
+    # Unknown components do not block
+    assert session.wait_for(["slow", "missing"], timeout=5)
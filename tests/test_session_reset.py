@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from chromium_kiosk.tools.DevTools import DevTools
+from chromium_kiosk.tools.SessionReset import SessionReset
+from tests.fake_devtools import FakeDevTools, serve
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from tests.fake_devtools import FakeWebSocketConnection
+
+
+class BrowsingDevTools(FakeDevTools):
+    """
+    Page visited by previous user, with history and embedded third party frame
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.fire_load = True
+        self.handlers.update({
+            "Page.getNavigationHistory": lambda _connection, _params: {"currentIndex": 1, "entries": [
+                {"id": 1, "url": "https://kiosk.example.com/"},
+                {"id": 2, "url": "https://shop.example.com/cart?item=1"},
+            ]},
+            "Page.getFrameTree": lambda _connection, _params: {"frameTree": {
+                "frame": {"id": "MAIN", "url": "https://shop.example.com/cart?item=1"},
+                "childFrames": [{"frame": {"id": "PAY", "url": "https://pay.example.net/form"}}, {"frame": {"id": "AD", "url": "about:blank"}}],
+            }},
+            "Network.clearBrowserCookies": lambda _connection, _params: {},
+            "Storage.clearDataForOrigin": lambda _connection, _params: {},
+            "DOMStorage.enable": lambda _connection, _params: {},
+            "DOMStorage.clear": lambda _connection, _params: {},
+            "Page.enable": lambda _connection, _params: {},
+            "Page.resetNavigationHistory": lambda _connection, _params: {},
+            "Page.navigate": self._navigate_and_load,
+        })
+
+    def _navigate_and_load(self, connection: FakeWebSocketConnection, params: dict[str, Any]) -> dict[str, Any]:
+        result = self._navigate(connection, params)
+        if self.fire_load:
+            threading.Timer(0.01, lambda: connection.send_json({"method": "Page.loadEventFired", "params": {"timestamp": 1.0}})).start()
+        return result
+
+
+@pytest.fixture
+def devtools() -> Iterator[BrowsingDevTools]:
+    yield from serve(BrowsingDevTools())
+
+
+def test_reset_clears_state_of_visited_origins(devtools: BrowsingDevTools, tmp_path: Path) -> None:
+    session_reset = SessionReset(lambda: DevTools(devtools.port), "https://kiosk.example.com/", metrics_path=tmp_path.joinpath("reset.json"))
+    result = session_reset.trigger()
+
+    assert result is not None
+    assert result.origins == ["https://kiosk.example.com", "https://pay.example.net", "https://shop.example.com"]
+    assert result.load is not None
+    assert result.load >= result.duration
+    cleared = [params["origin"] for method, params in devtools.messages if method == "Storage.clearDataForOrigin"]
+    assert cleared == result.origins
+    assert all("cookies" not in params["storageTypes"] for method, params in devtools.messages if method == "Storage.clearDataForOrigin")
+    methods = devtools.methods()
+    assert "Network.clearBrowserCache" not in methods
+    # State is cleared before home page loads, history is reset after navigation to it
+    assert methods.index("Network.clearBrowserCookies") < methods.index("Page.navigate") < methods.index("Page.resetNavigationHistory")
+    assert devtools.targets[0]["url"] == "https://kiosk.example.com/"
+    assert SessionReset.read_metrics(tmp_path.joinpath("reset.json"))["resets"] == 1
+
+
+def test_reset_reports_page_not_loading(devtools: BrowsingDevTools, tmp_path: Path) -> None:
+    devtools.fire_load = False
+    session_reset = SessionReset(lambda: DevTools(devtools.port), "https://kiosk.example.com/", load_timeout=0.1, metrics_path=tmp_path.joinpath("reset.json"))
+    result = session_reset.trigger()
+    assert result is not None
+    assert result.load is None
+
+
+def test_failed_reset_is_counted(tmp_path: Path) -> None:
+    with FakeDevTools() as devtools:
+        session_reset = SessionReset(lambda: DevTools(devtools.port), "https://kiosk.example.com/", metrics_path=tmp_path.joinpath("reset.json"))
+        assert session_reset.trigger() is None
+    assert session_reset.failures == 1
+
+
+def test_idle_kiosk_is_reset_once_per_user(monkeypatch: pytest.MonkeyPatch) -> None:
+    session_reset = SessionReset(lambda: DevTools(0), "https://kiosk.example.com/")
+    idle_times = iter([1, 50, 130, 200, 300, 5, 150, None, 160])
+    triggered = []
+    monkeypatch.setattr(session_reset, "trigger", lambda: triggered.append(True))
+
+    def idle_resolver() -> float | None:
+        try:
+            return next(idle_times)
+        except StopIteration:
+            session_reset.stop()
+            return None
+
+    session_reset.run(idle_resolver, idle_time=120, poll_interval=0)
+    assert len(triggered) == 2
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from chromium_kiosk.config import Config
+from chromium_kiosk.ConfigSnapshot import ConfigSnapshot
+from chromium_kiosk.enum.RotationEnum import RotationEnum
+from chromium_kiosk.tools.SystemInfo import SystemInfo
+from chromium_kiosk.tools.TouchDevice import TouchDevice
+from chromium_kiosk.tools.Wayland import Wayland
+
+MAX_COLLECT_DURATION = 0.6
+
+
+class HangingWindowSystem(Wayland):
+    def __init__(self) -> None:
+        self.release = threading.Event()
+
+    def detect_primary_screen(self) -> str | None:
+        self.release.wait(10)
+        return "HDMI-1"
+
+    def find_touchscreen_device(self, force_device_name: str | None = None) -> TouchDevice | None:
+        _ = force_device_name
+        return TouchDevice(name="ILITEK Multi-Touch", identifier="7")
+
+    def get_touchscreen_rotation(self, touch_device: TouchDevice) -> RotationEnum:
+        assert touch_device.identifier == "7"
+        return RotationEnum.LEFT
+
+
+def test_hanging_probe_does_not_block_collection() -> None:
+    window_system = HangingWindowSystem()
+    system_info = SystemInfo(window_system, ConfigSnapshot.from_object(Config), timeout=0.3)
+    start = time.monotonic()
+    try:
+        results = system_info.collect()
+    finally:
+        window_system.release.set()
+
+    assert time.monotonic() - start < MAX_COLLECT_DURATION
+    assert results["primary_screen"].error == "timeout"
+    assert results["screen_rotation"].error is not None
+    assert results["touchscreen_device"].value == {"name": "ILITEK Multi-Touch", "identifier": "7"}
+    assert results["touchscreen_rotation"].value == "left"
+    assert results["window_system"].value == "HangingWindowSystem"
+    assert results["memory"].value["total"] > 0
+    assert set(results) == set(system_info.labels())
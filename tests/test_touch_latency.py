@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from chromium_kiosk.tools.DevTools import DevTools
+from chromium_kiosk.tools.TouchLatency import (
+    INPUT_EVENT,
+    TouchLatencyProbe,
+    correlate,
+    parse_touch_downs,
+    parse_trace,
+    summarize,
+)
+from tests.fake_devtools import FakeDevTools, serve
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from typing_extensions import Self
+
+    from tests.fake_devtools import FakeWebSocketConnection
+
+FIXTURES_PATH = Path(__file__).parent / "fixtures"
+# Recorded on 64 bit device
+RECORDED_EVENT = struct.Struct("<qqHHi")
+TOUCHES = [100.0, 100.5, 101.0, 101.5, 102.0]
+
+
+def recorded_chunks(chunk_size: int = 100) -> Iterator[bytes]:
+    data = FIXTURES_PATH.joinpath("touch_latency_evdev.bin").read_bytes()
+    # Chunks are deliberately not aligned to events
+    for position in range(0, len(data), chunk_size):
+        yield data[position:position + chunk_size]
+
+
+def recorded_trace() -> list[dict[str, Any]]:
+    trace: dict[str, list[dict[str, Any]]] = json.loads(FIXTURES_PATH.joinpath("touch_latency_trace.json").read_text())
+    return trace["traceEvents"]
+
+
+def test_touch_downs_are_found_in_evdev_stream() -> None:
+    touches = list(parse_touch_downs(recorded_chunks(), RECORDED_EVENT))
+    # Moves and releases are ignored
+    assert touches == pytest.approx(TOUCHES)
+
+
+def test_touches_are_correlated_with_frames() -> None:
+    dispatches, frames = parse_trace(recorded_trace())
+    samples = correlate(parse_touch_downs(recorded_chunks(), RECORDED_EVENT), dispatches, frames)
+
+    assert [sample.input_latency for sample in samples] == pytest.approx([0.012, 0.015, 0.011, 0.030, 0.014], abs=1e-6)
+    assert samples[0].render_latency == pytest.approx(0.020, abs=1e-6)
+    # Last touch did not paint anything
+    assert samples[-1].frame is None
+
+    summary = summarize(samples)
+    assert summary["touches"] == len(TOUCHES)
+    assert summary["painted"] == len(TOUCHES) - 1
+    assert summary["input"]["p50"] == pytest.approx(0.014, abs=1e-6)
+    assert summary["total"]["p99"] == pytest.approx(0.052, abs=1e-6)
+
+
+class FakeEventDevice:
+    clock_offset = 0.0
+
+    def __init__(self, device_node: str) -> None:
+        assert device_node == "/dev/input/event3"
+
+    def read(self, _duration: float) -> Iterator[bytes]:
+        # Device produces events in native format
+        for event in RECORDED_EVENT.iter_unpack(b"".join(recorded_chunks())):
+            yield INPUT_EVENT.pack(*event)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_args: object) -> None:
+        pass
+
+
+class TracingDevTools(FakeDevTools):
+    """
+    Trace recorded by probe is the recorded one
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.targets[0]["url"] = "http://localhost/home"
+        trace = json.dumps({"traceEvents": recorded_trace()})
+        self.handlers.update({
+            "Tracing.start": lambda _connection, _params: {},
+            "Tracing.end": self._end,
+            "IO.read": lambda _connection, _params: {"data": trace, "eof": True},
+            "IO.close": lambda _connection, _params: {},
+        })
+
+    def _end(self, connection: FakeWebSocketConnection, _params: dict[str, Any]) -> dict[str, Any]:
+        connection.send_json({"method": "Tracing.tracingComplete", "params": {"stream": "STREAM"}})
+        return {}
+
+
+@pytest.fixture
+def devtools() -> Iterator[TracingDevTools]:
+    yield from serve(TracingDevTools())
+
+
+def test_probe_records_trace_over_devtools(devtools: TracingDevTools, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("chromium_kiosk.tools.TouchLatency.EventDevice", FakeEventDevice)
+    samples = TouchLatencyProbe(DevTools(devtools.port), "/dev/input/event3", duration=0).run()
+
+    navigations = [params["url"] for method, params in devtools.messages if method == "Page.navigate"]
+    assert navigations[0].startswith("data:text/html;base64,")
+    # Original page is restored
+    assert navigations[-1] == "http://localhost/home"
+    assert len(samples) == len(TOUCHES)
+    assert summarize(samples)["painted"] == len(TOUCHES) - 1
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import socket
+import struct
+import threading
+from pathlib import Path
+
+from chromium_kiosk.enum.HotplugDeviceEnum import HotplugDeviceEnum
+from chromium_kiosk.tools.UeventMonitor import UDEV_MONITOR_HEADER, UDEV_MONITOR_MAGIC, UeventMonitor, parse_uevent
+from chromium_kiosk.tools.Wayland import Wayland
+
+FIXTURES_DIR = Path(__file__).parent.joinpath("fixtures")
+
+
+def load_recorded_stream(name: str) -> list[list[str]]:
+    blocks: list[list[str]] = [[]]
+    for line in FIXTURES_DIR.joinpath(name).read_text().splitlines():
+        if line.startswith("#"):
+            continue
+        if not line:
+            blocks.append([])
+            continue
+        blocks[-1].append(line)
+    return [block for block in blocks if block]
+
+
+def kernel_datagram(block: list[str]) -> bytes:
+    return b"\x00".join(line.encode() for line in block) + b"\x00"
+
+
+def udev_datagram(block: list[str]) -> bytes:
+    properties = b"\x00".join(line.encode() for line in block[1:]) + b"\x00"
+    header = UDEV_MONITOR_HEADER.pack(b"libudev\x00", socket.htonl(UDEV_MONITOR_MAGIC), 40, 40, len(properties))
+    return header + b"\x00" * (40 - len(header)) + properties
+
+
+class Replay:
+    def __init__(self, debounce: float = 0.05) -> None:
+        self.calls: list[frozenset[HotplugDeviceEnum]] = []
+        self.called = threading.Event()
+        self.receiver, self.sender = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.monitor = UeventMonitor(Wayland(), self.on_hotplug, debounce=debounce, sock=self.receiver)
+        self.thread = threading.Thread(target=self.monitor.run, daemon=True)
+        self.thread.start()
+
+    def on_hotplug(self, devices: frozenset[HotplugDeviceEnum]) -> None:
+        self.calls.append(devices)
+        self.called.set()
+
+    def send(self, datagrams: list[bytes]) -> None:
+        for datagram in datagrams:
+            self.sender.send(datagram)
+
+    def finish(self) -> None:
+        self.monitor.stop()
+        self.thread.join(1)
+        self.sender.close()
+        self.monitor.close()
+
+
+def test_parse_kernel_and_udev_formats() -> None:
+    block = load_recorded_stream("uevent_touchscreen_replug.txt")[3]
+    for datagram in (kernel_datagram(block), udev_datagram(block)):
+        event = parse_uevent(datagram)
+        assert event
+        assert event.action == "add"
+        assert event.subsystem == "input"
+        assert event.properties["NAME"] == '"ILITEK ILITEK-TP"'
+
+    assert parse_uevent(b"garbage") is None
+    assert parse_uevent(b"libudev\x00" + struct.pack("!I", 0xDEAD) + b"\x00" * 28) is None
+
+
+def test_replug_burst_is_debounced_to_single_touchscreen_call() -> None:
+    replay = Replay()
+    try:
+        replay.send([udev_datagram(block) for block in load_recorded_stream("uevent_touchscreen_replug.txt")])
+        assert replay.called.wait(2)
+        replay.called.clear()
+        assert not replay.called.wait(0.2)
+    finally:
+        replay.finish()
+
+    assert replay.calls == [frozenset({HotplugDeviceEnum.TOUCHSCREEN})]
+
+
+def test_unrelated_devices_are_ignored() -> None:
+    blocks = load_recorded_stream("uevent_touchscreen_replug.txt")
+    replay = Replay()
+    try:
+        # Keyboard and USB storage only
+        replay.send([kernel_datagram(blocks[1]), kernel_datagram(blocks[2])])
+        assert not replay.called.wait(0.3)
+    finally:
+        replay.finish()
+
+    assert replay.calls == []
+
+
+def test_drm_hotplug_and_forced_touchscreen_name() -> None:
+    replay = Replay()
+    replay.monitor.force_touchscreen_name = "ILITEK ILITEK-TP"
+    try:
+        replay.send([
+            kernel_datagram(["change@/devices/platform/gpu/drm/card1", "ACTION=change", "DEVPATH=/devices/platform/gpu/drm/card1", "SUBSYSTEM=drm", "HOTPLUG=1", "SEQNUM=2310"]),
+            kernel_datagram(load_recorded_stream("uevent_touchscreen_replug.txt")[3]),
+        ])
+        assert replay.called.wait(2)
+    finally:
+        replay.finish()
+
+    assert replay.calls == [frozenset({HotplugDeviceEnum.SCREEN, HotplugDeviceEnum.TOUCHSCREEN})]